@@ -0,0 +1,7 @@
+"""
+Benchmarks package - synthetic fixtures and timing harness
+
+Run from the project root:
+
+    python -m benchmarks --rows 10000 100000 1000000
+"""
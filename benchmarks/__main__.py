@@ -0,0 +1,61 @@
+"""
+Benchmark runner - ``python -m benchmarks``
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from .fixtures import parse_size
+from .harness import BENCHMARKS, DEFAULT_HISTORY, append_history, find_regressions, load_history, run_suite
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Time Augment VIP operations on synthetic VS Code state")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000],
+                        help="ItemTable row counts to generate (default: 10000 100000)")
+    parser.add_argument("--match-ratio", type=float, default=0.01,
+                        help="fraction of keys containing 'augment' (default: 0.01)")
+    parser.add_argument("--value-size", type=int, default=256, help="approximate value size in bytes")
+    parser.add_argument("--storage-size", default="4KB", help="storage.json size, e.g. 64KB or 20MB")
+    parser.add_argument("--workspaces", type=int, default=20,
+                        help="workspaceStorage folders to generate (default: 20)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (default: 3)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument("--no-history", action="store_true", help="do not record this run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        rows=args.rows,
+        match_ratio=args.match_ratio,
+        value_size=args.value_size,
+        storage_size=parse_size(args.storage_size),
+        workspaces=args.workspaces,
+        repeat=args.repeat,
+        only=args.only,
+        progress=lambda message: print(f"... {message}", file=sys.stderr),
+    )
+
+    print(f"{'benchmark':<28} {'rows':>10} {'best (ms)':>12} {'median (ms)':>12}")
+    for result in results:
+        print(f"{result.name:<28} {result.params['rows']:>10} "
+              f"{result.best * 1000:>12.2f} {result.median * 1000:>12.2f}")
+
+    regressions = find_regressions(load_history(args.history), results, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression['name']} ({regression['params']['rows']} rows): "
+              f"{regression['previous_median'] * 1000:.2f} ms -> {regression['median'] * 1000:.2f} ms "
+              f"(previous commit {regression['previous_commit']})")
+
+    if not args.no_history:
+        append_history(args.history, results)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
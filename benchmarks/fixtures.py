@@ -0,0 +1,141 @@
+"""
+Synthetic VS Code state fixtures for benchmarks
+
+Generates ``state.vscdb`` databases and ``storage.json`` files shaped like the
+ones VS Code writes, at sizes well beyond what a developer machine usually has.
+"""
+
+import json
+import random
+import sqlite3
+import string
+import uuid
+from pathlib import Path
+from typing import Iterator, Tuple
+
+# Same schema VS Code uses for its global and workspace state databases
+ITEM_TABLE_SCHEMA = "CREATE TABLE IF NOT EXISTS ItemTable (key TEXT UNIQUE ON CONFLICT REPLACE, value BLOB)"
+
+# Prefixes for rows the cleaner must remove / keep
+MATCH_PREFIXES = ["augment.vscode-augment", "Augment.augment-chat", "workbench.view.extension.augment-panel"]
+OTHER_PREFIXES = ["workbench.panel", "memento/webviewView", "ms-python.python", "terminal.history", "editor.state"]
+
+_SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    """Parse a human size like '64KB' or '20MB' into bytes"""
+    text = text.strip().upper()
+    number = text.rstrip(string.ascii_uppercase)
+    unit = text[len(number):]
+    if unit not in _SIZE_UNITS:
+        raise ValueError(f"Unknown size unit in {text!r}")
+    return int(float(number) * _SIZE_UNITS[unit])
+
+
+def _value_pool(value_size: int, seed: int, pool_size: int = 64) -> list:
+    """Pre-generate a small pool of values so row generation stays cheap"""
+    rng = random.Random(seed)
+    body_size = max(value_size - 9, 1)
+    pool = []
+    for _ in range(pool_size):
+        body = "%0*x" % (body_size, rng.getrandbits(body_size * 4))
+        pool.append(json.dumps({"v": body[:body_size]}))
+    return pool
+
+
+def iter_rows(rows: int, match_ratio: float, value_size: int, seed: int = 0) -> Iterator[Tuple[str, str]]:
+    """Yield (key, value) rows; about ``match_ratio`` of keys contain 'augment'"""
+    rng = random.Random(seed)
+    pool = _value_pool(value_size, seed)
+    for index in range(rows):
+        if rng.random() < match_ratio:
+            prefix = MATCH_PREFIXES[index % len(MATCH_PREFIXES)]
+        else:
+            prefix = OTHER_PREFIXES[index % len(OTHER_PREFIXES)]
+        yield f"{prefix}.{index:09d}", pool[index % len(pool)]
+
+
+def make_state_db(path: Path, rows: int, match_ratio: float = 0.01,
+                  value_size: int = 256, seed: int = 0) -> Path:
+    """Create a synthetic state.vscdb with ``rows`` ItemTable rows"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+
+    connection = sqlite3.connect(str(path))
+    try:
+        # Durability is irrelevant while generating fixtures
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute(ITEM_TABLE_SCHEMA)
+        connection.executemany(
+            "INSERT INTO ItemTable (key, value) VALUES (?, ?)",
+            iter_rows(rows, match_ratio, value_size, seed)
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    return path
+
+
+def make_storage_json(path: Path, target_size: int = 4096, seed: int = 0) -> Path:
+    """Create a synthetic storage.json of roughly ``target_size`` bytes"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    content = {
+        "telemetry.machineId": "%064x" % rng.getrandbits(256),
+        "telemetry.devDeviceId": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "telemetry.sqmId": "",
+        "theme": "vs-dark",
+    }
+
+    # Recently opened paths dominate real storage.json files
+    entries = []
+    content["openedPathsList"] = {"entries": entries}
+    approx_size = len(json.dumps(content))
+    index = 0
+    while approx_size < target_size:
+        entry = {"folderUri": f"file:///home/dev/projects/project-{index:06d}/src/module-{rng.randint(0, 9999)}"}
+        entries.append(entry)
+        approx_size += len(json.dumps(entry)) + 6
+        index += 1
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(content, f, indent=2)
+    return path
+
+
+def make_workspace_storage(user_data: Path, workspaces: int, rows: int = 100,
+                           files_per_workspace: int = 10, seed: int = 0) -> Path:
+    """Create ``User/workspaceStorage/<hash>/`` folders like VS Code does per opened folder"""
+    rng = random.Random(seed)
+    storage = Path(user_data) / "workspaceStorage"
+    for index in range(workspaces):
+        folder = storage / ("%032x" % rng.getrandbits(128))
+        folder.mkdir(parents=True, exist_ok=True)
+        with open(folder / "workspace.json", "w", encoding="utf-8") as f:
+            json.dump({"folder": f"file:///home/dev/projects/project-{index:06d}"}, f)
+        make_state_db(folder / "state.vscdb", rows, seed=seed + index)
+
+        # Extension-owned files (logs, caches) make up most of the entries
+        extension_dir = folder / OTHER_PREFIXES[index % len(OTHER_PREFIXES)]
+        extension_dir.mkdir(parents=True, exist_ok=True)
+        for file_index in range(files_per_workspace):
+            (extension_dir / f"cache-{file_index:04d}.json").write_bytes(b"{}" * rng.randint(16, 512))
+    return storage
+
+
+def make_user_dir(root: Path, rows: int, match_ratio: float = 0.01, value_size: int = 256,
+                  storage_size: int = 4096, seed: int = 0, workspaces: int = 0) -> Path:
+    """Create a VS Code 'User' directory with globalStorage fixtures under ``root``"""
+    user_data = Path(root) / "User"
+    global_storage = user_data / "globalStorage"
+    make_state_db(global_storage / "state.vscdb", rows, match_ratio, value_size, seed)
+    make_storage_json(global_storage / "storage.json", storage_size, seed)
+    if workspaces:
+        make_workspace_storage(user_data, workspaces, seed=seed)
+    return user_data
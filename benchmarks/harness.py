@@ -0,0 +1,261 @@
+"""
+Benchmark harness - times model, service and startup operations end to end
+
+Each benchmark gets a fresh copy of the synthetic fixtures so mutating
+operations (cleaning, ID rotation, backups) always start from the same state.
+Only the operation itself is timed; fixture copies are excluded.
+"""
+
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import fixtures
+from src import __version__
+from src.models.database_model import DatabaseModel
+from src.models.telemetry_model import TelemetryModel
+from src.services.browser_service import ItemTableReader
+from src.services.diff_service import DiffService
+from src.services.file_service import FileService
+from src.services.search_service import SearchService
+from src.services.vscode_service import VSCodeService
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_HISTORY = Path(__file__).resolve().parent / "history.json"
+
+# A benchmark receives a fresh 'User' directory and returns the callable to time
+BenchmarkSetup = Callable[[Path], Callable[[], Any]]
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings for one benchmark at one fixture size"""
+    name: str
+    params: Dict[str, Any]
+    timings: List[float] = field(default_factory=list)
+
+    @property
+    def best(self) -> float:
+        return min(self.timings)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["best"] = self.best
+        data["median"] = self.median
+        return data
+
+
+def _state_db(user_data: Path) -> Path:
+    return user_data / "globalStorage" / "state.vscdb"
+
+
+def _storage_json(user_data: Path) -> Path:
+    return user_data / "globalStorage" / "storage.json"
+
+
+def bench_database_count(user_data: Path) -> Callable[[], Any]:
+    return DatabaseModel(_state_db(user_data)).count_augment_entries
+
+
+def bench_database_info(user_data: Path) -> Callable[[], Any]:
+    return DatabaseModel(_state_db(user_data)).get_database_info
+
+
+def bench_database_remove(user_data: Path) -> Callable[[], Any]:
+    return DatabaseModel(_state_db(user_data)).remove_augment_entries
+
+
+def bench_telemetry_update(user_data: Path) -> Callable[[], Any]:
+    return TelemetryModel(_storage_json(user_data)).update_telemetry_ids
+
+
+def bench_file_backup(user_data: Path) -> Callable[[], Any]:
+    return lambda: FileService.create_backup(_state_db(user_data))
+
+
+def bench_directory_size(user_data: Path) -> Callable[[], Any]:
+    return lambda: FileService.calculate_directory_size(user_data)
+
+
+def bench_diff_backup(user_data: Path) -> Callable[[], Any]:
+    # Compare the database with a copy that had its matching rows removed
+    backup = _state_db(user_data).with_name("state.vscdb.bench-diff")
+    shutil.copy(str(_state_db(user_data)), str(backup))
+    DatabaseModel(backup).remove_augment_entries()
+    return lambda: DiffService().diff(backup, _state_db(user_data), max_changes=None)
+
+
+def bench_browser_page(user_data: Path) -> Callable[[], Any]:
+    # One page from the middle of the table: keyset pagination makes it cost the same as the first
+    connection = sqlite3.connect(str(_state_db(user_data)))
+    middle = connection.execute(
+        "SELECT key FROM ItemTable ORDER BY key LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM ItemTable)"
+    ).fetchone()[0]
+    connection.close()
+    reader = ItemTableReader(_state_db(user_data))
+    return lambda: (reader.page(middle), reader.close())
+
+
+def bench_search_index(user_data: Path) -> Callable[[], Any]:
+    return lambda: SearchService(cache_dir=user_data.parent / "cache").update_index(_state_db(user_data))
+
+
+def bench_search_query(user_data: Path) -> Callable[[], Any]:
+    # Index built beforehand; times a substring query that has to look at every key
+    service = SearchService(cache_dir=user_data.parent / "cache")
+    service.update_index(_state_db(user_data))
+    return lambda: service.search(_state_db(user_data), "vscode-augment.0000", limit=1000)
+
+
+def bench_service_run_all(user_data: Path) -> Callable[[], Any]:
+    return VSCodeService(user_data).run_all_operations
+
+
+def bench_startup_cli_status(user_data: Path) -> Callable[[], Any]:
+    command = [sys.executable, str(PROJECT_ROOT / "cli.py"), "status", "--json", "--user-data", str(user_data)]
+    return lambda: subprocess.run(command, capture_output=True, check=False)
+
+
+BENCHMARKS: Dict[str, BenchmarkSetup] = {
+    "database.count": bench_database_count,
+    "database.info": bench_database_info,
+    "database.remove": bench_database_remove,
+    "telemetry.update": bench_telemetry_update,
+    "file_service.backup": bench_file_backup,
+    "file_service.directory_size": bench_directory_size,
+    "diff.backup": bench_diff_backup,
+    "browser.page": bench_browser_page,
+    "search.index": bench_search_index,
+    "search.query": bench_search_query,
+    "service.run_all": bench_service_run_all,
+    "startup.cli_status": bench_startup_cli_status,
+}
+
+
+def run_benchmark(name: str, template: Path, params: Dict[str, Any], repeat: int) -> BenchmarkResult:
+    """Run a single benchmark ``repeat`` times against copies of ``template``"""
+    setup = BENCHMARKS[name]
+    result = BenchmarkResult(name=name, params=dict(params))
+
+    for _ in range(repeat):
+        run_root = Path(tempfile.mkdtemp(prefix="augment_vip_bench_run_"))
+        try:
+            user_data = run_root / "User"
+            shutil.copytree(str(template), str(user_data))
+            operation = setup(user_data)
+
+            start = time.perf_counter()
+            operation()
+            result.timings.append(time.perf_counter() - start)
+        finally:
+            shutil.rmtree(run_root, ignore_errors=True)
+
+    return result
+
+
+def run_suite(rows: List[int], match_ratio: float = 0.01, value_size: int = 256,
+              storage_size: int = 4096, workspaces: int = 20, repeat: int = 3, only: Optional[List[str]] = None,
+              progress: Optional[Callable[[str], None]] = None) -> List[BenchmarkResult]:
+    """Generate fixtures for every row count and run the selected benchmarks"""
+    names = [name for name in BENCHMARKS if not only or name in only]
+    results = []
+
+    for row_count in rows:
+        params = {
+            "rows": row_count,
+            "match_ratio": match_ratio,
+            "value_size": value_size,
+            "storage_size": storage_size,
+            "workspaces": workspaces,
+        }
+        fixture_root = Path(tempfile.mkdtemp(prefix="augment_vip_bench_"))
+        try:
+            if progress:
+                progress(f"Generating fixtures: {row_count} rows, storage.json {storage_size} bytes")
+            template = fixtures.make_user_dir(fixture_root, row_count, match_ratio, value_size, storage_size,
+                                             workspaces=workspaces)
+
+            for name in names:
+                if progress:
+                    progress(f"Running {name} ({row_count} rows)")
+                results.append(run_benchmark(name, template, params, repeat))
+        finally:
+            shutil.rmtree(fixture_root, ignore_errors=True)
+
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(PROJECT_ROOT),
+                              capture_output=True, text=True, check=False)
+        return proc.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_history(history_path: Path) -> List[Dict[str, Any]]:
+    """Load previous benchmark runs (oldest first)"""
+    try:
+        with open(history_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def append_history(history_path: Path, results: List[BenchmarkResult]) -> Dict[str, Any]:
+    """Append this run to the JSON history file and return the new entry"""
+    history = load_history(history_path)
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "version": __version__,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [result.to_dict() for result in results],
+    }
+    history.append(entry)
+
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    return entry
+
+
+def find_regressions(history: List[Dict[str, Any]], results: List[BenchmarkResult],
+                     threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """Compare results with the latest previous run using the same parameters"""
+    regressions = []
+    for result in results:
+        for entry in reversed(history):
+            previous = next(
+                (item for item in entry["results"]
+                 if item["name"] == result.name and item["params"] == result.params),
+                None
+            )
+            if previous is None:
+                continue
+            if result.median > previous["median"] * (1 + threshold):
+                regressions.append({
+                    "name": result.name,
+                    "params": result.params,
+                    "previous_median": previous["median"],
+                    "median": result.median,
+                    "previous_commit": entry.get("commit"),
+                })
+            break
+    return regressions
@@ -1,27 +1,15 @@
 """
-CLI entry point for backward compatibility
+CLI entry point - headless interface that never imports the Qt GUI
 """
 
 import sys
 from pathlib import Path
 
-# Add src directory to Python path  
-src_path = Path(__file__).parent / "src"
-sys.path.insert(0, str(src_path))
+# Make the project root importable when run as a script
+sys.path.insert(0, str(Path(__file__).parent))
 
-# Import from old augment_vip module for CLI compatibility
-try:
-    from augment_vip.cli import cli
-    cli()
-except ImportError:
-    print(r"""________      _______        ___    ___  ________       ___      ___           ___      ___  ________      ________          
-|\   __  \    |\  ___ \      |\  \  /  /||\   ____\     |\  \    |\  \         |\  \    /  /||\   __  \    |\   __  \         
-\ \  \|\  \   \ \   __/|     \ \  \/  / /\ \  \___|_    \ \  \   \ \  \        \ \  \  /  / /\ \  \|\  \   \ \  \|\  \        
- \ \   _  _\   \ \  \_|/__    \ \    / /  \ \_____  \    \ \  \   \ \  \        \ \  \/  / /  \ \   __  \   \ \   __  \       
-  \ \  \\  \|   \ \  \_|\ \    \/  /  /    \|____|\  \    \ \  \   \ \  \____    \ \    / /    \ \  \ \  \   \ \  \ \  \  ___ 
-   \ \__\\ _\    \ \_______\ __/  / /        ____\_\  \    \ \__\   \ \_______\   \ \__/ /      \ \__\ \__\   \ \__\ \__\|\__\
-    \|__|\|__|    \|_______||\___/ /        |\_________\    \|__|    \|_______|    \|__|/        \|__|\|__|    \|__|\|__|\|__|
-                            \|___|/         \|_________|""")
-    print("CLI module not available. Please use the GUI version:")
-    print("python main.py")
-    sys.exit(1)
+from src.core.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
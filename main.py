@@ -8,30 +8,20 @@ import sys
 import os
 import platform
 import subprocess
+from importlib.util import find_spec
 from pathlib import Path
 
+REQUIRED_MODULES = ['PySide6', 'psutil']
+
 def get_python_command():
     """Get the appropriate Python command for this system"""
-    python_commands = ['python3', 'python', 'py']
-    
-    for cmd in python_commands:
-        try:
-            result = subprocess.run([cmd, '--version'], capture_output=True, text=True)
-            if result.returncode == 0 and 'Python 3' in result.stdout:
-                return cmd
-        except FileNotFoundError:
-            continue
-    
-    return None
+    # The running interpreter is always the right one to install into;
+    # probing python3/python/py with subprocesses only slows startup down.
+    return sys.executable or None
 
 def check_dependencies():
-    """Check if required dependencies are installed"""
-    try:
-        import PySide6
-        import psutil
-        return True
-    except ImportError:
-        return False
+    """Check if required dependencies are installed (without importing them)"""
+    return all(find_spec(module) is not None for module in REQUIRED_MODULES)
 
 def install_dependencies():
     """Install required dependencies"""
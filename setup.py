@@ -13,6 +13,7 @@ setup(
     name="augment-vip",
     version="1.0.0",
     packages=find_packages(include=["src", "src.*", "augment_vip", "augment_vip.*"]),
+    py_modules=["cli", "main"],
     include_package_data=True,
     install_requires=[
         "click>=8.0.0",
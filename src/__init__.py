@@ -7,6 +7,13 @@ __version__ = "1.0.0"
 __author__ = "Azril Aiman"
 __email__ = "me@azrilaiman.my"
 
-from .core.application import Application
-
 __all__ = ['Application']
+
+
+def __getattr__(name):
+    # Resolve the Qt application lazily so headless entry points (CLI) can
+    # import models and services without pulling in PySide6.
+    if name == 'Application':
+        from .core.application import Application
+        return Application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
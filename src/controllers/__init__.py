@@ -2,6 +2,6 @@
 Controllers package - Application logic and coordination
 """
 
-from .main_controller import MainController, OperationWorker
+from .main_controller import MainController, OperationSignals
 
-__all__ = ['MainController', 'OperationWorker']
+__all__ = ['MainController', 'OperationSignals']
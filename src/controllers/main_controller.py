@@ -2,55 +2,67 @@
 Main Controller - Coordinates application logic following MVC pattern
 """
 
-from typing import TYPE_CHECKING, Optional
-from PySide6.QtCore import QObject, QThread, Signal
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Callable
+from PySide6.QtCore import QObject, Signal
 
+from ..core import metrics
+from ..core.config import get_config
+from ..core.executor import OperationExecutor, Task, TaskProgress
 from ..services.vscode_service import VSCodeService
 from ..models.database_model import DatabaseOperationResult
 from ..models.telemetry_model import TelemetryOperationResult
+from ..services.restore_service import RestoreResult
+from ..services.diagnostics_service import DatabaseDiagnostics
+from ..services.diff_service import DiffResult
+from ..services.file_service import FileService
 
 if TYPE_CHECKING:
     from ..views.main_window import MainWindow
 
 
-class OperationWorker(QThread):
-    """Worker thread for running operations without blocking UI"""
+# Changed keys listed in the log after a backup comparison
+DIFF_LOG_LIMIT = 50
+
+OPERATION_NAMES = {
+    "clean": "Database Cleaning",
+    "modify_ids": "Telemetry ID Modification",
+    "run_all": "All Operations",
+    "restore": "Backup Restore",
+    "diagnose": "Database Diagnostics",
+    "diff": "Backup Comparison",
+    "restart_vscode": "VS Code Restart",
+    "status": "Status Check",
+    "vscode_running": "VS Code Process Check"
+}
+
+# Background checks: no log line or progress bar, and they do not make the status stale
+QUIET_OPERATIONS = ("status", "vscode_running")
+
+
+def _step(message: str, call: Callable[[], Any]) -> Callable[[TaskProgress], Any]:
+    """Task body that logs ``message`` and then runs ``call``"""
+    def run(progress: TaskProgress) -> Any:
+        progress(message, "info")
+        return call()
+    return run
+
+
+def _timed(run: Callable[[TaskProgress], Any]) -> Callable[[TaskProgress], Any]:
+    """Task body that also streams its per-phase timings to the log"""
+    def timed_run(progress: TaskProgress) -> Any:
+        with metrics.collect(on_span=lambda span: progress(f"⏱️ {metrics.format_span(span)}", "info")):
+            return run(progress)
+    return timed_run
+
+
+class OperationSignals(QObject):
+    """Carries task progress and outcomes from pool threads to the GUI thread"""
     
     # Signals
     progress = Signal(str, str)  # message, type
     finished = Signal(object, str)  # result, operation_type
     error = Signal(str, str)  # message, operation_type
-    
-    def __init__(self, vscode_service: VSCodeService, operation: str):
-        super().__init__()
-        self.vscode_service = vscode_service
-        self.operation = operation
-    
-    def run(self):
-        """Run the operation in background thread"""
-        try:
-            if self.operation == "clean":
-                self.progress.emit("Starting database cleanup process...", "info")
-                result = self.vscode_service.clean_database()
-                self.finished.emit(result, "clean")
-                
-            elif self.operation == "modify_ids":
-                self.progress.emit("Starting telemetry ID modification...", "info")
-                result = self.vscode_service.modify_telemetry_ids()
-                self.finished.emit(result, "modify_ids")
-                
-            elif self.operation == "run_all":
-                self.progress.emit("Starting all operations...", "info")
-                result = self.vscode_service.run_all_operations()
-                self.finished.emit(result, "run_all")
-            
-            elif self.operation == "restart_vscode":
-                self.progress.emit("Restarting VS Code...", "info")
-                result = self.vscode_service.restart_vscode()
-                self.finished.emit(result, "restart_vscode")
-                
-        except Exception as e:
-            self.error.emit(f"Unexpected error: {str(e)}", self.operation)
 
 
 class MainController(QObject):
@@ -60,17 +72,24 @@ class MainController(QObject):
         super().__init__()
         self.view = view
         self.vscode_service = VSCodeService()
-        self.current_worker: Optional[OperationWorker] = None
+        self.executor = OperationExecutor()
+        self.signals = OperationSignals()
+        self.signals.progress.connect(self.view.add_log_message)
+        self.signals.finished.connect(self._on_operation_finished)
+        self.signals.error.connect(self._on_operation_error)
+        # Set when an operation may have changed what the status shows
+        self._status_stale = False
     
     def initialize(self):
-        """Initialize the controller and update view"""
+        """Queue the first status check (the view is updated when it finishes)"""
         self.refresh_vscode_status()
     
     def refresh_vscode_status(self):
-        """Refresh VS Code installation status and update view"""
-        self.vscode_service.refresh_installation_status()
-        status_info = self.vscode_service.get_installation_status()
-        
+        """Re-check the VS Code installation on the executor (the view is updated when it is done)"""
+        self._submit("status")
+    
+    def _apply_status(self, status_info: dict, capabilities: dict):
+        """Update the view from a finished status check"""
         if not status_info["installed"]:
             self.view.update_status("🔴 VS Code Not Found", "error")
             self.view.set_buttons_enabled(False)
@@ -78,8 +97,6 @@ class MainController(QObject):
             return
         
         # Update status based on available capabilities
-        capabilities = self.vscode_service.get_operation_capabilities()
-        
         if capabilities["can_clean_database"] and capabilities["can_modify_telemetry"]:
             self.view.update_status("🟢 VS Code Ready - All features available", "success")
         elif capabilities["can_clean_database"] or capabilities["can_modify_telemetry"]:
@@ -91,6 +108,13 @@ class MainController(QObject):
         self.view.set_specific_button_enabled("clean", capabilities["can_clean_database"])
         self.view.set_specific_button_enabled("modify", capabilities["can_modify_telemetry"])
         self.view.set_specific_button_enabled("run_all", capabilities["can_run_all"])
+        self.view.set_specific_button_enabled("restart", True)
+        self.view.set_specific_button_enabled("restore", self.vscode_service.backup_service is not None)
+        self.view.set_specific_button_enabled("diagnose", capabilities["can_clean_database"])
+        self.view.set_specific_button_enabled(
+            "diff", capabilities["can_clean_database"] and self.vscode_service.backup_service is not None
+        )
+        self.view.set_specific_button_enabled("browse", capabilities["can_clean_database"])
         
         # Log detailed status
         self._log_detailed_status(status_info, capabilities)
@@ -126,11 +150,6 @@ class MainController(QObject):
     
     def clean_database(self):
         """Clean VS Code database"""
-        if self._is_operation_running():
-            self.view.show_message_box("⚠️ Operation in Progress", 
-                                     "Another operation is currently running. Please wait.", "warning")
-            return
-        
         capabilities = self.vscode_service.get_operation_capabilities()
         if not capabilities["can_clean_database"]:
             self.view.show_message_box("❌ Operation Not Available", 
@@ -141,11 +160,6 @@ class MainController(QObject):
     
     def modify_telemetry_ids(self):
         """Modify VS Code telemetry IDs"""
-        if self._is_operation_running():
-            self.view.show_message_box("⚠️ Operation in Progress", 
-                                     "Another operation is currently running. Please wait.", "warning")
-            return
-        
         capabilities = self.vscode_service.get_operation_capabilities()
         if not capabilities["can_modify_telemetry"]:
             self.view.show_message_box("❌ Operation Not Available", 
@@ -156,11 +170,6 @@ class MainController(QObject):
     
     def run_all_operations(self):
         """Run all available operations"""
-        if self._is_operation_running():
-            self.view.show_message_box("⚠️ Operation in Progress", 
-                                     "Another operation is currently running. Please wait.", "warning")
-            return
-        
         capabilities = self.vscode_service.get_operation_capabilities()
         if not capabilities["can_run_all"]:
             self.view.show_message_box("❌ No Operations Available", 
@@ -171,61 +180,197 @@ class MainController(QObject):
     
     def restart_vscode(self):
         """Restart VS Code"""
-        if self._is_operation_running():
-            self.view.show_message_box("⚠️ Operation in Progress", 
-                                     "Another operation is currently running. Please wait.", "warning")
+        self._start_operation("restart_vscode")
+    
+    def restore_backup(self):
+        """Pick a backup file and restore it"""
+        backup_service = self.vscode_service.backup_service
+        if not backup_service:
+            self.view.show_message_box("❌ Operation Not Available", 
+                                     "No backup directory found. Please check VS Code installation.", "error")
             return
         
-        self._start_operation("restart_vscode")
+        backup_path = self.view.choose_backup_file(backup_service.backup_dir)
+        if not backup_path:
+            return
+        
+        from PySide6.QtWidgets import QMessageBox
+        reply = QMessageBox.question(
+            self.view,
+            "♻️ Restore Backup",
+            f"Restore {backup_path.name}?\n\nThe current file is backed up first. "
+            "Close VS Code before restoring.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self._start_operation("restore", backup_path=backup_path)
+    
+    def diagnose_database(self):
+        """Analyze the state database in the background"""
+        self._start_operation("diagnose")
+    
+    def diff_backup(self):
+        """Pick a backup and show what changed since it was taken"""
+        backup_service = self.vscode_service.backup_service
+        if not backup_service:
+            self.view.show_message_box("❌ Operation Not Available", 
+                                     "No backup directory found. Please check VS Code installation.", "error")
+            return
+        
+        backup_path = self.view.choose_backup_file(backup_service.backup_dir, "Select Backup to Compare")
+        if backup_path:
+            self._start_operation("diff", backup_path=backup_path)
     
-    def _start_operation(self, operation: str):
-        """Start an operation in background thread"""
-        # Log operation start
-        op_names = {
-            "clean": "Database Cleaning",
-            "modify_ids": "Telemetry ID Modification", 
-            "run_all": "All Operations",
-            "restart_vscode": "VS Code Restart"
-        }
+    def browse_database(self):
+        """Open the key browser on the global state database"""
+        database_model = self.vscode_service.database_model
+        if not database_model or not database_model.exists:
+            self.view.show_message_box("❌ Operation Not Available", 
+                                     "VS Code database not found. Please check VS Code installation.", "error")
+            return
         
-        self.view.add_log_message(f"🚀 Starting {op_names.get(operation, operation)}...", "info")
+        self.view.show_database_browser(database_model.db_path)
+    
+    def _create_task(self, operation: str, **options) -> Task:
+        """The task for ``operation``, with the files it reads or writes"""
+        service = self.vscode_service
+        paths = service.vscode_model.paths
+        state_db = [paths.state_db] if paths else []
+        storage_json = [paths.storage_json] if paths else []
+        label = OPERATION_NAMES.get(operation, operation)
         
-        # Disable UI
-        self.view.set_buttons_enabled(False)
-        self.view.show_progress(True)
+        if operation == "clean":
+            run = _step("Starting database cleanup process...", service.clean_database)
+            return Task(operation, _timed(run), state_db, mutating=True, label=label)
         
-        # Create and start worker thread
-        self.current_worker = OperationWorker(self.vscode_service, operation)
-        self.current_worker.progress.connect(self.view.add_log_message)
-        self.current_worker.finished.connect(self._on_operation_finished)
-        self.current_worker.error.connect(self._on_operation_error)
-        self.current_worker.start()
+        if operation == "modify_ids":
+            run = _step("Starting telemetry ID modification...", service.modify_telemetry_ids)
+            return Task(operation, _timed(run), storage_json, mutating=True, label=label)
+        
+        if operation == "run_all":
+            run = _step("Starting all operations...", service.run_all_operations)
+            return Task(operation, _timed(run), state_db + storage_json, mutating=True, label=label)
+        
+        if operation == "restore":
+            backup_path = options["backup_path"]
+            target = service.resolve_backup_target(backup_path)
+            run = _step(f"Verifying and restoring {backup_path.name}...",
+                        lambda: service.restore_backup(backup_path))
+            return Task(operation, _timed(run), [target] if target else state_db + storage_json,
+                        mutating=True, label=label)
+        
+        if operation == "diagnose":
+            def run(progress: TaskProgress) -> DatabaseDiagnostics:
+                def partial(report: DatabaseDiagnostics):
+                    # Stream partial diagnostics to the GUI log
+                    if not report.complete and report.rows_scanned:
+                        top = ", ".join(usage.prefix for usage in report.prefixes[:3])
+                        progress(f"🔎 {report.rows_scanned} rows scanned, largest so far: {top}", "info")
+                progress("Analyzing database (read-only)...", "info")
+                return service.diagnose_database(on_progress=partial)
+            return Task(operation, _timed(run), state_db, label=label)
+        
+        if operation == "diff":
+            backup_path = options["backup_path"]
+            run = _step(f"Comparing {backup_path.name} with the current database...",
+                        lambda: service.diff_databases(backup_path, max_changes=DIFF_LOG_LIMIT))
+            return Task(operation, _timed(run), state_db + [backup_path], label=label)
+        
+        if operation == "restart_vscode":
+            # VS Code writes both files while it runs
+            run = _step("Restarting VS Code...", service.restart_vscode)
+            return Task(operation, _timed(run), state_db + storage_json, mutating=True, label=label)
+        
+        if operation == "status":
+            # Reads both files (an entry count, telemetry IDs), so it waits for changes to them
+            def run(progress: TaskProgress) -> Any:
+                service.refresh_installation_status()
+                return service.get_installation_status(), service.get_operation_capabilities()
+            return Task(operation, run, state_db + storage_json, label=label)
+        
+        if operation == "vscode_running":
+            message = options["message"]
+            return Task(operation, lambda progress: (service.is_vscode_running(), message), label=label)
+        
+        raise ValueError(f"Unknown operation: {operation}")
+    
+    def _start_operation(self, operation: str, **options):
+        """Queue an operation on the executor (it starts once nothing it conflicts with is ahead)"""
+        task = self._create_task(operation, **options)
+        
+        if get_config().logging.auto_clear_logs and self.executor.idle:
+            self.view.clear_output()
+        
+        blockers = self.executor.blockers(task)
+        if blockers:
+            waiting_for = ", ".join(blocker.label for blocker in blockers)
+            self.view.add_log_message(f"⏳ {task.label} queued behind {waiting_for}", "info")
+        else:
+            self.view.add_log_message(f"🚀 Starting {task.label}...", "info")
+        self.view.show_progress(True)
+        self._submit_task(task, operation)
+    
+    def _submit(self, operation: str, **options):
+        """Queue a background check without announcing it"""
+        self._submit_task(self._create_task(operation, **options), operation)
+    
+    def _submit_task(self, task: Task, operation: str):
+        future = self.executor.submit(task, progress=self.signals.progress.emit)
+        # Last: an already finished future runs the callback right here
+        future.add_done_callback(lambda done: self._deliver(done, operation))
+    
+    def _deliver(self, future: Future, operation: str):
+        """Hand a task's outcome to the GUI thread (called on the pool thread)"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.signals.error.emit(f"Unexpected error: {str(error)}", operation)
+        else:
+            self.signals.finished.emit(future.result(), operation)
     
     def _on_operation_finished(self, result, operation_type: str):
         """Handle operation completion"""
-        self._cleanup_worker()
-        self.view.show_progress(False)
-        
         if operation_type == "clean":
             self._handle_database_result(result)
         elif operation_type == "modify_ids":
             self._handle_telemetry_result(result)
         elif operation_type == "run_all":
             self._handle_all_operations_result(result)
+        elif operation_type == "restore":
+            self._handle_restore_result(result)
+        elif operation_type == "diagnose":
+            self._handle_diagnostics_result(result)
+        elif operation_type == "diff":
+            self._handle_diff_result(result)
         elif operation_type == "restart_vscode":
             self._handle_restart_result(result)
+        elif operation_type == "status":
+            self._apply_status(*result)
+        elif operation_type == "vscode_running":
+            self._handle_vscode_running(*result)
         
-        # Re-enable UI and refresh status
-        self.view.set_buttons_enabled(True)
-        self.refresh_vscode_status()
+        self._after_operation(operation_type)
+    
+    def _after_operation(self, operation_type: str):
+        """Refresh status once the queue has drained after anything that may have changed it"""
+        if operation_type not in QUIET_OPERATIONS:
+            self._status_stale = True
+        if self.executor.idle:
+            self.view.show_progress(False)
+            if self._status_stale:
+                self._status_stale = False
+                self.refresh_vscode_status()
     
     def _on_operation_error(self, error_message: str, operation_type: str):
         """Handle operation error"""
-        self._cleanup_worker()
-        self.view.show_progress(False)
-        self.view.set_buttons_enabled(True)
+        self._after_operation(operation_type)
+        if operation_type == "status":
+            self.view.update_status("🔴 Status check failed", "error")
         
-        self.view.add_log_message(f"❌ {operation_type} failed: {error_message}", "error")
+        self.view.add_log_message(f"❌ {OPERATION_NAMES.get(operation_type, operation_type)} failed: {error_message}",
+                                  "error")
         self.view.show_message_box("❌ Operation Failed", error_message, "error")
     
     def _handle_database_result(self, result: DatabaseOperationResult):
@@ -234,8 +379,21 @@ class MainController(QObject):
             self.view.add_log_message(result.message, "success")
             if result.entries_affected > 0:
                 self.view.add_log_message(f"✨ {result.entries_affected} entries removed", "success")
+            for rewrite in result.rewrites:
+                self.view.add_log_message(
+                    f"✂️ {rewrite.key}: {rewrite.entries_removed} nested entries stripped "
+                    f"({FileService.format_file_size(rewrite.bytes_before)} -> "
+                    f"{FileService.format_file_size(rewrite.bytes_after)})",
+                    "info"
+                )
             if result.backup_path:
                 self.view.add_log_message(f"💾 Backup created: {result.backup_path.name}", "info")
+            if result.wal and result.wal.journal_mode == "wal":
+                self.view.add_log_message(
+                    f"📝 WAL {FileService.format_file_size(result.wal.wal_bytes)}, snapshot by {result.wal.snapshot}"
+                    + (f" after {result.wal.checkpoint} checkpoint" if result.wal.checkpoint else ""),
+                    "info"
+                )
             self.view.show_message_box("✅ Database Cleaned", result.message, "success")
         else:
             self.view.add_log_message(f"Database cleaning failed: {result.message}", "error")
@@ -253,18 +411,70 @@ class MainController(QObject):
             if result.backup_path:
                 self.view.add_log_message(f"💾 Backup created: {result.backup_path.name}", "info")
             
-            # Ask if user wants to restart VS Code
-            if self._should_restart_vscode():
-                self._ask_restart_vscode()
-            else:
-                self.view.add_log_message("⚠️ Restart VS Code for changes to take effect", "warning")
-                self.view.show_message_box("✅ Telemetry IDs Updated", result.message + "\\n\\nRestart VS Code for changes to take effect.", "success")
+            # Ask if user wants to restart VS Code (once the process scan is back)
+            self._submit("vscode_running", message=result.message)
         else:
             self.view.add_log_message(f"Telemetry ID modification failed: {result.message}", "error")
             if result.error:
                 self.view.add_log_message(f"Error details: {result.error}", "error")
             self.view.show_message_box("❌ Telemetry Modification Failed", result.message, "error")
     
+    def _handle_restore_result(self, result: RestoreResult):
+        """Handle backup restore result"""
+        if result.success:
+            self.view.add_log_message(result.message, "success")
+            for check in result.checks:
+                self.view.add_log_message(f"✔️ {check}", "info")
+            if result.safety_backup:
+                self.view.add_log_message(f"💾 Previous version saved as: {result.safety_backup.name}", "info")
+            self.view.show_message_box("✅ Backup Restored", 
+                                     f"{result.message}\n\nRestart VS Code for changes to take effect.", "success")
+        else:
+            self.view.add_log_message(f"Restore failed: {result.message}", "error")
+            if result.error:
+                self.view.add_log_message(f"Error details: {result.error}", "error")
+            self.view.show_message_box("❌ Restore Failed", result.message, "error")
+    
+    def _handle_diagnostics_result(self, report: DatabaseDiagnostics):
+        """Log a diagnostics report"""
+        if not report.complete:
+            self.view.add_log_message(f"Diagnostics failed: {report.error}", "error")
+            return
+        
+        size = FileService.format_file_size
+        self.view.add_log_message(
+            f"Database {size(report.file_size)}, integrity: {report.integrity}" + (" (cached)" if report.cached else ""),
+            "success" if report.integrity == "ok" else "error"
+        )
+        self.view.add_log_message(
+            f"{report.freelist_count} of {report.page_count} pages free, {size(report.reclaimable_bytes)} reclaimable",
+            "info"
+        )
+        if report.vacuum_recommended:
+            self.view.add_log_message("💡 VACUUM recommended: cleaning will compact the database", "warning")
+        for usage in report.prefixes[:10]:
+            self.view.add_log_message(f"📦 {usage.prefix}: {size(usage.bytes)} in {usage.rows} rows", "info")
+    
+    def _handle_diff_result(self, result: DiffResult):
+        """Log a backup comparison"""
+        if not result.success:
+            self.view.add_log_message(f"Comparison failed: {result.message}", "error")
+            if result.error:
+                self.view.add_log_message(f"Error details: {result.error}", "error")
+            return
+        
+        size = FileService.format_file_size
+        sign = "+" if result.size_delta >= 0 else "-"
+        self.view.add_log_message(f"{result.message} ({sign}{size(abs(result.size_delta))})", "success")
+        markers = {"added": "➕", "removed": "➖", "changed": "✏️"}
+        for change in result.changes:
+            self.view.add_log_message(
+                f"{markers[change.change]} {change.key} ({size(change.old_size)} → {size(change.new_size)})", "info"
+            )
+        if result.truncated:
+            self.view.add_log_message(f"… first {len(result.changes)} changes shown; use `augment-vip diff` for all",
+                                      "info")
+    
     def _handle_all_operations_result(self, result: dict):
         """Handle all operations result"""
         db_result = result.get("database_result")
@@ -290,30 +500,23 @@ class MainController(QObject):
                                      "Some operations failed or were not available. Check the log for details.", 
                                      "warning")
     
-    def _is_operation_running(self) -> bool:
-        """Check if an operation is currently running"""
-        return self.current_worker is not None and self.current_worker.isRunning()
-    
-    def _cleanup_worker(self):
-        """Clean up worker thread"""
-        if self.current_worker:
-            if self.current_worker.isRunning():
-                self.current_worker.quit()
-                self.current_worker.wait()
-            self.current_worker = None
-    
     def cleanup(self):
         """Cleanup controller resources"""
-        self._cleanup_worker()
+        # Queued operations are dropped; running ones are allowed to finish
+        self.executor.shutdown(wait=True)
         
         # Log cleanup
         backup_count = len(self.vscode_service.get_backup_files())
         if backup_count > 0:
             self.view.add_log_message(f"💾 {backup_count} backup files available", "info")
     
-    def _should_restart_vscode(self) -> bool:
-        """Check if VS Code should be restarted (if it's currently running)"""
-        return self.vscode_service.is_vscode_running()
+    def _handle_vscode_running(self, running: bool, message: str):
+        """Offer a restart if VS Code is running after its telemetry IDs changed"""
+        if running:
+            self._ask_restart_vscode()
+        else:
+            self.view.add_log_message("⚠️ Restart VS Code for changes to take effect", "warning")
+            self.view.show_message_box("✅ Telemetry IDs Updated", message + "\\n\\nRestart VS Code for changes to take effect.", "success")
     
     def _ask_restart_vscode(self):
         """Ask user if they want to restart VS Code"""
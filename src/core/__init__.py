@@ -2,6 +2,13 @@
 Core package - Application foundation and utilities
 """
 
-from .application import Application, run_gui_application
-
 __all__ = ['Application', 'run_gui_application']
+
+
+def __getattr__(name):
+    # The GUI application is only imported on demand so that the CLI and
+    # other headless tools in this package never load PySide6.
+    if name in __all__:
+        from . import application
+        return getattr(application, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
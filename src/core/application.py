@@ -5,8 +5,9 @@ Core Application - Main application entry point with MVC architecture
 import sys
 from pathlib import Path
 from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 
+from .config import get_config
 from ..views.main_window import MainWindow
 
 
@@ -24,8 +25,9 @@ class Application:
             self.qt_app = QApplication(sys.argv)
             
             # Set application properties
-            self.qt_app.setApplicationName("Augment VIP")
-            self.qt_app.setApplicationVersion("1.0.0")
+            app_config = get_config().application
+            self.qt_app.setApplicationName(app_config.name)
+            self.qt_app.setApplicationVersion(app_config.version)
             self.qt_app.setOrganizationName("Azril Aiman")
             self.qt_app.setOrganizationDomain("azrilaiman.my")
             
@@ -51,6 +53,10 @@ class Application:
             # Show main window
             self.main_window.show()
             
+            # Load the controller and scan VS Code once the event loop has
+            # painted the window, so startup is not blocked by the scan
+            QTimer.singleShot(0, self.main_window.start)
+            
             # Run event loop
             return self.qt_app.exec()
             
@@ -0,0 +1,62 @@
+"""
+Backups - Naming and checksums shared by every backup producer
+
+A backup of ``<dir>/<name>`` is written to ``<dir>/<name>.<suffix>_<timestamp>``
+(optionally followed by ``-N`` when several backups are taken in the same
+second, or by an archive extension). Keeping the original name as the prefix
+lets restore find the target without any other metadata.
+"""
+
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+HASH_ALGORITHM = "sha256"
+HASH_CHUNK_SIZE = 1024 * 1024
+# Backups compressed after they were taken (archives are .tar.gz already)
+COMPRESSED_EXTENSION = ".gz"
+
+
+def backup_path_for(file_path: Path, backup_suffix: str, extension: str = "") -> Path:
+    """A new, unused backup path for ``file_path``"""
+    file_path = Path(file_path)
+    stem = f"{file_path.name}.{backup_suffix}_{datetime.now().strftime(TIMESTAMP_FORMAT)}"
+    candidate = file_path.with_name(stem + extension)
+    counter = 1
+    while candidate.exists():
+        candidate = file_path.with_name(f"{stem}-{counter}{extension}")
+        counter += 1
+    return candidate
+
+
+def source_name(backup_name: str, backup_suffix: str) -> Optional[str]:
+    """Name of the file a backup was taken from, or None if ``backup_name`` is not a backup"""
+    source, sep, rest = backup_name.partition(f".{backup_suffix}")
+    if not sep or not source or (rest and not rest.startswith("_")):
+        return None
+    return source
+
+
+def backup_timestamp(backup_name: str, backup_suffix: str) -> Optional[datetime]:
+    """Creation time encoded in a backup name, if any"""
+    stamp = backup_name.rpartition(f".{backup_suffix}_")[2][:15]
+    try:
+        return datetime.strptime(stamp, TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def new_hash():
+    """Hash object used for backup checksums"""
+    return hashlib.new(HASH_ALGORITHM)
+
+
+def file_checksum(path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Streaming checksum of a file (constant memory for any size)"""
+    digest = new_hash()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,547 @@
+"""
+Command Line Interface - Headless entry point built on VSCodeService
+
+This module must never import PySide6 (directly or through the views and
+controllers packages) so that it starts quickly and works without a display,
+e.g. over SSH or from cron.
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+from .config import ConfigError, configure, parse_overrides
+from .serialization import to_jsonable
+from ..services.vscode_service import VSCodeService
+from ..services.file_service import FileService
+from ..services.backup_service import RetentionPolicy, RetentionResult
+
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+
+
+def _emit(payload: Dict[str, Any], as_json: bool, lines: List[str]) -> None:
+    """Write either the JSON payload or the human-readable lines to stdout"""
+    if as_json:
+        print(json.dumps(to_jsonable(payload), indent=2, ensure_ascii=False))
+    else:
+        for line in lines:
+            print(line)
+
+
+def _operation_lines(label: str, result: Any) -> List[str]:
+    """Human-readable summary of a database or telemetry operation result"""
+    if result is None:
+        return [f"{label}: skipped (not available)"]
+
+    lines = [f"{label}: {'OK' if result.success else 'FAILED'} - {result.message}"]
+    if getattr(result, "backup_path", None):
+        lines.append(f"  backup: {result.backup_path}")
+    for rewrite in getattr(result, "rewrites", None) or []:
+        lines.append(
+            f"  rewrote {rewrite.key}: {rewrite.entries_removed} entries, "
+            f"{FileService.format_file_size(rewrite.bytes_before)} -> {FileService.format_file_size(rewrite.bytes_after)}"
+        )
+    wal = getattr(result, "wal", None)
+    if wal is not None:
+        checkpoint = (
+            f", checkpoint {wal.checkpoint}: {wal.checkpointed_frames}/{wal.wal_frames} frames"
+            + (" (busy)" if wal.busy else "")
+        ) if wal.checkpoint else ""
+        lines.append(
+            f"  journal: {wal.journal_mode}, WAL {FileService.format_file_size(wal.wal_bytes)} -> "
+            f"{FileService.format_file_size(wal.wal_bytes_after)}{checkpoint}, snapshot by {wal.snapshot}"
+        )
+    if getattr(result, "error", None):
+        lines.append(f"  error: {result.error}")
+    for span in getattr(result, "metrics", None) or []:
+        lines.append(f"  {metrics.format_span(span)}")
+    return lines
+
+
+def _progress_printer():
+    """Progress callback rewriting one stderr line, or None when stderr is not a terminal"""
+    if not sys.stderr.isatty():
+        return None
+
+    def report(files: int, size: int) -> None:
+        sys.stderr.write(f"\r  {files} files, {FileService.format_file_size(size)} removed")
+        sys.stderr.flush()
+    return report
+
+
+def _workspace_lines(summary: Any) -> List[str]:
+    """Summary plus one line per workspace database that changed or failed"""
+    lines = [
+        f"Workspaces: {'OK' if summary.success else 'FAILED'} - {summary.message}, "
+        f"{FileService.format_file_size(summary.bytes_reclaimed)} reclaimed"
+    ]
+    for result in summary.results:
+        if result.entries_affected or result.values_rewritten or not result.success:
+            lines.append(
+                f"  {result.workspace_id}: {result.entries_affected} rows, {result.values_rewritten} values rewritten, "
+                f"{FileService.format_file_size(result.bytes_reclaimed)} reclaimed"
+                + (f" - {result.error}" if result.error else "")
+            )
+    for span in summary.metrics:
+        lines.append(f"  {metrics.format_span(span)}")
+    return lines
+
+
+def cmd_status(service: VSCodeService, args: argparse.Namespace) -> int:
+    """Show VS Code installation, database and telemetry status"""
+    status = service.get_installation_status()
+    payload = {"command": "status", "success": status["installed"], "status": status}
+
+    lines = [status["message"]]
+    if status["installed"]:
+        paths = status["details"]["paths"]
+        exists = status["details"]["exists"]
+        lines.append(f"User data: {paths['user_data']}")
+
+        database = status["services"]["database"]
+        if database["available"]:
+            info = database["info"]
+            lines.append(f"Database: {paths['state_db']} ({FileService.format_file_size(info.get('file_size', 0))})")
+            lines.append(f"  entries: {info.get('total_entries', '?')}, augment entries: {info.get('augment_entries', '?')}")
+        else:
+            lines.append(f"Database: unavailable ({database['reason']})")
+
+        telemetry = status["services"]["telemetry"]
+        if telemetry["available"]:
+            info = telemetry["info"]
+            lines.append(f"Storage: {paths['storage_json']}")
+            lines.append(f"  telemetry IDs present: {'yes' if info.get('has_telemetry_data') else 'no'}")
+        else:
+            lines.append(f"Storage: unavailable ({telemetry['reason']})")
+
+        if not exists["user_data"]:
+            lines.append("User data directory does not exist")
+
+    _emit(payload, args.json, lines)
+    return EXIT_OK if status["installed"] else EXIT_FAILURE
+
+
+def cmd_clean(service: VSCodeService, args: argparse.Namespace) -> int:
+    """Clean the database and/or regenerate telemetry IDs"""
+    payload: Dict[str, Any] = {"command": "clean", "target": args.target}
+    lines: List[str] = []
+
+    if args.target == "database":
+        result = service.clean_database()
+        payload["database_result"] = result
+        success = result.success
+        lines.extend(_operation_lines("Database", result))
+    elif args.target == "workspaces":
+        summary = service.clean_workspaces()
+        payload["workspaces_result"] = summary
+        success = summary.success
+        lines.extend(_workspace_lines(summary))
+    elif args.target == "extensions":
+        printer = None if args.json else _progress_printer()
+        result = service.clean_extension_storage(progress=printer)
+        if printer:
+            sys.stderr.write("\n")
+        payload["extensions_result"] = result
+        success = result.success
+        lines.append(f"Extensions: {'OK' if success else 'FAILED'} - {result.message}")
+        lines.extend(f"  archived: {path}" for path in result.archives)
+        lines.extend(f"  {name}: {error}" for name, error in result.errors.items())
+        lines.extend(f"  {metrics.format_span(span)}" for span in result.metrics)
+    elif args.target == "telemetry":
+        result = service.modify_telemetry_ids()
+        payload["telemetry_result"] = result
+        success = result.success
+        lines.extend(_operation_lines("Telemetry", result))
+    else:
+        results = service.run_all_operations()
+        payload.update(results)
+        success = results["overall_success"]
+        lines.extend(_operation_lines("Database", results["database_result"]))
+        lines.extend(_operation_lines("Telemetry", results["telemetry_result"]))
+
+    payload["success"] = success
+    _emit(payload, args.json, lines)
+    return EXIT_OK if success else EXIT_FAILURE
+
+
+def cmd_workspaces(service: VSCodeService, args: argparse.Namespace) -> int:
+    """List workspace databases and their matching entries"""
+    if not service.workspace_service:
+        payload = {"command": "workspaces", "success": False, "workspaces": []}
+        _emit(payload, args.json, ["Workspace storage not available"])
+        return EXIT_FAILURE
+
+    databases = service.workspace_service.find_databases()
+    counts = service.workspace_service.count_entries()
+    workspaces = [
+        {"workspace_id": database.workspace_id, "path": database.db_path, "size": database.size,
+         "augment_entries": counts.get(database.workspace_id, 0)}
+        for database in databases
+    ]
+    unreadable = [workspace for workspace in workspaces if workspace["augment_entries"] is None]
+    payload = {"command": "workspaces", "success": not unreadable, "workspaces": workspaces}
+
+    total_size = sum(database.size for database in databases)
+    matching = [workspace for workspace in workspaces if workspace["augment_entries"]]
+    lines = [
+        f"{len(databases)} workspace database(s), {FileService.format_file_size(total_size)}, "
+        f"{len(matching)} with Augment entries"
+    ]
+    for workspace in matching:
+        lines.append(
+            f"  {workspace['workspace_id']}  {FileService.format_file_size(workspace['size']):>10}  "
+            f"{workspace['augment_entries']} entries"
+        )
+    for workspace in unreadable:
+        lines.append(f"  {workspace['workspace_id']}  could not be read (locked, busy or corrupt)")
+
+    _emit(payload, args.json, lines)
+    return EXIT_FAILURE if unreadable else EXIT_OK
+
+
+def cmd_prune_workspaces(service: VSCodeService, args: argparse.Namespace) -> int:
+    """Report or remove workspaceStorage folders whose project no longer exists"""
+    result = service.prune_stale_workspaces(dry_run=not args.delete)
+    payload = {"command": "prune-workspaces", **asdict(result)}
+
+    lines = [result.message]
+    for target in result.stale:
+        lines.append(
+            f"  {target.workspace_id}  {FileService.format_file_size(target.size):>10}  {target.target_path}"
+        )
+    for workspace_id, error in result.errors.items():
+        lines.append(f"  {workspace_id}: {error}")
+    for span in result.metrics:
+        lines.append(f"  {metrics.format_span(span)}")
+
+    _emit(payload, args.json, lines)
+    return EXIT_OK if result.success else EXIT_FAILURE
+
+
+def cmd_backups(service: VSCodeService, args: argparse.Namespace) -> int:
+    """List backup files created by previous operations"""
+    backups = sorted(service.get_backup_files(), key=lambda info: info["modified"], reverse=True)
+    payload = {"command": "backups", "success": True, "backups": backups}
+
+    lines = [f"{len(backups)} backup file(s)"]
+    for info in backups:
+        lines.append(
+            f"  {info['modified']:%Y-%m-%d %H:%M:%S}  {FileService.format_file_size(info['size']):>10}  {info['path']}"
+        )
+
+    _emit(payload, args.json, lines)
+    return EXIT_OK
+
+
+def cmd_prune(service: VSCodeService, args: argparse.Namespace) -> int:
+    """Apply the backup retention policy"""
+    policy = RetentionPolicy.from_config()
+    overrides = {}
+    if args.keep is not None:
+        overrides["keep_count"] = args.keep
+    if args.max_age_days is not None:
+        overrides["max_age_days"] = args.max_age_days
+    if args.max_total_mb is not None:
+        overrides["max_total_bytes"] = int(args.max_total_mb * 1024 * 1024)
+    policy = replace(policy, **overrides)
+
+    if not service.backup_service:
+        payload = {"command": "prune", "success": False, "message": "Backup directory not available"}
+        _emit(payload, args.json, [payload["message"]])
+        return EXIT_FAILURE
+
+    if args.dry_run:
+        expired = service.backup_service.select_expired(policy)
+        result = RetentionResult(
+            success=True,
+            message=f"Would remove {len(expired)} old backup(s)",
+            removed=[record.name for record in expired],
+            bytes_freed=sum(record.size for record in expired)
+        )
+    else:
+        result = service.prune_backups(policy)
+
+    payload = {"command": "prune", "dry_run": args.dry_run, "policy": policy, **asdict(result)}
+    lines = [f"{result.message} ({FileService.format_file_size(result.bytes_freed)})"]
+    lines.extend(f"  {name}" for name in result.removed)
+    if result.error:
+        lines.append(f"  error: {result.error}")
+
+    _emit(payload, args.json, lines)
+    return EXIT_OK if result.success else EXIT_FAILURE
+
+
+def cmd_restore(service: VSCodeService, args: argparse.Namespace) -> int:
+    """Verify a backup and restore it over its original location"""
+    result = service.restore_backup(Path(args.backup), Path(args.to) if args.to else None)
+    payload = {"command": "restore", **asdict(result)}
+
+    lines = [result.message]
+    lines.extend(f"  {check}" for check in result.checks)
+    if result.error:
+        lines.append(f"  error: {result.error}")
+    if result.safety_backup:
+        lines.append(f"  previous version saved as: {result.safety_backup}")
+    for span in result.metrics:
+        lines.append(f"  {metrics.format_span(span)}")
+
+    _emit(payload, args.json, lines)
+    return EXIT_OK if result.success else EXIT_FAILURE
+
+
+def _diagnostics_lines(report: Any, top: int) -> List[str]:
+    """Page statistics, table sizes and the largest key prefixes of a diagnostics report"""
+    size = FileService.format_file_size
+    if report.error:
+        return [f"Diagnostics failed: {report.error}"]
+
+    lines = [
+        f"Database: {report.db_path} ({size(report.file_size)})" + (" [cached]" if report.cached else ""),
+        f"  integrity: {report.integrity}",
+        f"  pages: {report.page_count} x {report.page_size} bytes, {report.freelist_count} free "
+        f"({size(report.reclaimable_bytes)} reclaimable)",
+        f"  VACUUM: {'recommended' if report.vacuum_recommended else 'not needed'}",
+    ]
+    for name, stats in sorted(report.tables.items(), key=lambda item: item[1]["bytes"], reverse=True):
+        lines.append(f"  table {name}: {stats['pages']} pages, {size(stats['bytes'])} "
+                     f"({size(stats['unused'])} unused)")
+    lines.append(f"Largest key prefixes ({report.rows_scanned} rows):")
+    for usage in report.prefixes[:top]:
+        lines.append(f"  {size(usage.bytes):>10}  {usage.rows:>7} rows  {usage.prefix}")
+    return lines
+
+
+def cmd_diagnose(service: VSCodeService, args: argparse.Namespace) -> int:
+    """Integrity check and space usage per table and per key prefix"""
+    progress = None
+    if sys.stderr.isatty() and not args.json:
+        def progress(report: Any) -> None:
+            if not report.complete:
+                sys.stderr.write(f"\r  {report.rows_scanned} rows scanned")
+                sys.stderr.flush()
+
+    with metrics.collect() as spans:
+        report = service.diagnose_database(
+            Path(args.db).expanduser() if args.db else None,
+            use_cache=not args.no_cache,
+            on_progress=progress
+        )
+    if progress:
+        sys.stderr.write("\n")
+
+    payload = {"command": "diagnose", "success": report.complete, **report.to_dict()}
+    lines = _diagnostics_lines(report, args.top)
+    for span in spans:
+        lines.append(f"  {metrics.format_span(span)}")
+
+    _emit(payload, args.json, lines)
+    return EXIT_OK if report.complete else EXIT_FAILURE
+
+
+def _change_line(change: Any) -> str:
+    """One diff line: +added, -removed, ~changed with the size change"""
+    marker = {"added": "+", "removed": "-", "changed": "~"}[change.change]
+    delta = change.size_delta
+    sign = "+" if delta > 0 else "-" if delta < 0 else " "
+    return f"{marker} {sign}{FileService.format_file_size(abs(delta)):>10}  {change.key}"
+
+
+def cmd_diff(service: VSCodeService, args: argparse.Namespace) -> int:
+    """Keys that differ between a backup and the live database (or two databases)"""
+    # Human output streams every change; JSON keeps the first --limit in the payload
+    stream = None if args.json else (lambda change: print(_change_line(change)))
+    result = service.diff_databases(
+        Path(args.old).expanduser(),
+        Path(args.new).expanduser() if args.new else None,
+        max_changes=args.limit if args.json else 0,
+        on_change=stream
+    )
+    payload = {"command": "diff", "size_delta": result.size_delta, **asdict(result)}
+
+    lines = [f"{result.message} ({'+' if result.size_delta >= 0 else '-'}"
+             f"{FileService.format_file_size(abs(result.size_delta))})"]
+    if result.error:
+        lines.append(f"  error: {result.error}")
+    for span in result.metrics:
+        lines.append(f"  {metrics.format_span(span)}")
+
+    _emit(payload, args.json, lines)
+    return EXIT_OK if result.success else EXIT_FAILURE
+
+
+def cmd_search(service: VSCodeService, args: argparse.Namespace) -> int:
+    """Keys whose key or value matches a substring or an FTS5 token query"""
+    result = service.search_database(
+        args.query,
+        mode="token" if args.token else "substring",
+        scope=args.scope,
+        limit=args.limit,
+        db_path=Path(args.db).expanduser() if args.db else None,
+        rebuild=args.rebuild
+    )
+    payload = {"command": "search", **asdict(result)}
+
+    lines = [f"{hit.key}  ({FileService.format_file_size(hit.size)})" for hit in result.hits]
+    lines.append(f"{'' if result.success else 'FAILED - '}{result.message} in {result.duration * 1000:.1f} ms")
+    index = result.index
+    if index and not index.up_to_date:
+        lines.append(
+            f"  index {'built' if index.rebuilt else 'updated'} in {index.duration * 1000:.0f} ms: "
+            f"{index.rows} keys, +{index.added} -{index.removed} ~{index.changed}"
+        )
+    if result.error:
+        lines.append(f"  error: {result.error}")
+    for span in result.metrics:
+        lines.append(f"  {metrics.format_span(span)}")
+
+    _emit(payload, args.json, lines)
+    return EXIT_OK if result.success else EXIT_FAILURE
+
+
+def cmd_serve(service: VSCodeService, args: argparse.Namespace) -> int:
+    """Serve status and maintenance operations to local JSON-RPC clients until interrupted"""
+    from .server import serve  # deferred: asyncio server only needed here
+    from ..services.async_service import AsyncVSCodeService
+
+    def ready(endpoint: Dict[str, Any]) -> None:
+        where = endpoint["socket"] if "socket" in endpoint else f"{endpoint['host']}:{endpoint['port']} (token required)"
+        _emit({"command": "serve", "success": True, "endpoint": endpoint}, args.json,
+              [f"Listening on {where}", "Press Ctrl+C to stop"])
+        sys.stdout.flush()
+
+    try:
+        serve(AsyncVSCodeService(service=service), Path(args.socket).expanduser() if args.socket else None,
+              args.port, on_ready=ready)
+    except OSError as e:
+        _emit({"command": "serve", "success": False, "error": str(e)}, args.json, [f"FAILED - {e}"])
+        return EXIT_FAILURE
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for all subcommands"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="print machine-readable JSON output")
+    common.add_argument("--user-data", metavar="DIR",
+                        help="VS Code 'User' directory (defaults to the platform location)")
+    common.add_argument("--config", metavar="FILE", help="configuration file (defaults to config/app.conf)")
+    common.add_argument("--set", metavar="SECTION.KEY=VALUE", action="append", default=[],
+                        help="override a configuration value (repeatable)")
+    common.add_argument("--metrics", action="store_true", help="record per-phase timings")
+    common.add_argument("--metrics-file", metavar="FILE", help="append timing spans to FILE as JSON lines")
+
+    parser = argparse.ArgumentParser(
+        prog="augment-vip",
+        description="Augment VIP - VS Code Privacy Tools (headless)"
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    subparsers.required = True
+
+    status_parser = subparsers.add_parser("status", parents=[common], help="show VS Code status")
+    status_parser.set_defaults(handler=cmd_status)
+
+    clean_parser = subparsers.add_parser("clean", parents=[common], help="clean database and/or telemetry IDs")
+    clean_parser.add_argument("--target", choices=["database", "telemetry", "workspaces", "extensions", "all"], default="all",
+                              help="what to clean (default: all = database and telemetry)")
+    clean_parser.set_defaults(handler=cmd_clean)
+
+    workspaces_parser = subparsers.add_parser("workspaces", parents=[common],
+                                              help="list per-workspace state databases")
+    workspaces_parser.set_defaults(handler=cmd_workspaces)
+
+    prune_workspaces_parser = subparsers.add_parser(
+        "prune-workspaces", parents=[common], help="list (or --delete) workspaceStorage folders of deleted projects"
+    )
+    prune_workspaces_mode = prune_workspaces_parser.add_mutually_exclusive_group()
+    prune_workspaces_mode.add_argument("--dry-run", action="store_true",
+                                       help="only list the folders that would be removed (the default)")
+    prune_workspaces_mode.add_argument("--delete", action="store_true", help="remove the listed folders")
+    prune_workspaces_parser.set_defaults(handler=cmd_prune_workspaces)
+
+    diagnose_parser = subparsers.add_parser("diagnose", parents=[common],
+                                            help="check integrity and space usage of the state database")
+    diagnose_parser.add_argument("--db", metavar="FILE", help="database to diagnose (defaults to the global state.vscdb)")
+    diagnose_parser.add_argument("--top", type=int, default=20, metavar="N", help="key prefixes to show (default: 20)")
+    diagnose_parser.add_argument("--no-cache", action="store_true", help="ignore a cached report and rescan")
+    diagnose_parser.set_defaults(handler=cmd_diagnose)
+
+    diff_parser = subparsers.add_parser("diff", parents=[common],
+                                        help="show keys added, removed or changed since a backup")
+    diff_parser.add_argument("old", help="backup (or any state database) to compare from")
+    diff_parser.add_argument("new", nargs="?", help="database to compare with (defaults to the live state.vscdb)")
+    diff_parser.add_argument("--limit", type=int, default=1000, metavar="N",
+                             help="changes to include in --json output (default: 1000)")
+    diff_parser.set_defaults(handler=cmd_diff)
+
+    search_parser = subparsers.add_parser("search", parents=[common],
+                                          help="find keys whose key or value contains a string")
+    search_parser.add_argument("query", help="text to find, or an FTS5 query with --token")
+    search_parser.add_argument("--token", action="store_true",
+                               help="match whole words of keys with FTS5 syntax (augment AND chat, augm*)")
+    search_parser.add_argument("--in", dest="scope", choices=("all", "key", "value"), default="all",
+                               help="search keys, values or both (default: all); values are not indexed and "
+                                    "are scanned row by row, reading the first [search] value_limit_kb of each")
+    search_parser.add_argument("--limit", type=int, metavar="N", help="keys to show (default: [search] result_limit)")
+    search_parser.add_argument("--db", metavar="FILE", help="database to search (defaults to the global state.vscdb)")
+    search_parser.add_argument("--rebuild", action="store_true", help="rebuild the search index from scratch")
+    search_parser.set_defaults(handler=cmd_search)
+
+    backups_parser = subparsers.add_parser("backups", parents=[common], help="list backup files")
+    backups_parser.set_defaults(handler=cmd_backups)
+
+    prune_parser = subparsers.add_parser("prune", parents=[common], help="remove old backups")
+    prune_parser.add_argument("--keep", type=int, metavar="N", help="backups to keep per file")
+    prune_parser.add_argument("--max-age-days", type=float, metavar="DAYS", help="remove backups older than DAYS")
+    prune_parser.add_argument("--max-total-mb", type=float, metavar="MB", help="cap the total size of all backups")
+    prune_parser.add_argument("--dry-run", action="store_true", help="only list the backups that would be removed")
+    prune_parser.set_defaults(handler=cmd_prune)
+
+    restore_parser = subparsers.add_parser("restore", parents=[common], help="restore a backup file")
+    restore_parser.add_argument("backup", help="path of the backup file to restore")
+    restore_parser.add_argument("--to", metavar="PATH",
+                                help="file to overwrite (defaults to the file the backup was taken from)")
+    restore_parser.set_defaults(handler=cmd_restore)
+
+    serve_parser = subparsers.add_parser("serve", parents=[common],
+                                         help="run a local JSON-RPC control server (see src/core/server.py)")
+    serve_parser.add_argument("--socket", metavar="PATH", help="listen on a Unix socket (default: [server] socket_path)")
+    serve_parser.add_argument("--port", type=int, metavar="N",
+                              help="listen on 127.0.0.1:N with a token (default: [server] port, 0 = any free port)")
+    serve_parser.set_defaults(handler=cmd_serve)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the headless CLI"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        config = configure(Path(args.config) if args.config else None, parse_overrides(args.set))
+    except ConfigError as e:
+        parser.error(str(e))
+
+    if args.metrics or args.metrics_file or (config.metrics.enabled and not metrics.is_enabled()):
+        metrics.enable(Path(args.metrics_file) if args.metrics_file else None)
+
+    service = VSCodeService(Path(args.user_data).expanduser() if args.user_data else None)
+    try:
+        return args.handler(service, args)
+    except KeyboardInterrupt:
+        return EXIT_FAILURE
+    except BrokenPipeError:
+        # Output piped into e.g. `head`: stop quietly instead of failing again at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+Configuration - Typed access to config/app.conf
+
+The file is parsed and validated once. Values can be overridden by
+environment variables named ``AUGMENT_VIP_<SECTION>_<KEY>`` (for example
+``AUGMENT_VIP_OPERATIONS_MAX_BACKUP_FILES=10``) and by ``section.key=value``
+overrides passed to ``configure()`` (the CLI ``--set`` option). Every layer
+reads its settings through ``get_config()``.
+"""
+
+import configparser
+import os
+import re
+import sys
+from dataclasses import dataclass, field, fields, replace
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent.parent / "config" / "app.conf"
+ENV_PREFIX = "AUGMENT_VIP_"
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class ConfigError(ValueError):
+    """Raised when a configuration value is missing its section or is invalid"""
+
+
+@dataclass(frozen=True)
+class ApplicationConfig:
+    """[application] - metadata shown in the GUI"""
+    name: str = "Augment Code VIP"
+    version: str = "1.0.0"
+    author: str = "Reynald Silva"
+    email: str = ""
+    description: str = "VS Code Privacy & Database Management Tools"
+
+
+@dataclass(frozen=True)
+class UIConfig:
+    """[ui] - window geometry and theme"""
+    default_width: int = 900
+    default_height: int = 700
+    minimum_width: int = 800
+    minimum_height: int = 600
+    sidebar_width: int = 350
+    theme: str = "dark"
+
+
+@dataclass(frozen=True)
+class OperationsConfig:
+    """[operations] - database, backup and process settings"""
+    max_backup_files: int = 5
+    backup_suffix: str = "backup"
+    database_table: str = "ItemTable"
+    search_pattern: str = "%augment%"
+    rewrite_values: bool = True
+    close_wait_seconds: float = 2.0
+    restart_delay_seconds: float = 3.0
+
+
+@dataclass(frozen=True)
+class RetentionConfig:
+    """[retention] - backup pruning policy (keep count is [operations] max_backup_files)"""
+    max_age_days: float = 0.0
+    max_total_mb: float = 0.0
+    per_source: bool = True
+    auto_prune: bool = True
+
+
+@dataclass(frozen=True)
+class BackupsConfig:
+    """[backups] - second phase of a backup (runs in the background)"""
+    compress: bool = True
+    compression_level: int = 6
+    wal_checkpoint: str = "passive"
+
+
+@dataclass(frozen=True)
+class WorkspacesConfig:
+    """[workspaces] - per-workspace state databases under workspaceStorage"""
+    vacuum: bool = True
+
+
+@dataclass(frozen=True)
+class ExtensionsConfig:
+    """[extensions] - extension storage folders under globalStorage"""
+    archive: bool = True
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """[cache] - where derived data (diagnostics, search indexes) is kept"""
+    directory: str = ""
+
+    @property
+    def path(self) -> Path:
+        """Configured directory, or the platform's per-user cache directory"""
+        if self.directory:
+            return Path(self.directory).expanduser()
+        if sys.platform == "win32":
+            base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+        elif sys.platform == "darwin":
+            base = Path.home() / "Library" / "Caches"
+        else:
+            base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+        return base / "augment-vip"
+
+
+@dataclass(frozen=True)
+class SearchConfig:
+    """[search] - full-text index over ItemTable keys (kept under [cache]) and in-place value search"""
+    value_limit_kb: int = 64
+    result_limit: int = 100
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    """[server] - local control server (``augment-vip serve``)"""
+    socket_path: str = ""
+    port: int = 0
+    request_timeout_seconds: float = 600.0
+
+
+@dataclass(frozen=True)
+class PerformanceConfig:
+    """[performance] - batch sizes and worker pools"""
+    batch_size: int = 1000
+    page_size: int = 256
+    max_workers: int = 0
+
+    @property
+    def workers(self) -> int:
+        """Worker count to use; 0 in the config means one per CPU (capped at 8)"""
+        return self.max_workers or min(8, os.cpu_count() or 1)
+
+
+@dataclass(frozen=True)
+class LoggingConfig:
+    """[logging] - GUI operation log"""
+    enable_timestamps: bool = True
+    max_log_entries: int = 1000
+    auto_clear_logs: bool = False
+    flush_interval_ms: int = 16
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    """[metrics] - timing instrumentation (see core.metrics)"""
+    enabled: bool = False
+    jsonl_path: str = ""
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """Complete, validated application configuration"""
+    application: ApplicationConfig = field(default_factory=ApplicationConfig)
+    ui: UIConfig = field(default_factory=UIConfig)
+    operations: OperationsConfig = field(default_factory=OperationsConfig)
+    retention: RetentionConfig = field(default_factory=RetentionConfig)
+    backups: BackupsConfig = field(default_factory=BackupsConfig)
+    workspaces: WorkspacesConfig = field(default_factory=WorkspacesConfig)
+    extensions: ExtensionsConfig = field(default_factory=ExtensionsConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    search: SearchConfig = field(default_factory=SearchConfig)
+    server: ServerConfig = field(default_factory=ServerConfig)
+    performance: PerformanceConfig = field(default_factory=PerformanceConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    source: Optional[Path] = None
+
+
+@lru_cache(maxsize=None)
+def read_app_config(path: Optional[Path] = None) -> configparser.ConfigParser:
+    """Parse app.conf once; a missing file yields an empty configuration"""
+    # No interpolation: LIKE patterns such as %augment% are literal values
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(str(path or CONFIG_PATH), encoding="utf-8")
+    return parser
+
+
+def _convert(section: str, key: str, raw: str, target_type: type):
+    """Convert a raw string to the field type, raising ConfigError on bad input"""
+    value = raw.strip().strip('"').strip("'")
+    try:
+        if target_type is bool:
+            lowered = value.lower()
+            if lowered in ("1", "true", "yes", "on"):
+                return True
+            if lowered in ("0", "false", "no", "off", ""):
+                return False
+            raise ValueError(value)
+        if target_type is int:
+            return int(value)
+        if target_type is float:
+            return float(value)
+        return value
+    except ValueError:
+        raise ConfigError(f"[{section}] {key}: expected {target_type.__name__}, got {raw!r}") from None
+
+
+def _build_section(section: str, defaults, values: Mapping[str, str]):
+    """Apply raw string values on top of a section's defaults"""
+    known = {item.name: item.type for item in fields(defaults)}
+    updates = {}
+    for key, raw in values.items():
+        if key in known:
+            updates[key] = _convert(section, key, raw, known[key])
+    return replace(defaults, **updates)
+
+
+def _validate(config: AppConfig) -> None:
+    """Reject values that would break the application"""
+    for section in (config.ui, config.operations, config.retention, config.search, config.server,
+                    config.performance, config.logging):
+        for item in fields(section):
+            value = getattr(section, item.name)
+            if item.type in (int, float) and value < 0:
+                raise ConfigError(f"{item.name} must not be negative (got {value})")
+
+    if not _IDENTIFIER.match(config.operations.database_table):
+        raise ConfigError(f"database_table must be a plain SQL identifier (got {config.operations.database_table!r})")
+    if not config.operations.search_pattern:
+        raise ConfigError("search_pattern must not be empty")
+    if not config.operations.backup_suffix or "/" in config.operations.backup_suffix:
+        raise ConfigError(f"backup_suffix is invalid (got {config.operations.backup_suffix!r})")
+    if config.logging.max_log_entries < 1:
+        raise ConfigError("max_log_entries must be at least 1")
+    if config.performance.batch_size < 1 or config.performance.page_size < 1:
+        raise ConfigError("batch_size and page_size must be at least 1")
+    if config.backups.wal_checkpoint not in ("none", "passive", "truncate"):
+        raise ConfigError(f"wal_checkpoint must be none, passive or truncate (got {config.backups.wal_checkpoint!r})")
+    if config.server.port > 65535:
+        raise ConfigError(f"port must be at most 65535 (got {config.server.port})")
+    if not 0 <= config.backups.compression_level <= 9:
+        raise ConfigError(f"compression_level must be between 0 and 9 (got {config.backups.compression_level})")
+
+
+def _section_names() -> Dict[str, type]:
+    return {item.name: item.default_factory for item in fields(AppConfig) if item.name != "source"}
+
+
+def load_config(path: Optional[Path] = None,
+                env: Optional[Mapping[str, str]] = None,
+                overrides: Optional[Mapping[str, str]] = None) -> AppConfig:
+    """Parse, merge (file < environment < overrides) and validate configuration"""
+    path = Path(path) if path else CONFIG_PATH
+    parser = read_app_config(path)
+    env = os.environ if env is None else env
+
+    raw: Dict[str, Dict[str, str]] = {}
+    for section in _section_names():
+        raw[section] = dict(parser[section]) if parser.has_section(section) else {}
+
+    # Environment: AUGMENT_VIP_<SECTION>_<KEY>
+    for name, value in env.items():
+        if not name.startswith(ENV_PREFIX):
+            continue
+        section, _, key = name[len(ENV_PREFIX):].lower().partition("_")
+        if section in raw and key:
+            raw[section][key] = value
+
+    # Explicit overrides: "section.key" -> value
+    section_types = _section_names()
+    for dotted, value in (overrides or {}).items():
+        section, _, key = dotted.partition(".")
+        if section not in section_types or key not in {item.name for item in fields(section_types[section])}:
+            raise ConfigError(f"Unknown configuration override {dotted!r}")
+        raw[section][key] = value
+
+    sections = {
+        section: _build_section(section, factory(), raw[section])
+        for section, factory in _section_names().items()
+    }
+    config = AppConfig(source=path if path.exists() else None, **sections)
+    _validate(config)
+    return config
+
+
+def parse_overrides(items) -> Dict[str, str]:
+    """Turn ['section.key=value', ...] (CLI --set) into an overrides mapping"""
+    overrides = {}
+    for item in items or []:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ConfigError(f"Override must look like section.key=value (got {item!r})")
+        overrides[key.strip()] = value.strip()
+    return overrides
+
+
+_config: Optional[AppConfig] = None
+
+
+def get_config() -> AppConfig:
+    """The shared configuration, loaded on first use"""
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
+
+
+def configure(path: Optional[Path] = None, overrides: Optional[Mapping[str, str]] = None) -> AppConfig:
+    """Reload the shared configuration (e.g. with CLI overrides)"""
+    global _config
+    _config = load_config(path, overrides=overrides)
+    return _config
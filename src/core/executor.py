@@ -0,0 +1,140 @@
+"""
+Executor - Runs operations on a shared thread pool, ordered per target file
+
+Each task names the files it works on and whether it changes them.
+Read-only tasks run side by side; a mutating task only starts when no
+running task uses any of its files, and keeps them to itself until it
+finishes. Where two tasks conflict they start in submission order, so a
+queued write is never overtaken by a later read of the same file (and vice
+versa). Outcomes are ``concurrent.futures.Future`` objects; the GUI turns
+them into Qt signals.
+"""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, FrozenSet, Iterable, List, Optional
+
+from .config import get_config
+
+# progress(message, type) - the type is a log level such as "info"
+TaskProgress = Callable[[str, str], None]
+
+
+def _no_progress(message: str, message_type: str) -> None:
+    pass
+
+
+@dataclass(eq=False)
+class Task:
+    """One operation: ``run(progress)`` plus the files it reads or writes"""
+    name: str
+    run: Callable[[TaskProgress], Any]
+    targets: Iterable[Path] = ()
+    mutating: bool = False
+    label: str = ""
+    _files: FrozenSet[str] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.targets = tuple(Path(target) for target in self.targets)
+        self._files = frozenset(os.path.normcase(os.path.abspath(target)) for target in self.targets)
+        self.label = self.label or self.name
+
+    def conflicts_with(self, other: "Task") -> bool:
+        """Whether the two may not run at the same time (a shared file that either one changes)"""
+        return (self.mutating or other.mutating) and not self._files.isdisjoint(other._files)
+
+
+@dataclass(eq=False)
+class _Entry:
+    task: Task
+    future: Future
+    progress: TaskProgress
+
+
+class OperationExecutor:
+    """Queue of tasks run on a thread pool, serialized only where their files conflict"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        # At least two workers so a long write never holds up an unrelated read
+        workers = max_workers or max(2, get_config().performance.workers)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="operation")
+        self._lock = threading.Lock()
+        self._pending: Deque[_Entry] = deque()
+        self._running: List[_Entry] = []
+        self._shutdown = False
+
+    def submit(self, task: Task, progress: Optional[TaskProgress] = None) -> Future:
+        """Queue ``task``; it starts as soon as nothing it conflicts with is ahead of it"""
+        entry = _Entry(task, Future(), progress or _no_progress)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Executor has been shut down")
+            self._pending.append(entry)
+            self._dispatch()
+        return entry.future
+
+    def blockers(self, task: Task) -> List[Task]:
+        """Running or queued tasks that ``task`` would have to wait for"""
+        with self._lock:
+            return [entry.task for entry in (*self._running, *self._pending) if task.conflicts_with(entry.task)]
+
+    @property
+    def running(self) -> List[Task]:
+        with self._lock:
+            return [entry.task for entry in self._running]
+
+    @property
+    def pending(self) -> List[Task]:
+        with self._lock:
+            return [entry.task for entry in self._pending if not entry.future.cancelled()]
+
+    @property
+    def idle(self) -> bool:
+        """Whether no task is running or queued"""
+        with self._lock:
+            return not self._running and not self._pending
+
+    def _dispatch(self) -> None:
+        """Start every queued task that conflicts with nothing running or queued before it (lock held)"""
+        waiting: Deque[_Entry] = deque()
+        for entry in self._pending:
+            if entry.future.cancelled():
+                continue
+            if any(entry.task.conflicts_with(other.task) for other in (*self._running, *waiting)):
+                waiting.append(entry)
+                continue
+            if not entry.future.set_running_or_notify_cancel():
+                continue
+            self._running.append(entry)
+            self._pool.submit(self._run, entry)
+        self._pending = waiting
+
+    def _run(self, entry: _Entry) -> None:
+        try:
+            result = entry.task.run(entry.progress)
+        except BaseException as e:
+            self._release(entry)
+            entry.future.set_exception(e)
+        else:
+            # Released before the result is published, so done-callbacks see the executor without it
+            self._release(entry)
+            entry.future.set_result(result)
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            self._running.remove(entry)
+            if not self._shutdown:
+                self._dispatch()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancel queued tasks and stop accepting new ones; running tasks finish"""
+        with self._lock:
+            self._shutdown = True
+            for entry in self._pending:
+                entry.future.cancel()
+            self._pending.clear()
+        self._pool.shutdown(wait=wait)
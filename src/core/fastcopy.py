@@ -0,0 +1,176 @@
+"""
+Fast Copy - Copy engine used for every backup
+
+Strategies are tried in order until one works for the pair of files:
+
+- ``reflink``: FICLONE ioctl; on btrfs, XFS and other copy-on-write
+  filesystems the copy shares extents with the source and is near-instant.
+- ``copy_file_range``: in-kernel copy (the kernel may still reflink or do a
+  server-side copy on NFS/SMB).
+- ``sendfile``: in-kernel copy for kernels without copy_file_range.
+- ``buffered``: large-buffer read/write loop, available everywhere.
+
+Copies above ``CACHE_DROP_THRESHOLD`` are flushed and dropped from the page
+cache afterwards (Linux), so backing up a large database does not push other
+hot data out of memory.
+"""
+
+import os
+import shutil
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+from . import metrics
+
+STRATEGIES = ("reflink", "copy_file_range", "sendfile", "buffered")
+
+BUFFER_SIZE = 8 * 1024 * 1024
+# Kernel copies are done in chunks so a huge file cannot hold one syscall for long
+KERNEL_CHUNK_SIZE = 64 * 1024 * 1024
+CACHE_DROP_THRESHOLD = 64 * 1024 * 1024
+
+# _IOW(0x94, 9, int) from linux/fs.h
+FICLONE = 0x40049409
+
+
+@dataclass
+class CopyStats:
+    """Outcome of copy_file"""
+    success: bool
+    strategy: Optional[str] = None
+    bytes: int = 0
+    error: Optional[str] = None
+
+
+def _reflink(source_fd: int, destination_fd: int, size: int) -> int:
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink is only attempted on Linux")
+    import fcntl  # POSIX only
+
+    fcntl.ioctl(destination_fd, FICLONE, source_fd)
+    return size
+
+
+def _copy_file_range(source_fd: int, destination_fd: int, size: int) -> int:
+    if not hasattr(os, "copy_file_range"):
+        raise OSError("os.copy_file_range is not available")
+    copied = 0
+    while copied < size:
+        count = os.copy_file_range(source_fd, destination_fd, min(KERNEL_CHUNK_SIZE, size - copied))
+        if count == 0:
+            break
+        copied += count
+    return copied
+
+
+def _sendfile(source_fd: int, destination_fd: int, size: int) -> int:
+    # Copying between regular files with sendfile is Linux-specific
+    if not sys.platform.startswith("linux"):
+        raise OSError("sendfile to a regular file is only supported on Linux")
+    copied = 0
+    while copied < size:
+        count = os.sendfile(destination_fd, source_fd, copied, min(KERNEL_CHUNK_SIZE, size - copied))
+        if count == 0:
+            break
+        copied += count
+    return copied
+
+
+def _buffered(source_fd: int, destination_fd: int, size: int) -> int:
+    buffer = bytearray(min(BUFFER_SIZE, max(size, 1)))
+    view = memoryview(buffer)
+    copied = 0
+    with open(source_fd, "rb", buffering=0, closefd=False) as source, \
+            open(destination_fd, "wb", buffering=0, closefd=False) as destination:
+        while True:
+            count = source.readinto(buffer)
+            if not count:
+                break
+            destination.write(view[:count])
+            copied += count
+    return copied
+
+
+_COPIERS = {
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+    "sendfile": _sendfile,
+    "buffered": _buffered,
+}
+
+
+def _advise(fd: int, advice_name: str) -> None:
+    """posix_fadvise over the whole file, where the platform has it"""
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except OSError:
+        pass
+
+
+def _rewind(source_fd: int, destination_fd: int) -> None:
+    """Undo a failed attempt so the next strategy starts from scratch"""
+    os.ftruncate(destination_fd, 0)
+    os.lseek(source_fd, 0, os.SEEK_SET)
+    os.lseek(destination_fd, 0, os.SEEK_SET)
+
+
+def copy_file(source: Path, destination: Path, preserve_metadata: bool = True,
+              strategies: Sequence[str] = STRATEGIES) -> CopyStats:
+    """Copy ``source`` to ``destination`` with the fastest strategy that works
+
+    Like ``shutil.copy2``, permission bits and timestamps are copied unless
+    ``preserve_metadata`` is False. When a strategy fails the destination is
+    truncated and the next one is tried, so a partial attempt never leaks into
+    the result; if all fail the destination is removed.
+    """
+    stats = CopyStats(success=False)
+    with metrics.span("file.copy") as span:
+        try:
+            source_fd = os.open(str(source), os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                size = os.fstat(source_fd).st_size
+                destination_fd = os.open(
+                    str(destination),
+                    os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+                    0o666
+                )
+                try:
+                    _advise(source_fd, "POSIX_FADV_SEQUENTIAL")
+                    for strategy in strategies:
+                        try:
+                            copied = _COPIERS[strategy](source_fd, destination_fd, size)
+                            if copied != size:
+                                raise OSError(f"copied {copied} of {size} bytes")
+                        except OSError as e:
+                            stats.error = f"{strategy}: {e}"
+                            _rewind(source_fd, destination_fd)
+                            continue
+                        stats.success, stats.strategy, stats.bytes, stats.error = True, strategy, copied, None
+                        break
+
+                    if stats.success and size >= CACHE_DROP_THRESHOLD and stats.strategy != "reflink":
+                        # The backup is cold data; dirty pages cannot be dropped, so write them out first.
+                        # The source is left alone: VS Code may still be reading it.
+                        getattr(os, "fdatasync", os.fsync)(destination_fd)
+                        _advise(destination_fd, "POSIX_FADV_DONTNEED")
+                finally:
+                    os.close(destination_fd)
+            finally:
+                os.close(source_fd)
+
+            if not stats.success:
+                os.unlink(destination)
+            elif preserve_metadata:
+                shutil.copystat(source, destination)
+        except OSError as e:
+            stats.success = False
+            stats.error = str(e)
+
+        span.set("strategy", stats.strategy)
+        span.add("bytes_written", stats.bytes)
+    return stats
@@ -0,0 +1,271 @@
+"""
+Metrics - Lightweight span and counter instrumentation
+
+Instrumentation is disabled by default. It is enabled with the
+``AUGMENT_VIP_METRICS=1`` environment variable, ``enabled = true`` in the
+``[metrics]`` section of config/app.conf, or ``metrics.enable()``.
+
+When disabled, ``span()`` returns a shared no-op object, so instrumented code
+pays one attribute lookup and a context manager call per phase.
+
+Usage::
+
+    with metrics.span("database.delete") as span:
+        cursor.execute(...)
+        span.add("rows_deleted", cursor.rowcount)
+
+    with metrics.collect() as spans:
+        result = model.remove_augment_entries()
+    result.metrics = spans
+
+Collectors belong to the thread that opened them; work handed to a thread
+pool reports to them when it is wrapped with ``metrics.bind(function)``.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+ENV_ENABLED = "AUGMENT_VIP_METRICS"
+ENV_JSONL_PATH = "AUGMENT_VIP_METRICS_FILE"
+
+SpanCallback = Callable[[Dict[str, Any]], None]
+
+
+class Span:
+    """A timed phase with optional counters (bytes, rows, ...) and attributes"""
+
+    __slots__ = ("name", "attributes", "counters", "start", "duration", "_recorder", "_t0")
+
+    def __init__(self, recorder: "MetricsRecorder", name: str, attributes: Dict[str, Any]):
+        self._recorder = recorder
+        self.name = name
+        self.attributes = attributes
+        self.counters: Dict[str, int] = {}
+        self.start = 0.0
+        self.duration = 0.0
+        self._t0 = 0.0
+
+    def add(self, counter: str, amount: int = 1) -> None:
+        """Increment a counter such as ``bytes_read`` or ``rows_scanned``"""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def set(self, key: str, value: Any) -> None:
+        """Attach an attribute (e.g. the strategy used) to the span"""
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "name": self.name,
+            "duration_ms": round(self.duration * 1000, 3),
+            "timestamp": self.start,
+        }
+        data.update(self.counters)
+        if self.attributes:
+            data["attributes"] = self.attributes
+        return data
+
+    def __enter__(self) -> "Span":
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.perf_counter() - self._t0
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self._recorder._finish(self)
+        return False
+
+
+class _NullSpan:
+    """No-op span returned while instrumentation is disabled"""
+
+    __slots__ = ()
+
+    def add(self, counter: str, amount: int = 1) -> None:
+        pass
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class JsonLinesSink:
+    """Append finished spans to a file as JSON lines"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class MetricsRecorder:
+    """Records spans for the current thread's collectors and global sinks"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._sinks: List[SpanCallback] = []
+        self._local = threading.local()
+
+    def span(self, name: str, **attributes: Any):
+        """Start a span; a shared no-op object when disabled"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attributes)
+
+    @contextmanager
+    def collect(self, on_span: Optional[SpanCallback] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Collect spans finished on this thread while the block runs"""
+        spans: List[Dict[str, Any]] = []
+        if not self.enabled:
+            yield spans
+            return
+
+        collectors = self._collectors()
+        entry = (spans, on_span)
+        collectors.append(entry)
+        try:
+            yield spans
+        finally:
+            # Remove by identity; nested collectors may hold equal lists
+            collectors[:] = [item for item in collectors if item is not entry]
+
+    def bind(self, function: Callable[..., Any]) -> Callable[..., Any]:
+        """``function`` reporting its spans to this thread's collectors, whichever thread calls it"""
+        if not self.enabled:
+            return function
+        entries = list(self._collectors())
+
+        @functools.wraps(function)
+        def bound(*args: Any, **kwargs: Any) -> Any:
+            collectors = self._collectors()
+            collectors.extend(entries)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                collectors[:] = [item for item in collectors if not any(item is entry for entry in entries)]
+
+        return bound
+
+    def add_sink(self, sink: SpanCallback) -> None:
+        """Register a callback receiving every finished span (any thread)"""
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink: SpanCallback) -> None:
+        if sink in self._sinks:
+            self._sinks.remove(sink)
+
+    def _collectors(self) -> list:
+        collectors = getattr(self._local, "collectors", None)
+        if collectors is None:
+            collectors = self._local.collectors = []
+        return collectors
+
+    def _finish(self, span: Span) -> None:
+        data = span.to_dict()
+        for spans, on_span in self._collectors():
+            spans.append(data)
+            if on_span:
+                on_span(data)
+        for sink in list(self._sinks):
+            try:
+                sink(data)
+            except Exception:
+                pass
+
+
+def format_span(span: Dict[str, Any]) -> str:
+    """One-line human-readable rendering of a span dict"""
+    counters = [
+        f"{key}={value}" for key, value in span.items()
+        if key not in ("name", "duration_ms", "timestamp", "attributes")
+    ]
+    text = f"{span['name']}: {span['duration_ms']:.1f} ms"
+    if counters:
+        text += " (" + ", ".join(counters) + ")"
+    return text
+
+
+def dump_jsonl(spans: List[Dict[str, Any]], path: Path) -> None:
+    """Write a list of span dicts to ``path`` as JSON lines"""
+    sink = JsonLinesSink(path)
+    for span in spans:
+        sink(span)
+
+
+def _enabled_from_environment() -> bool:
+    value = os.environ.get(ENV_ENABLED)
+    if value is not None:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    from .config import ConfigError, get_config
+    try:
+        return get_config().metrics.enabled
+    except ConfigError:
+        return False
+
+
+def _jsonl_path_from_environment() -> Optional[str]:
+    path = os.environ.get(ENV_JSONL_PATH)
+    if path is None:
+        from .config import get_config
+        path = get_config().metrics.jsonl_path
+    return path or None
+
+
+recorder = MetricsRecorder()
+
+
+def enable(jsonl_path: Optional[Path] = None) -> None:
+    """Turn instrumentation on, optionally streaming spans to a JSONL file"""
+    recorder.enabled = True
+    if jsonl_path:
+        recorder.add_sink(JsonLinesSink(jsonl_path))
+
+
+def disable() -> None:
+    recorder.enabled = False
+
+
+def is_enabled() -> bool:
+    return recorder.enabled
+
+
+def span(name: str, **attributes: Any):
+    """Start a span on the shared recorder"""
+    if not recorder.enabled:
+        return NULL_SPAN
+    return Span(recorder, name, attributes)
+
+
+def collect(on_span: Optional[SpanCallback] = None):
+    """Collect spans finished on this thread (see MetricsRecorder.collect)"""
+    return recorder.collect(on_span)
+
+
+def bind(function: Callable[..., Any]) -> Callable[..., Any]:
+    """Let ``function`` report to this thread's collectors from another thread (see MetricsRecorder.bind)"""
+    return recorder.bind(function)
+
+
+if _enabled_from_environment():
+    enable(_jsonl_path_from_environment())
@@ -0,0 +1,426 @@
+"""
+Control Server - Local JSON-RPC access to a long-running VSCodeService
+
+``augment-vip serve`` keeps one process warm so that repeated requests skip
+interpreter start-up. The protocol is JSON-RPC 2.0 with one JSON object per
+line. The server listens either on a Unix socket, which only its owner can
+open (mode 0600), or on 127.0.0.1. On TCP the first request of every
+connection must be ``authenticate`` with the token the server generated.
+The endpoint (socket or port, token, pid) is written to ``server.json`` in
+the cache directory, readable by the owner only.
+
+Methods: ``status``, ``diagnose`` (use_cache, db), ``clean`` (target: one of
+``CLEAN_TARGETS``), ``backups`` and ``restore`` (backup, to). Missing,
+mistyped or unknown params are INVALID_PARAMS errors; anything that fails
+inside an operation is a SERVER_ERROR. While a call
+runs the server sends ``progress`` notifications for it, in order, before
+the response::
+
+    {"jsonrpc": "2.0", "method": "progress", "params": {"id": 1, "event": "span", ...}}
+
+Requests on one connection are answered one at a time; open several
+connections to run requests side by side (changes to one installation are
+still applied one at a time, see AsyncVSCodeService).
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import signal
+import socket
+import stat
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from . import metrics
+from .config import get_config
+from .serialization import to_jsonable
+from ..services.async_service import AsyncVSCodeService
+
+JSONRPC_VERSION = "2.0"
+ENDPOINT_FILE = "server.json"
+LOCALHOST = "127.0.0.1"
+# Longest request line accepted
+MAX_LINE = 1024 * 1024
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+UNAUTHORIZED = -32001
+TIMED_OUT = -32002
+
+CLEAN_TARGETS = ("database", "telemetry", "workspaces", "extensions", "all")
+
+# emit(event, **fields) - sends a progress notification for the current request
+Emit = Callable[..., None]
+
+_REQUIRED = object()
+
+
+class ControlError(Exception):
+    """A JSON-RPC error response"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _message(payload: Dict[str, Any]) -> bytes:
+    payload = {"jsonrpc": JSONRPC_VERSION, **payload}
+    return (json.dumps(to_jsonable(payload), ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def _param(params: Dict[str, Any], name: str, kind: type, default: Any = _REQUIRED) -> Any:
+    """``params[name]``, checked to be a ``kind``; INVALID_PARAMS when it is missing (and required) or is not"""
+    value = params.get(name)
+    if value is None:
+        if default is _REQUIRED:
+            raise ControlError(INVALID_PARAMS, f"Invalid params: {name} is required")
+        return default
+    if not isinstance(value, kind) or (kind is str and not value):
+        expected = "non-empty string" if kind is str else kind.__name__
+        raise ControlError(INVALID_PARAMS, f"Invalid params: {name} must be a {expected}")
+    return value
+
+
+def _accept(params: Dict[str, Any], *names: str) -> None:
+    """Reject parameters a method does not take"""
+    unknown = sorted(set(params) - set(names))
+    if unknown:
+        raise ControlError(INVALID_PARAMS, f"Invalid params: unexpected {', '.join(unknown)}")
+
+
+def _is_socket(path: Path) -> bool:
+    try:
+        return stat.S_ISSOCK(os.lstat(str(path)).st_mode)
+    except OSError:
+        return False
+
+
+def _remove_stale_socket(path: Path) -> None:
+    """Remove a socket left behind by a server that is gone; refuse anything else"""
+    if not os.path.lexists(str(path)):
+        return
+    if not _is_socket(path):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        os.unlink(str(path))  # nobody is listening
+    else:
+        raise OSError(f"Another server is listening on {path}")
+    finally:
+        probe.close()
+
+
+def _write_endpoint(path: Path, endpoint: Dict[str, Any]) -> None:
+    """Write the endpoint file readable by the owner only (it holds the token)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(endpoint, f, indent=2)
+
+
+class ControlServer:
+    """Serves one installation's operations to local JSON-RPC clients"""
+
+    def __init__(self, service: AsyncVSCodeService, socket_path: Optional[Path] = None,
+                 port: Optional[int] = None, endpoint_file: Optional[Path] = None):
+        config = get_config()
+        self.service = service
+        if socket_path is None and port is None:
+            socket_path = config.server.socket_path
+        self.socket_path = Path(socket_path).expanduser() if socket_path else None
+        self.port = config.server.port if port is None else port
+        self.endpoint_file = Path(endpoint_file) if endpoint_file else config.cache.path / ENDPOINT_FILE
+        self.request_timeout = config.server.request_timeout_seconds or None
+        # Only TCP needs a token; the socket file's permissions guard a Unix socket
+        self.token = None if self.socket_path else secrets.token_urlsafe(32)
+        self.endpoint: Dict[str, Any] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._methods: Dict[str, Callable[[Dict[str, Any], Emit], Awaitable[Any]]] = {
+            "status": self._status,
+            "diagnose": self._diagnose,
+            "clean": self._clean,
+            "backups": self._backups,
+            "restore": self._restore,
+        }
+
+    async def start(self) -> Dict[str, Any]:
+        """Start listening and publish the endpoint file; the endpoint"""
+        if self.socket_path:
+            _remove_stale_socket(self.socket_path)
+            # Bound with mode 0600 from the start: no window in which other users can connect
+            umask = os.umask(0o177)
+            try:
+                self._server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path), limit=MAX_LINE)
+            finally:
+                os.umask(umask)
+            self.endpoint = {"socket": str(self.socket_path)}
+        else:
+            self._server = await asyncio.start_server(self._handle, LOCALHOST, self.port, limit=MAX_LINE)
+            port = self._server.sockets[0].getsockname()[1]
+            self.endpoint = {"host": LOCALHOST, "port": port, "token": self.token}
+        self.endpoint["pid"] = os.getpid()
+        _write_endpoint(self.endpoint_file, self.endpoint)
+        return self.endpoint
+
+    async def serve_forever(self) -> None:
+        """Serve until cancelled, then close"""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Stop listening and remove the endpoint file (and socket)"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if not self.endpoint:
+            return  # never started: the files are not ours
+        for path in (self.endpoint_file, self.socket_path):
+            if path is not None and (path != self.socket_path or _is_socket(path)):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        self.endpoint = {}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """One connection: requests in, progress notifications and responses out"""
+        authenticated = self.token is None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    error = {"code": INVALID_REQUEST, "message": "Request too large"}
+                    writer.write(_message({"id": None, "error": error}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                request_id = None
+                try:
+                    request = self._parse(line)
+                    request_id = request.get("id")
+                    if request["method"] == "authenticate":
+                        authenticated = self._authenticate(request["params"])
+                        result: Any = {"authenticated": True}
+                    elif not authenticated:
+                        raise ControlError(UNAUTHORIZED, "Authenticate first")
+                    else:
+                        result = await self._call(request, writer)
+                    response = {"id": request_id, "result": result}
+                except ControlError as e:
+                    response = {"id": request_id, "error": {"code": e.code, "message": e.message}}
+                if request_id is not None or "error" in response:
+                    writer.write(_message(response))
+                    await writer.drain()
+                if "error" in response and response["error"]["code"] == UNAUTHORIZED:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _parse(line: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            raise ControlError(PARSE_ERROR, "Invalid JSON") from None
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            raise ControlError(INVALID_REQUEST, "Expected a JSON-RPC request object")
+        params = request.setdefault("params", {})
+        if not isinstance(params, dict):
+            raise ControlError(INVALID_PARAMS, "params must be an object")
+        return request
+
+    def _authenticate(self, params: Dict[str, Any]) -> bool:
+        token = params.get("token")
+        if self.token is not None and not (isinstance(token, str) and hmac.compare_digest(token, self.token)):
+            raise ControlError(UNAUTHORIZED, "Invalid token")
+        return True
+
+    async def _call(self, request: Dict[str, Any], writer: asyncio.StreamWriter) -> Any:
+        method = self._methods.get(request["method"])
+        if method is None:
+            raise ControlError(METHOD_NOT_FOUND, f"Unknown method: {request['method']}")
+
+        loop = asyncio.get_running_loop()
+        request_id = request.get("id")
+
+        def write(message: bytes) -> None:
+            # A timed-out call keeps running and may report after its client has gone
+            if not writer.is_closing():
+                writer.write(message)
+
+        def emit(event: str, **fields: Any) -> None:
+            # Called from executor threads; writes are ordered on the event loop before the response
+            message = _message({"method": "progress", "params": {"id": request_id, "event": event, **fields}})
+            try:
+                loop.call_soon_threadsafe(write, message)
+            except RuntimeError:
+                pass  # the server has shut down; never fail the operation over a progress event
+
+        emit("started", method=request["method"])
+        try:
+            return await method(request["params"], emit)
+        except ControlError:
+            raise
+        except asyncio.TimeoutError:
+            raise ControlError(TIMED_OUT, f"Timed out after {self.request_timeout} s") from None
+        except Exception as e:
+            # Params are validated by each method, so anything else is the server's failure
+            raise ControlError(SERVER_ERROR, f"{type(e).__name__}: {e}") from None
+
+    @staticmethod
+    def _span_events(emit: Emit) -> metrics.SpanCallback:
+        return lambda span: emit("span", span=span, text=metrics.format_span(span))
+
+    # Methods
+
+    async def _status(self, params: Dict[str, Any], emit: Emit) -> Any:
+        _accept(params)
+        return await self.service.status(timeout=self.request_timeout)
+
+    async def _diagnose(self, params: Dict[str, Any], emit: Emit) -> Any:
+        def partial(report) -> None:
+            if not report.complete and report.rows_scanned:
+                emit("scan", rows_scanned=report.rows_scanned,
+                     largest=[usage.prefix for usage in report.prefixes[:3]])
+
+        _accept(params, "db", "use_cache")
+        db_path = _param(params, "db", str, None)
+        report = await self.service.diagnose_database(
+            Path(db_path).expanduser() if db_path else None,
+            use_cache=_param(params, "use_cache", bool, True),
+            on_progress=partial,
+            timeout=self.request_timeout,
+            on_span=self._span_events(emit)
+        )
+        return {"success": report.complete, **report.to_dict()}
+
+    async def _clean(self, params: Dict[str, Any], emit: Emit) -> Any:
+        _accept(params, "target")
+        target = _param(params, "target", str, "database")
+        if target not in CLEAN_TARGETS:
+            raise ControlError(INVALID_PARAMS, f"Invalid params: target must be one of {', '.join(CLEAN_TARGETS)}")
+        options = {"timeout": self.request_timeout, "on_span": self._span_events(emit)}
+        if target == "database":
+            return await self.service.clean_database(**options)
+        if target == "telemetry":
+            return await self.service.modify_telemetry_ids(**options)
+        if target == "workspaces":
+            return await self.service.clean_workspaces(**options)
+        if target == "extensions":
+            return await self.service.clean_extension_storage(**options)
+        return await self.service.run_all_operations(**options)
+
+    async def _backups(self, params: Dict[str, Any], emit: Emit) -> Any:
+        _accept(params)
+        backups = await self.service.get_backup_files(timeout=self.request_timeout)
+        return sorted(backups, key=lambda info: info["modified"], reverse=True)
+
+    async def _restore(self, params: Dict[str, Any], emit: Emit) -> Any:
+        _accept(params, "backup", "to")
+        backup = _param(params, "backup", str)
+        target = _param(params, "to", str, None)
+        return await self.service.restore_backup(
+            Path(backup).expanduser(),
+            Path(target).expanduser() if target else None,
+            timeout=self.request_timeout,
+            on_span=self._span_events(emit)
+        )
+
+
+def serve(service: AsyncVSCodeService, socket_path: Optional[Path] = None, port: Optional[int] = None,
+          on_ready: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+    """Run a control server until interrupted"""
+    async def run() -> None:
+        # SIGTERM (and SIGINT where it is not ignored) stop the server cleanly
+        loop, task = asyncio.get_running_loop(), asyncio.current_task()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, task.cancel)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+        server = ControlServer(service, socket_path=socket_path, port=port)
+        endpoint = await server.start()
+        if on_ready:
+            on_ready(endpoint)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+class ControlClient:
+    """Blocking client for a ControlServer (scripts and tests)"""
+
+    def __init__(self, endpoint: Dict[str, Any], timeout: Optional[float] = None):
+        if "socket" in endpoint:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(endpoint["socket"])
+        else:
+            self._socket = socket.create_connection((endpoint["host"], endpoint["port"]), timeout=timeout)
+        self._file = self._socket.makefile("rwb")
+        self._next_id = 0
+        if endpoint.get("token"):
+            self.call("authenticate", token=endpoint["token"])
+
+    @classmethod
+    def from_endpoint_file(cls, path: Optional[Path] = None, timeout: Optional[float] = None) -> "ControlClient":
+        """Connect to the server described by ``server.json`` (in the cache directory by default)"""
+        path = Path(path) if path else get_config().cache.path / ENDPOINT_FILE
+        return cls(json.loads(path.read_text(encoding="utf-8")), timeout=timeout)
+
+    def call(self, method: str, on_event: Optional[Callable[[Dict[str, Any]], None]] = None, **params: Any) -> Any:
+        """Send one request and wait for its result; progress events go to ``on_event``"""
+        self._next_id += 1
+        request_id = self._next_id
+        self._file.write(_message({"id": request_id, "method": method, "params": params}))
+        self._file.flush()
+        while True:
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError("Server closed the connection")
+            message = json.loads(line)
+            if message.get("method") == "progress":
+                if on_event and message["params"].get("id") == request_id:
+                    on_event(message["params"])
+                continue
+            if message.get("id") != request_id:
+                continue
+            if "error" in message:
+                raise ControlError(message["error"]["code"], message["error"]["message"])
+            return message["result"]
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> "ControlClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
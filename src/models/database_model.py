@@ -2,12 +2,116 @@
 Database Model - Handles database operations and state
 """
 
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Any
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional, Any, Pattern, Tuple
 from pathlib import Path
-import sqlite3
-import tempfile
-import shutil
+import json
+import re
+
+from ..core import metrics
+from ..core.backups import backup_path_for
+from ..core.config import get_config
+from ..core.fastcopy import copy_file
+
+if TYPE_CHECKING:
+    import sqlite3
+
+@lru_cache(maxsize=32)
+def compile_like(pattern: str) -> Pattern:
+    """Regex equivalent of a SQLite LIKE pattern (case-insensitive, % and _ wildcards)"""
+    parts = []
+    for char in pattern:
+        if char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+
+# Fields that name the thing an object in a JSON list stands for
+IDENTITY_FIELDS = ("id", "identifier", "extensionId", "name")
+
+
+@lru_cache(maxsize=32)
+def compile_identity(pattern: str) -> Pattern:
+    """Regex for extension and view ids that belong to the clean rule's literal
+
+    For ``%augment%``: ``augment.*`` (``Augment.vscode-augment``) and
+    ``*.augment``, ``*.augment.*`` and ``*.augment-*``
+    (``workbench.view.extension.augment-panel``): the literal must be a whole
+    segment, so look-alikes (``publisher.augmented-foo``) are kept. Ids have
+    no whitespace, slashes or colons, so paths and URIs that merely contain
+    the word (``/home/u/augment-demo``) never match.
+    """
+    literal = re.escape(max(re.split(r"[%_]", pattern), key=len))
+    if not literal:
+        return re.compile(r"(?!)")
+    return re.compile(rf"(?:{literal}\.|[^\s/\\:]*\.{literal}(?:[.\-]|$))[^\s/\\:]*", re.IGNORECASE)
+
+
+def value_prefilter(pattern: str) -> Tuple[str, List[str]]:
+    """SQL condition (and parameters) selecting values that may contain a match for ``pattern``
+
+    LIKE with a leading % costs several times a plain read of the rows, so the
+    longest literal run of the pattern is searched with case-sensitive GLOBs
+    instead, in lower and upper case. GLOB skips ahead to the first character
+    of the literal and only then compares, so that character is dropped
+    ("ugment" also finds "Augment", and 'a' is common). Only other mixed-case
+    spellings are missed. Values are cast to TEXT: GLOB never matches a BLOB.
+    """
+    literal = max(re.split(r"[%_]", pattern), key=len)
+    if len(literal) > 3:
+        literal = literal[1:]
+    if not literal or any(char in literal for char in "*?[]"):
+        return "CAST(value AS TEXT) LIKE ?", [pattern]
+    spellings = list(dict.fromkeys((literal.lower(), literal.upper())))
+    return "(" + " OR ".join("CAST(value AS TEXT) GLOB ?" for _ in spellings) + ")", [f"*{text}*" for text in spellings]
+
+
+def _references(item: Any, matches: Callable[[str], bool]) -> bool:
+    """Whether a JSON list item is, or identifies itself (through IDENTITY_FIELDS) as, a matching id"""
+    if isinstance(item, str):
+        return matches(item)
+    if isinstance(item, dict):
+        return any(name in item and _references(item[name], matches) for name in IDENTITY_FIELDS)
+    return False
+
+
+def strip_matching(value: Any, matches: Callable[[str], bool]) -> Tuple[Any, int]:
+    """Parsed JSON ``value`` without the sub-entries that reference a match, and how many were removed
+
+    ``matches`` tests ids (see ``compile_identity``). A map entry goes when
+    its key is a matching id; a list item goes as a whole when it is one, or
+    is an object whose identity fields name one. Other strings are left alone
+    wherever they are. Untouched containers are returned as they are, not
+    copied.
+    """
+    removed = 0
+    if isinstance(value, dict):
+        kept = {}
+        for key, item in value.items():
+            if matches(key):
+                removed += 1
+                continue
+            item, count = strip_matching(item, matches)
+            removed += count
+            kept[key] = item
+    elif isinstance(value, list):
+        kept = []
+        for item in value:
+            if _references(item, matches):
+                removed += 1
+                continue
+            item, count = strip_matching(item, matches)
+            removed += count
+            kept.append(item)
+    else:
+        return value, 0
+    return (kept, removed) if removed else (value, 0)
+
 
 @dataclass
 class DatabaseEntry:
@@ -15,6 +119,33 @@ class DatabaseEntry:
     key: str
     value: str
     
+@dataclass
+class WalState:
+    """Journal mode and write-ahead log state when a backup snapshot was taken"""
+    journal_mode: str = "unknown"
+    wal_bytes: int = 0
+    checkpoint: Optional[str] = None
+    busy: bool = False
+    wal_frames: int = 0
+    checkpointed_frames: int = 0
+    wal_bytes_after: int = 0
+    snapshot: str = "copy"
+
+    @property
+    def fully_checkpointed(self) -> bool:
+        """Every committed transaction is in the main file, so a file copy is complete"""
+        if self.journal_mode != "wal" or self.wal_bytes_after == 0:
+            return True
+        return self.checkpoint is not None and not self.busy and self.wal_frames == self.checkpointed_frames
+
+@dataclass
+class ValueRewrite:
+    """A kept row whose JSON value had matching sub-entries stripped"""
+    key: str
+    entries_removed: int
+    bytes_before: int
+    bytes_after: int
+
 @dataclass 
 class DatabaseOperationResult:
     """Result of a database operation"""
@@ -23,86 +154,174 @@ class DatabaseOperationResult:
     entries_affected: int = 0
     backup_path: Optional[Path] = None
     error: Optional[str] = None
+    wal: Optional[WalState] = None
+    rewrites: List[ValueRewrite] = field(default_factory=list)
+    metrics: List[Dict[str, Any]] = field(default_factory=list)
 
 
 class DatabaseModel:
     """Model for managing VS Code database operations"""
     
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, table: Optional[str] = None, search_pattern: Optional[str] = None):
+        operations = get_config().operations
         self.db_path = db_path
-        self._connection: Optional[sqlite3.Connection] = None
+        self.table = table or operations.database_table
+        self.search_pattern = search_pattern or operations.search_pattern
+        self.backup_suffix = operations.backup_suffix
         self._backup_path: Optional[Path] = None
+        self.last_wal_state: Optional[WalState] = None
+    
+    def matches(self, name: str) -> bool:
+        """Whether ``name`` matches the clean rule (same semantics as the SQL LIKE)"""
+        return compile_like(self.search_pattern).fullmatch(name) is not None
+    
+    def matches_identity(self, name: str) -> bool:
+        """Whether ``name`` is an extension or view id of the clean rule (used inside values)"""
+        return compile_identity(self.search_pattern).fullmatch(name) is not None
     
     @property
     def exists(self) -> bool:
         """Check if database file exists"""
         return self.db_path.exists()
     
-    @property
-    def is_connected(self) -> bool:
-        """Check if database connection is active"""
-        return self._connection is not None
-    
-    def connect(self) -> bool:
-        """Establish database connection"""
+    def connect(self) -> Optional["sqlite3.Connection"]:
+        """Open a connection to the database, owned (and closed) by the caller
+        
+        Each operation uses its own connection, so the model can be shared by
+        threads: a status read never touches a connection a clean is using.
+        """
         try:
             if not self.exists:
-                return False
+                return None
             
-            self._connection = sqlite3.connect(str(self.db_path))
-            return True
+            import sqlite3  # deferred until the database is first used
+            return sqlite3.connect(str(self.db_path))
         except Exception:
-            self._connection = None
-            return False
+            return None
+    
+    @property
+    def wal_path(self) -> Path:
+        return self.db_path.with_name(self.db_path.name + "-wal")
     
-    def disconnect(self) -> None:
-        """Close database connection"""
-        if self._connection:
-            self._connection.close()
-            self._connection = None
+    def _wal_size(self) -> int:
+        try:
+            return self.wal_path.stat().st_size
+        except OSError:
+            return 0
     
-    def create_backup(self) -> Optional[Path]:
-        """Create a backup of the database"""
+    def wal_state(self, checkpoint: Optional[str] = None) -> WalState:
+        """Journal mode and WAL size, optionally checkpointing first ('passive' or 'truncate')"""
+        state = WalState(wal_bytes=self._wal_size())
+        connection = self.connect()
+        if connection is None:
+            return state
+        
+        try:
+            with metrics.span("database.wal_state") as span:
+                state.journal_mode = str(connection.execute("PRAGMA journal_mode").fetchone()[0]).lower()
+                span.set("journal_mode", state.journal_mode)
+                span.add("wal_bytes", state.wal_bytes)
+            
+            if state.journal_mode == "wal" and checkpoint and checkpoint != "none":
+                # PASSIVE never waits for VS Code; TRUNCATE waits (up to the busy timeout) and empties the WAL
+                with metrics.span("database.checkpoint", mode=checkpoint) as span:
+                    busy, frames, done = connection.execute(
+                        f"PRAGMA wal_checkpoint({checkpoint.upper()})"
+                    ).fetchone()
+                    state.checkpoint = checkpoint
+                    state.busy = bool(busy)
+                    state.wal_frames, state.checkpointed_frames = max(frames, 0), max(done, 0)
+                    span.add("frames_checkpointed", state.checkpointed_frames)
+        except Exception:
+            pass
+        finally:
+            connection.close()
+        
+        state.wal_bytes_after = self._wal_size()
+        return state
+    
+    def create_backup(self, checkpoint: Optional[str] = None) -> Optional[Path]:
+        """Create a backup of the database that includes transactions still in its WAL"""
+        if checkpoint is None:
+            checkpoint = get_config().backups.wal_checkpoint
+        backup_path = None
         try:
             if not self.exists:
                 return None
             
-            backup_path = self.db_path.with_suffix(f"{self.db_path.suffix}.backup")
-            shutil.copy2(self.db_path, backup_path)
+            state = self.wal_state(checkpoint)
+            backup_path = backup_path_for(self.db_path, self.backup_suffix)
+            with metrics.span("database.backup") as span:
+                if state.fully_checkpointed:
+                    stats = copy_file(self.db_path, backup_path)
+                    span.set("strategy", stats.strategy)
+                    span.add("bytes_written", stats.bytes)
+                    if not stats.success:
+                        return None
+                else:
+                    # The main file alone would miss committed data; let SQLite assemble a consistent copy
+                    state.snapshot = "online_backup"
+                    span.set("strategy", state.snapshot)
+                    self._online_backup(backup_path)
+                    span.add("bytes_written", backup_path.stat().st_size)
+            self.last_wal_state = state
             self._backup_path = backup_path
             return backup_path
         except Exception:
+            if backup_path is not None:
+                try:
+                    backup_path.unlink()
+                except OSError:
+                    pass
             return None
     
+    def _online_backup(self, backup_path: Path) -> None:
+        """Copy through the SQLite backup API (reads the WAL like any other reader)"""
+        import sqlite3
+        
+        source = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            destination = sqlite3.connect(str(backup_path))
+            try:
+                source.backup(destination)
+                # A self-contained file: no -wal needed next to the backup
+                destination.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                destination.close()
+        finally:
+            source.close()
+    
     def get_augment_entries(self) -> List[DatabaseEntry]:
         """Get all entries containing 'augment'"""
-        if not self.connect():
+        connection = self.connect()
+        if connection is None:
             return []
         
         try:
-            cursor = self._connection.cursor()
-            cursor.execute("SELECT key, value FROM ItemTable WHERE key LIKE '%augment%'")
+            cursor = connection.cursor()
+            cursor.execute(f'SELECT key, value FROM "{self.table}" WHERE key LIKE ?', (self.search_pattern,))
             rows = cursor.fetchall()
             return [DatabaseEntry(key=row[0], value=row[1]) for row in rows]
         except Exception:
             return []
         finally:
-            self.disconnect()
+            connection.close()
     
-    def count_augment_entries(self) -> int:
-        """Count entries containing 'augment'"""
-        if not self.connect():
-            return 0
+    def count_augment_entries(self) -> Optional[int]:
+        """Count entries containing 'augment' (None when the database cannot be read)"""
+        connection = self.connect()
+        if connection is None:
+            return None
         
         try:
-            cursor = self._connection.cursor()
-            cursor.execute("SELECT COUNT(*) FROM ItemTable WHERE key LIKE '%augment%'")
+            cursor = connection.cursor()
+            cursor.execute(f'SELECT COUNT(*) FROM "{self.table}" WHERE key LIKE ?', (self.search_pattern,))
             count = cursor.fetchone()[0]
             return count
         except Exception:
-            return 0
+            return None
         finally:
-            self.disconnect()
+            connection.close()
     
     def remove_augment_entries(self) -> DatabaseOperationResult:
         """Remove all entries containing 'augment'"""
@@ -115,7 +334,8 @@ class DatabaseModel:
                 error="Backup creation failed"
             )
         
-        if not self.connect():
+        connection = self.connect()
+        if connection is None:
             return DatabaseOperationResult(
                 success=False,
                 message="Failed to connect to database",
@@ -123,32 +343,50 @@ class DatabaseModel:
             )
         
         try:
-            cursor = self._connection.cursor()
+            cursor = connection.cursor()
+            
+            # Count entries before deletion (one pass yields both counts)
+            with metrics.span("database.scan") as span:
+                cursor.execute(
+                    f'SELECT COUNT(*), COALESCE(SUM(key LIKE ?), 0) FROM "{self.table}"', (self.search_pattern,)
+                )
+                rows_scanned, count_before = cursor.fetchone()
+                span.add("rows_scanned", rows_scanned)
+                span.add("rows_matched", count_before)
             
-            # Count entries before deletion
-            cursor.execute("SELECT COUNT(*) FROM ItemTable WHERE key LIKE '%augment%'")
-            count_before = cursor.fetchone()[0]
+            entries_affected = 0
+            if count_before:
+                # Delete entries
+                with metrics.span("database.delete") as span:
+                    cursor.execute(f'DELETE FROM "{self.table}" WHERE key LIKE ?', (self.search_pattern,))
+                    entries_affected = cursor.rowcount
+                    span.add("rows_deleted", entries_affected)
+                
+                # Commit changes
+                with metrics.span("database.commit"):
+                    connection.commit()
             
-            if count_before == 0:
+            rewrites = self._rewrite_values(connection) if get_config().operations.rewrite_values else []
+            
+            if not entries_affected and not rewrites:
                 return DatabaseOperationResult(
                     success=True,
                     message="No Augment-related entries found",
                     entries_affected=0,
-                    backup_path=backup_path
+                    backup_path=backup_path,
+                    wal=self.last_wal_state
                 )
             
-            # Delete entries
-            cursor.execute("DELETE FROM ItemTable WHERE key LIKE '%augment%'")
-            entries_affected = cursor.rowcount
-            
-            # Commit changes
-            self._connection.commit()
-            
+            message = f"Successfully removed {entries_affected} Augment-related entries"
+            if rewrites:
+                message += f" and stripped {sum(rewrite.entries_removed for rewrite in rewrites)} nested entries from {len(rewrites)} values"
             return DatabaseOperationResult(
                 success=True,
-                message=f"Successfully removed {entries_affected} Augment-related entries",
+                message=message,
                 entries_affected=entries_affected,
-                backup_path=backup_path
+                backup_path=backup_path,
+                wal=self.last_wal_state,
+                rewrites=rewrites
             )
             
         except Exception as e:
@@ -158,26 +396,109 @@ class DatabaseModel:
                 error=str(e)
             )
         finally:
-            self.disconnect()
+            connection.close()
+    
+    def has_value_references(self) -> Optional[bool]:
+        """Whether any value may hold entries for the clean rule (cheap pre-filter only; None on error)"""
+        connection = self.connect()
+        if connection is None:
+            return None
+        
+        try:
+            condition, params = value_prefilter(self.search_pattern)
+            cursor = connection.execute(
+                f'SELECT 1 FROM "{self.table}" WHERE {condition} LIMIT 1', params
+            )
+            return cursor.fetchone() is not None
+        except Exception:
+            return None
+        finally:
+            connection.close()
+    
+    def _rewrite_values(self, connection: "sqlite3.Connection") -> List[ValueRewrite]:
+        """Strip matching sub-entries from the JSON values of the remaining rows
+        
+        Candidates are paged in rowid order behind the pre-filter, so the scan
+        costs about as much as reading the table once and no cursor is open
+        while a page is written back. Each page is its own transaction.
+        """
+        batch_size = get_config().performance.batch_size
+        condition, params = value_prefilter(self.search_pattern)
+        rewrites: List[ValueRewrite] = []
+        
+        with metrics.span("database.rewrite") as span:
+            last_rowid = -(2 ** 63)
+            while True:
+                rows = connection.execute(
+                    f'SELECT rowid, key, value, length(CAST(value AS BLOB)) FROM "{self.table}" '
+                    f'WHERE rowid > ? AND {condition} ORDER BY rowid LIMIT ?',
+                    [last_rowid, *params, batch_size]
+                ).fetchall()
+                if not rows:
+                    break
+                last_rowid = rows[-1][0]
+                
+                updates = []
+                parsed_rows = 0
+                for rowid, key, value, size in rows:
+                    try:
+                        parsed = json.loads(value)
+                    except (TypeError, ValueError):
+                        continue
+                    parsed_rows += 1
+                    stripped, removed = strip_matching(parsed, self.matches_identity)
+                    if not removed:
+                        continue
+                    text = json.dumps(stripped, ensure_ascii=False, separators=(",", ":"))
+                    encoded = text.encode("utf-8")
+                    # Keep the storage class: VS Code writes TEXT, but some values are BLOBs
+                    updates.append((encoded if isinstance(value, bytes) else text, rowid))
+                    rewrites.append(ValueRewrite(str(key), removed, size, len(encoded)))
+                
+                if updates:
+                    connection.executemany(f'UPDATE "{self.table}" SET value = ? WHERE rowid = ?', updates)
+                    connection.commit()
+                span.add("rows_matched", len(rows))
+                span.add("rows_parsed", parsed_rows)
+                span.add("rows_rewritten", len(updates))
+            span.add("entries_removed", sum(rewrite.entries_removed for rewrite in rewrites))
+        return rewrites
+    
+    def vacuum(self) -> bool:
+        """Rebuild the database file so space freed by deleted rows is returned"""
+        connection = self.connect()
+        if connection is None:
+            return False
+        
+        try:
+            with metrics.span("database.vacuum") as span:
+                connection.execute("VACUUM")
+                span.add("bytes_after", self.db_path.stat().st_size)
+            return True
+        except Exception:
+            return False
+        finally:
+            connection.close()
     
     def get_database_info(self) -> Dict[str, Any]:
         """Get general database information"""
         if not self.exists:
             return {"exists": False}
         
-        if not self.connect():
+        connection = self.connect()
+        if connection is None:
             return {"exists": True, "accessible": False}
         
         try:
-            cursor = self._connection.cursor()
+            cursor = connection.cursor()
             
-            # Get total entries
-            cursor.execute("SELECT COUNT(*) FROM ItemTable")
-            total_entries = cursor.fetchone()[0]
-            
-            # Get augment entries
-            cursor.execute("SELECT COUNT(*) FROM ItemTable WHERE key LIKE '%augment%'")
-            augment_entries = cursor.fetchone()[0]
+            # Get total and augment entries in a single pass
+            with metrics.span("database.info") as span:
+                cursor.execute(
+                    f'SELECT COUNT(*), COALESCE(SUM(key LIKE ?), 0) FROM "{self.table}"', (self.search_pattern,)
+                )
+                total_entries, augment_entries = cursor.fetchone()
+                span.add("rows_scanned", total_entries)
             
             # Get file size
             file_size = self.db_path.stat().st_size
@@ -198,4 +519,4 @@ class DatabaseModel:
                 "error": str(e)
             }
         finally:
-            self.disconnect()
+            connection.close()
@@ -2,13 +2,17 @@
 Telemetry Model - Handles VS Code telemetry data operations
 """
 
-from dataclasses import dataclass
-from typing import Dict, Optional, Any
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
 from pathlib import Path
 import json
 import uuid
 import secrets
-import shutil
+
+from ..core import metrics
+from ..core.backups import backup_path_for
+from ..core.config import get_config
+from ..core.fastcopy import copy_file
 
 @dataclass
 class TelemetryData:
@@ -31,6 +35,7 @@ class TelemetryOperationResult:
     new_data: Optional[TelemetryData] = None
     backup_path: Optional[Path] = None
     error: Optional[str] = None
+    metrics: List[Dict[str, Any]] = field(default_factory=list)
 
 
 class TelemetryModel:
@@ -38,6 +43,7 @@ class TelemetryModel:
     
     def __init__(self, storage_path: Path):
         self.storage_path = storage_path
+        self.backup_suffix = get_config().operations.backup_suffix
         self._current_data: Optional[TelemetryData] = None
         self._backup_path: Optional[Path] = None
     
@@ -89,8 +95,13 @@ class TelemetryModel:
             if not self.exists:
                 return None
             
-            backup_path = self.storage_path.with_suffix(f"{self.storage_path.suffix}.backup")
-            shutil.copy2(self.storage_path, backup_path)
+            backup_path = backup_path_for(self.storage_path, self.backup_suffix)
+            with metrics.span("telemetry.backup") as span:
+                stats = copy_file(self.storage_path, backup_path)
+                span.set("strategy", stats.strategy)
+                span.add("bytes_written", stats.bytes)
+            if not stats.success:
+                return None
             self._backup_path = backup_path
             return backup_path
         except Exception:
@@ -116,8 +127,10 @@ class TelemetryModel:
         
         # Read current storage.json content
         try:
-            with open(self.storage_path, 'r', encoding='utf-8') as f:
-                content = json.load(f)
+            with metrics.span("telemetry.read") as span:
+                with open(self.storage_path, 'r', encoding='utf-8') as f:
+                    content = json.load(f)
+                    span.add("bytes_read", f.tell())
         except Exception as e:
             return TelemetryOperationResult(
                 success=False,
@@ -130,8 +143,10 @@ class TelemetryModel:
         
         # Write back to file
         try:
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
-                json.dump(content, f, indent=2, ensure_ascii=False)
+            with metrics.span("telemetry.write") as span:
+                with open(self.storage_path, 'w', encoding='utf-8') as f:
+                    json.dump(content, f, indent=2, ensure_ascii=False)
+                    span.add("bytes_written", f.tell())
         except Exception as e:
             return TelemetryOperationResult(
                 success=False,
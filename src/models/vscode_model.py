@@ -29,12 +29,18 @@ class VSCodePaths:
     def has_storage(self) -> bool:
         """Check if storage.json exists"""
         return self.storage_json.exists()
+    
+    @property
+    def workspace_storage(self) -> Path:
+        """Directory holding one folder (and state.vscdb) per opened workspace"""
+        return self.user_data / "workspaceStorage"
 
 
 class VSCodeModel:
     """Model for managing VS Code installation and configuration"""
     
-    def __init__(self):
+    def __init__(self, user_data_dir: Optional[Path] = None):
+        self._user_data_dir = Path(user_data_dir) if user_data_dir else None
         self._paths: Optional[VSCodePaths] = None
         self._is_installed = False
         self._version_info: Dict[str, Any] = {}
@@ -67,7 +73,9 @@ class VSCodeModel:
         """Detect VS Code installation paths based on OS"""
         system = platform.system().lower()
         
-        if system == "windows":
+        if self._user_data_dir is not None:
+            user_data = self._user_data_dir
+        elif system == "windows":
             user_data = Path.home() / "AppData" / "Roaming" / "Code" / "User"
         elif system == "darwin":  # macOS
             user_data = Path.home() / "Library" / "Application Support" / "Code" / "User"
@@ -3,6 +3,27 @@ Services package - External integrations and utilities
 """
 
 from .file_service import FileService
+from .backup_service import BackupService, RetentionPolicy, RetentionResult
+from .browser_service import ItemTableReader
+from .diagnostics_service import DiagnosticsService, DatabaseDiagnostics
+from .diff_service import DiffService, DiffResult
+from .extension_service import ExtensionStorageService, ExtensionCleanResult
+from .restore_service import RestoreService, RestoreResult
+from .search_service import SearchService, SearchResult
+from .workspace_service import WorkspaceService, WorkspaceCleanSummary
 from .vscode_service import VSCodeService
 
-__all__ = ['FileService', 'VSCodeService']
+__all__ = ['FileService', 'BackupService', 'RetentionPolicy', 'RetentionResult', 'ItemTableReader',
+           'DiagnosticsService', 'DatabaseDiagnostics', 'DiffService', 'DiffResult',
+           'ExtensionStorageService', 'ExtensionCleanResult', 'RestoreService', 'RestoreResult',
+           'SearchService', 'SearchResult', 'WorkspaceService', 'WorkspaceCleanSummary', 'VSCodeService',
+           'AsyncVSCodeService']
+
+
+def __getattr__(name):
+    # The asyncio facade is imported on demand: asyncio would add noticeably
+    # to the start-up time of the CLI, which never uses it.
+    if name == "AsyncVSCodeService":
+        from .async_service import AsyncVSCodeService
+        return AsyncVSCodeService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
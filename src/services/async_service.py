@@ -0,0 +1,297 @@
+"""
+Async VS Code Service - asyncio facade over VSCodeService
+
+Every blocking call (sqlite, file copies, psutil scans) runs on an executor
+(the event loop's default one unless another is given), so one event loop
+can drive many VS Code installations at once::
+
+    services = [AsyncVSCodeService(user_dir) for user_dir in user_dirs]
+    results = await run_concurrently(*(service.clean_database() for service in services), timeout=120)
+
+Calls that change files take a per-installation lock, so they run one at a
+time for each installation. Reads are not locked: they see the files as
+they are, and the models open a SQLite connection per operation, so a read
+never shares one with a change in flight. Each call accepts a
+``timeout``; when it expires ``asyncio.TimeoutError`` is raised. A thread
+cannot be interrupted, so the blocking work itself still runs to completion
+and keeps the lock until it has. Process shutdown is awaited by polling
+instead of sleeping for a fixed time. Operations that take ``on_span`` pass
+it each metrics span as it finishes (on the executor thread).
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..core import metrics
+from ..core.config import get_config
+from ..models.database_model import DatabaseOperationResult
+from ..models.telemetry_model import TelemetryOperationResult
+from .backup_service import RetentionPolicy, RetentionResult
+from .diagnostics_service import DatabaseDiagnostics, DiagnosticsCallback
+from .diff_service import DiffResult
+from .extension_service import ExtensionCleanResult
+from .restore_service import RestoreResult
+from .search_service import SearchResult, SUBSTRING
+from .vscode_service import VSCodeService
+from .workspace_service import WorkspaceCleanSummary, StalePruneResult
+
+# How often closed VS Code processes are checked for having exited
+EXIT_POLL_INTERVAL = 0.1
+
+
+def _job(function: Callable[..., Any], args: tuple, kwargs: Dict[str, Any],
+         on_span: Optional[metrics.SpanCallback]) -> Callable[[], Any]:
+    """``function`` bound to its arguments, collecting its spans on the executor thread if asked"""
+    call = functools.partial(function, *args, **kwargs)
+    if on_span is None:
+        return call
+
+    def collected() -> Any:
+        with metrics.collect(on_span=on_span):
+            return call()
+    return collected
+
+
+def _retrieve_exception(future: "asyncio.Future") -> None:
+    # Abandoned (timed out) calls may fail later; mark their error as seen
+    if not future.cancelled():
+        future.exception()
+
+
+async def run_concurrently(*awaitables: Awaitable[Any], timeout: Optional[float] = None) -> List[Any]:
+    """Results of ``awaitables`` run together, in order
+
+    If one fails, or ``timeout`` expires first (``asyncio.TimeoutError``),
+    the others are cancelled and awaited before the error propagates, so no
+    task outlives the call.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    if not tasks:
+        return []
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        if pending:
+            raise asyncio.TimeoutError(f"{len(pending)} of {len(tasks)} tasks still running after {timeout} s")
+        return [task.result() for task in tasks]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class AsyncVSCodeService:
+    """Awaitable versions of the VSCodeService operations for one installation"""
+
+    def __init__(self, user_data_dir: Optional[Path] = None, service: Optional[VSCodeService] = None,
+                 executor: Optional[Executor] = None):
+        self.service = service or VSCodeService(user_data_dir)
+        self._executor = executor
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    async def _call(self, function: Callable[..., Any], *args, timeout: Optional[float] = None,
+                    on_span: Optional[metrics.SpanCallback] = None, **kwargs) -> Any:
+        """Run blocking ``function`` on the executor; a timeout abandons the wait, not the work"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, _job(function, args, kwargs, on_span))
+        future.add_done_callback(_retrieve_exception)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def _change(self, function: Callable[..., Any], *args, timeout: Optional[float] = None,
+                      on_span: Optional[metrics.SpanCallback] = None, **kwargs) -> Any:
+        """``_call`` for work that changes files: one at a time, holding the lock until the thread is done"""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        lock = self._lock()
+        await asyncio.wait_for(lock.acquire(), timeout)
+        try:
+            future = loop.run_in_executor(self._executor, _job(function, args, kwargs, on_span))
+        except BaseException:
+            lock.release()
+            raise
+        future.add_done_callback(lambda done: lock.release())
+        future.add_done_callback(_retrieve_exception)
+        remaining = None if deadline is None else max(0.0, deadline - loop.time())
+        return await asyncio.wait_for(asyncio.shield(future), remaining)
+
+    def _lock(self) -> asyncio.Lock:
+        # Created on first use, inside the running loop (older Pythons bind locks to a loop)
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        return self._write_lock
+
+    # Status
+
+    async def status(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Installation, database and telemetry status (see VSCodeService.get_installation_status)"""
+        return await self._call(self.service.get_installation_status, timeout=timeout)
+
+    async def capabilities(self, timeout: Optional[float] = None) -> Dict[str, bool]:
+        """Which operations are available"""
+        return await self._call(self.service.get_operation_capabilities, timeout=timeout)
+
+    async def diagnose_database(self, db_path: Optional[Path] = None, use_cache: bool = True,
+                                on_progress: Optional[DiagnosticsCallback] = None,
+                                timeout: Optional[float] = None,
+                                on_span: Optional[metrics.SpanCallback] = None) -> DatabaseDiagnostics:
+        """Integrity and space usage (``on_progress`` is called on the executor thread)"""
+        return await self._call(self.service.diagnose_database, db_path, use_cache=use_cache,
+                                on_progress=on_progress, timeout=timeout, on_span=on_span)
+
+    async def diff_databases(self, old_path: Path, new_path: Optional[Path] = None,
+                             max_changes: Optional[int] = 1000, timeout: Optional[float] = None) -> DiffResult:
+        """Keys added, removed or changed between two databases"""
+        return await self._call(self.service.diff_databases, old_path, new_path, max_changes=max_changes,
+                                timeout=timeout)
+
+    async def search_database(self, query: str, mode: str = SUBSTRING, scope: str = "all",
+                              limit: Optional[int] = None, timeout: Optional[float] = None) -> SearchResult:
+        """Keys whose key or value matches ``query`` (only the side index is ever written)"""
+        return await self._call(self.service.search_database, query, mode=mode, scope=scope, limit=limit,
+                                timeout=timeout)
+
+    async def get_backup_files(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Backups of this installation"""
+        return await self._call(self.service.get_backup_files, timeout=timeout)
+
+    async def wait_for_backups(self, timeout: Optional[float] = None) -> bool:
+        """Wait for background backup checksumming and compression; False if still busy at ``timeout``"""
+        return await self._call(self.service.wait_for_backups, timeout)
+
+    # Operations that change files
+
+    async def clean_database(self, timeout: Optional[float] = None,
+                             on_span: Optional[metrics.SpanCallback] = None) -> DatabaseOperationResult:
+        """Remove Augment entries from the state database"""
+        return await self._change(self.service.clean_database, timeout=timeout, on_span=on_span)
+
+    async def modify_telemetry_ids(self, timeout: Optional[float] = None,
+                                   on_span: Optional[metrics.SpanCallback] = None) -> TelemetryOperationResult:
+        """Replace the telemetry IDs in storage.json"""
+        return await self._change(self.service.modify_telemetry_ids, timeout=timeout, on_span=on_span)
+
+    async def run_all_operations(self, timeout: Optional[float] = None,
+                                 on_span: Optional[metrics.SpanCallback] = None) -> Dict[str, Any]:
+        """Clean the database and replace the telemetry IDs"""
+        return await self._change(self.service.run_all_operations, timeout=timeout, on_span=on_span)
+
+    async def clean_workspaces(self, timeout: Optional[float] = None,
+                               on_span: Optional[metrics.SpanCallback] = None) -> WorkspaceCleanSummary:
+        """Clean every workspace state database"""
+        return await self._change(self.service.clean_workspaces, timeout=timeout, on_span=on_span)
+
+    async def prune_stale_workspaces(self, dry_run: bool = True,
+                                     timeout: Optional[float] = None) -> StalePruneResult:
+        """Workspace folders whose project no longer exists (removed unless ``dry_run``)"""
+        call = self._call if dry_run else self._change
+        return await call(self.service.prune_stale_workspaces, dry_run, timeout=timeout)
+
+    async def clean_extension_storage(self, archive: Optional[bool] = None, timeout: Optional[float] = None,
+                                      on_span: Optional[metrics.SpanCallback] = None) -> ExtensionCleanResult:
+        """Remove (and archive) Augment extension storage folders"""
+        return await self._change(self.service.clean_extension_storage, archive, timeout=timeout, on_span=on_span)
+
+    async def prune_backups(self, policy: Optional[RetentionPolicy] = None,
+                            timeout: Optional[float] = None) -> RetentionResult:
+        """Remove backups outside the retention policy"""
+        return await self._change(self.service.prune_backups, policy, timeout=timeout)
+
+    async def restore_backup(self, backup_path: Path, target_path: Optional[Path] = None,
+                             timeout: Optional[float] = None,
+                             on_span: Optional[metrics.SpanCallback] = None) -> RestoreResult:
+        """Verify a backup and restore it over the file it was taken from"""
+        return await self._change(self.service.restore_backup, backup_path, target_path, timeout=timeout,
+                                  on_span=on_span)
+
+    # VS Code processes
+
+    async def is_vscode_running(self, timeout: Optional[float] = None) -> bool:
+        """Whether any VS Code process is running"""
+        return await self._call(self.service.is_vscode_running, timeout=timeout)
+
+    async def close_vscode(self, timeout: Optional[float] = None) -> bool:
+        """Close every VS Code process and wait until they have exited (or the close wait has passed)"""
+        lock = self._lock()
+        await asyncio.wait_for(lock.acquire(), timeout)
+        try:
+            return await asyncio.wait_for(self._close_vscode(), timeout)
+        finally:
+            lock.release()
+
+    async def start_vscode(self, workspace_path: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Start VS Code, optionally on a workspace"""
+        return await self._call(self.service.start_vscode, workspace_path, timeout=timeout)
+
+    async def restart_vscode(self, workspace_path: Optional[str] = None,
+                             timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Close and reopen VS Code (same result as VSCodeService.restart_vscode, without metrics)"""
+        lock = self._lock()
+        await asyncio.wait_for(lock.acquire(), timeout)
+        try:
+            return await asyncio.wait_for(self._restart_vscode(workspace_path), timeout)
+        finally:
+            lock.release()
+
+    async def _close_vscode(self) -> bool:
+        pids = await self._call(self.service.terminate_vscode)
+        if pids:
+            await self._wait_for_exit(pids, self.service.close_wait_seconds())
+        return len(pids) > 0
+
+    async def _wait_for_exit(self, pids: List[int], limit: float) -> None:
+        """Return once every process in ``pids`` has exited, or after ``limit`` seconds"""
+        import psutil  # deferred: only process management needs it
+
+        def alive(pid: int) -> bool:
+            try:
+                # A VS Code we started ourselves lingers as a zombie until reaped
+                return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+            except psutil.Error:
+                return False
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + limit
+        while any(alive(pid) for pid in pids) and loop.time() < deadline:
+            await asyncio.sleep(EXIT_POLL_INTERVAL)
+
+    async def _restart_vscode(self, workspace_path: Optional[str]) -> Dict[str, Any]:
+        result = {
+            "success": False,
+            "message": "",
+            "was_running": False,
+            "closed_successfully": False,
+            "started_successfully": False,
+            "metrics": []
+        }
+        try:
+            result["was_running"] = await self.is_vscode_running()
+            if result["was_running"]:
+                result["closed_successfully"] = await self._close_vscode()
+                if not result["closed_successfully"]:
+                    result["message"] = "Failed to close VS Code processes"
+                    return result
+                # Let VS Code's helpers release their files before starting it again
+                await asyncio.sleep(get_config().operations.restart_delay_seconds)
+
+            result["started_successfully"] = await self.start_vscode(workspace_path)
+            if result["started_successfully"]:
+                result["success"] = True
+                if result["was_running"]:
+                    result["message"] = "VS Code restarted successfully"
+                else:
+                    result["message"] = "VS Code started successfully"
+            elif result["was_running"]:
+                result["message"] = "VS Code closed but failed to restart"
+            else:
+                result["message"] = "Failed to start VS Code"
+        except asyncio.CancelledError:
+            # An Exception before Python 3.8; cancellation must propagate
+            raise
+        except Exception as e:
+            result["message"] = f"Error during VS Code restart: {str(e)}"
+        return result
@@ -0,0 +1,479 @@
+"""
+Backup Service - Backup index and retention policies
+
+Backups live next to the files they were taken from (see core.backups for
+the naming). A small JSON manifest in the same directory records each
+backup's source, size, creation time and checksum, so listing and pruning
+only stat files the manifest has not seen yet instead of every backup on
+every call, and restores can verify the backup has not changed.
+
+Backups are taken in two phases. The operation itself only makes a fast
+copy (a reflink where the filesystem supports it) and registers it as a
+``snapshot``. A background worker then checksums it, gzips it into a
+temporary file, renames that into place and marks the record ``stored``;
+the operation never waits for the checksum or the compression.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core import metrics
+from ..core.backups import (
+    COMPRESSED_EXTENSION, HASH_CHUNK_SIZE, backup_timestamp, file_checksum, new_hash, source_name
+)
+from ..core.config import get_config
+
+MANIFEST_NAME = ".augment_vip_backups.json"
+MANIFEST_VERSION = 1
+
+STATE_SNAPSHOT = "snapshot"
+STATE_STORED = "stored"
+
+_finalizer: Optional[ThreadPoolExecutor] = None
+_pending: Dict[str, Future] = {}
+_finalizer_lock = threading.Lock()
+_directory_locks: Dict[str, threading.RLock] = {}
+
+
+def _directory_lock(directory: Path) -> threading.RLock:
+    """One lock per backup directory, shared by every BackupService using it"""
+    with _finalizer_lock:
+        return _directory_locks.setdefault(str(directory.resolve()), threading.RLock())
+
+
+class _HashingWriter:
+    """File wrapper hashing everything written through it"""
+
+    def __init__(self, raw, digest):
+        self.raw = raw
+        self.digest = digest
+
+    def write(self, data) -> int:
+        self.digest.update(data)
+        return self.raw.write(data)
+
+    def flush(self) -> None:
+        self.raw.flush()
+
+
+def wait_for_background(timeout: Optional[float] = None) -> bool:
+    """Block until queued second-phase jobs are done; False on timeout"""
+    with _finalizer_lock:
+        futures = list(_pending.values())
+    done, not_done = wait(futures, timeout=timeout)
+    return not not_done
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Which backups to keep; a zero limit disables that rule"""
+    keep_count: int = 0
+    max_age_days: float = 0.0
+    max_total_bytes: int = 0
+    per_source: bool = True
+
+    @classmethod
+    def from_config(cls) -> "RetentionPolicy":
+        """Policy from [operations] max_backup_files and the [retention] section"""
+        config = get_config()
+        return cls(
+            keep_count=config.operations.max_backup_files,
+            max_age_days=config.retention.max_age_days,
+            max_total_bytes=int(config.retention.max_total_mb * 1024 * 1024),
+            per_source=config.retention.per_source
+        )
+
+
+@dataclass
+class BackupRecord:
+    """A backup file known to the manifest"""
+    name: str
+    source: str
+    size: int
+    created: float
+    checksum: Optional[str] = None
+    state: str = STATE_STORED
+    # WalState of a database backup: journal mode, WAL size, checkpoint result
+    wal: Optional[Dict[str, Any]] = None
+
+    def to_info(self, directory: Path) -> Dict[str, Any]:
+        """File-info style dict (see FileService.get_file_info)"""
+        path = directory / self.name
+        return {
+            "exists": True,
+            "path": str(path),
+            "name": self.name,
+            "source": self.source,
+            "size": self.size,
+            "modified": datetime.fromtimestamp(self.created),
+            "checksum": self.checksum,
+            "state": self.state,
+            "wal": self.wal
+        }
+
+
+@dataclass
+class RetentionResult:
+    """Result of a pruning run"""
+    success: bool
+    message: str
+    removed: List[str] = field(default_factory=list)
+    bytes_freed: int = 0
+    kept: int = 0
+    error: Optional[str] = None
+
+
+class BackupService:
+    """Manifest-backed index of the backups in one directory"""
+
+    def __init__(self, backup_dir: Path, backup_suffix: Optional[str] = None):
+        self.backup_dir = Path(backup_dir)
+        self.backup_suffix = backup_suffix or get_config().operations.backup_suffix
+        self.manifest_path = self.backup_dir / MANIFEST_NAME
+        self._records: Optional[Dict[str, BackupRecord]] = None
+        self._manifest_signature_seen: Optional[Tuple[int, int]] = None
+        self._lock = _directory_lock(self.backup_dir)
+
+    def source_of(self, name: str) -> Optional[str]:
+        """Name of the file a backup was taken from, or None if ``name`` is not a backup"""
+        return source_name(name, self.backup_suffix)
+
+    def register(self, backup_path: Path, source: Optional[str] = None,
+                 wal: Optional[Dict[str, Any]] = None) -> Optional[BackupRecord]:
+        """Add (or refresh) a freshly written backup in the index, with its checksum"""
+        backup_path = Path(backup_path)
+        source = source or self.source_of(backup_path.name)
+        if source is None:
+            return None
+
+        try:
+            stat = backup_path.stat()
+            with metrics.span("backup.checksum") as span:
+                checksum = file_checksum(backup_path)
+                span.add("bytes_read", stat.st_size)
+        except OSError:
+            return None
+
+        with self._lock:
+            records = self._load()
+            # copy2 preserves the source mtime, so record when the backup was made
+            record = BackupRecord(backup_path.name, source, stat.st_size, time.time(), checksum, wal=wal)
+            records[record.name] = record
+            self._save()
+        return record
+
+    def register_snapshot(self, snapshot_path: Path, source: Optional[str] = None,
+                          wal: Optional[Dict[str, Any]] = None) -> Optional[BackupRecord]:
+        """First phase: index a fresh copy without reading it; ``schedule_finalize`` does the rest"""
+        snapshot_path = Path(snapshot_path)
+        source = source or self.source_of(snapshot_path.name)
+        if source is None:
+            return None
+
+        try:
+            size = snapshot_path.stat().st_size
+        except OSError:
+            return None
+
+        with self._lock:
+            records = self._load()
+            record = BackupRecord(snapshot_path.name, source, size, time.time(), state=STATE_SNAPSHOT, wal=wal)
+            records[record.name] = record
+            self._save()
+        return record
+
+    def pending(self) -> List[BackupRecord]:
+        """Snapshots still waiting for the second phase"""
+        with self._lock:
+            return [record for record in self._load().values() if record.state == STATE_SNAPSHOT]
+
+    def schedule_finalize(self, compress: Optional[bool] = None) -> List[Future]:
+        """Queue every pending snapshot on the background worker"""
+        global _finalizer
+        futures = []
+        for record in self.pending():
+            key = str(self.backup_dir / record.name)
+            with _finalizer_lock:
+                if key in _pending:
+                    continue
+                if _finalizer is None:
+                    # One worker: compression is I/O heavy and must not compete with the user's operations
+                    _finalizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup-finalize")
+                future = _finalizer.submit(self.finalize, record.name, compress)
+                _pending[key] = future
+            future.add_done_callback(lambda _, key=key: self._forget(key))
+            futures.append(future)
+        return futures
+
+    @staticmethod
+    def _forget(key: str) -> None:
+        with _finalizer_lock:
+            _pending.pop(key, None)
+
+    def finalize(self, name: str, compress: Optional[bool] = None) -> Optional[BackupRecord]:
+        """Second phase: checksum (and gzip) a snapshot, then mark it stored"""
+        config = get_config().backups
+        compress = config.compress if compress is None else compress
+        snapshot_path = self.backup_dir / name
+
+        with self._lock:
+            record = self._load().get(name)
+            if record is None or record.state != STATE_SNAPSHOT:
+                return record
+        # Archives (.tar.gz) are compressed already
+        compress = compress and not name.endswith(COMPRESSED_EXTENSION)
+
+        try:
+            if not compress:
+                with metrics.span("backup.checksum") as span:
+                    checksum = file_checksum(snapshot_path)
+                    span.add("bytes_read", record.size)
+                with self._lock:
+                    current = self._load().get(name)
+                    if current is None:
+                        return None
+                    current.checksum, current.state = checksum, STATE_STORED
+                    self._save()
+                return current
+
+            stored_path = snapshot_path.with_name(name + COMPRESSED_EXTENSION)
+            temp_path = self.backup_dir / f".{stored_path.name}.tmp"
+            with metrics.span("backup.compress") as span:
+                checksum, size = self._compress(snapshot_path, temp_path, config.compression_level)
+                shutil.copystat(snapshot_path, temp_path)
+                span.add("bytes_read", record.size)
+                span.add("bytes_written", size)
+
+            with self._lock:
+                records = self._load()
+                if name not in records:
+                    # Pruned while it was being compressed
+                    os.unlink(temp_path)
+                    return None
+                os.replace(temp_path, stored_path)
+                try:
+                    snapshot_path.unlink()
+                except OSError:
+                    # Still open elsewhere (e.g. being restored on Windows); retried next time
+                    stored_path.unlink()
+                    return records[name]
+                stored = replace(records.pop(name), name=stored_path.name, size=size,
+                                 checksum=checksum, state=STATE_STORED)
+                records[stored.name] = stored
+                self._save()
+            return stored
+        except OSError:
+            try:
+                os.unlink(self.backup_dir / f".{name}{COMPRESSED_EXTENSION}.tmp")
+            except OSError:
+                pass
+            return None
+
+    @staticmethod
+    def _compress(source: Path, destination: Path, level: int) -> Tuple[str, int]:
+        """Gzip ``source``, hashing the compressed bytes as they are written"""
+        digest = new_hash()
+        with open(source, "rb") as src, open(destination, "wb") as raw:
+            with gzip.GzipFile(filename=source.name, mode="wb", compresslevel=level,
+                               fileobj=_HashingWriter(raw, digest)) as compressed:
+                for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b""):
+                    compressed.write(chunk)
+            raw.flush()
+            os.fsync(raw.fileno())
+            size = raw.tell()
+        return digest.hexdigest(), size
+
+    def locate(self, backup_path: Path) -> Path:
+        """Where a backup lives now (a snapshot may have been compressed since)"""
+        backup_path = Path(backup_path)
+        if not backup_path.exists():
+            compressed = backup_path.with_name(backup_path.name + COMPRESSED_EXTENSION)
+            if compressed.exists():
+                return compressed
+        return backup_path
+
+    def get(self, name: str) -> Optional[BackupRecord]:
+        """Indexed record for a backup file name"""
+        with self._lock:
+            return self._load().get(name)
+
+    def list_backups(self) -> List[BackupRecord]:
+        """Indexed backups, newest first"""
+        with self._lock:
+            records = self._reconcile()
+        return sorted(records.values(), key=lambda record: record.created, reverse=True)
+
+    def total_size(self) -> int:
+        """Combined size of all indexed backups"""
+        return sum(record.size for record in self.list_backups())
+
+    def select_expired(self, policy: RetentionPolicy, now: Optional[float] = None) -> List[BackupRecord]:
+        """Backups the policy would remove; the newest backup of each source is always kept"""
+        now = time.time() if now is None else now
+        backups = self.list_backups()
+
+        groups: Dict[str, List[BackupRecord]] = {}
+        newest_by_source: Dict[str, str] = {}
+        for record in backups:
+            groups.setdefault(record.source if policy.per_source else "", []).append(record)
+            newest_by_source.setdefault(record.source, record.name)
+        newest = set(newest_by_source.values())
+
+        expired: Dict[str, BackupRecord] = {}
+
+        # keep-N, per source or across all sources
+        if policy.keep_count > 0:
+            for records in groups.values():
+                for record in records[policy.keep_count:]:
+                    expired[record.name] = record
+
+        # max-age
+        if policy.max_age_days > 0:
+            cutoff = now - policy.max_age_days * 86400
+            for record in backups:
+                if record.created < cutoff:
+                    expired[record.name] = record
+
+        # max-total-bytes: drop the oldest survivors until under the limit
+        if policy.max_total_bytes > 0:
+            survivors = [record for record in backups if record.name not in expired]
+            total = sum(record.size for record in survivors)
+            for record in reversed(survivors):
+                if total <= policy.max_total_bytes:
+                    break
+                if record.name in newest:
+                    continue
+                expired[record.name] = record
+                total -= record.size
+
+        return [record for record in backups if record.name in expired and record.name not in newest]
+
+    def prune(self, policy: Optional[RetentionPolicy] = None) -> RetentionResult:
+        """Delete the backups selected by ``policy`` (defaults to the configured policy)"""
+        policy = policy or RetentionPolicy.from_config()
+        result = RetentionResult(success=True, message="")
+
+        try:
+            with metrics.span("backup.prune") as span, self._lock:
+                expired = self.select_expired(policy)
+                records = self._load()
+                for record in expired:
+                    try:
+                        (self.backup_dir / record.name).unlink()
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        result.success = False
+                        result.error = str(e)
+                        continue
+                    records.pop(record.name, None)
+                    result.removed.append(record.name)
+                    result.bytes_freed += record.size
+                if result.removed:
+                    self._save()
+                result.kept = len(records)
+                span.add("files_removed", len(result.removed))
+                span.add("bytes_freed", result.bytes_freed)
+        except Exception as e:
+            return RetentionResult(success=False, message="Failed to prune backups", error=str(e))
+
+        result.message = f"Removed {len(result.removed)} old backup(s), kept {result.kept}"
+        return result
+
+    def _created_from_name(self, name: str, stat: os.stat_result) -> float:
+        """Creation time from a ``_YYYYmmdd_HHMMSS`` name suffix, else from the inode"""
+        stamp = backup_timestamp(name, self.backup_suffix)
+        if stamp is not None:
+            return stamp.timestamp()
+        # ctime covers copies whose mtime was preserved from the source
+        return max(stat.st_mtime, stat.st_ctime)
+
+    def _manifest_signature(self) -> Optional[Tuple[int, int]]:
+        """Changes on every save: each one replaces the manifest with a new inode"""
+        try:
+            stat = self.manifest_path.stat()
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load(self) -> Dict[str, BackupRecord]:
+        """Manifest records, read from disk on first use and whenever another writer changed it"""
+        signature = self._manifest_signature()
+        if self._records is None or signature != self._manifest_signature_seen:
+            self._manifest_signature_seen = signature
+            self._records = {}
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    for name, entry in data.get("backups", {}).items():
+                        self._records[name] = BackupRecord(name=name, **entry)
+            except (OSError, ValueError, TypeError):
+                self._records = {}
+        return self._records
+
+    def _reconcile(self) -> Dict[str, BackupRecord]:
+        """Sync the index with the directory, statting only unknown backups"""
+        records = self._load()
+        changed = False
+        seen = set()
+
+        try:
+            with os.scandir(self.backup_dir) as entries:
+                for entry in entries:
+                    # Compression in progress (see finalize), not a backup yet
+                    if entry.name.startswith(".") and entry.name.endswith(".tmp"):
+                        continue
+                    source = self.source_of(entry.name)
+                    if source is None:
+                        continue
+                    seen.add(entry.name)
+                    if entry.name in records:
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    created = self._created_from_name(entry.name, stat)
+                    records[entry.name] = BackupRecord(entry.name, source, stat.st_size, created)
+                    changed = True
+        except OSError:
+            return records
+
+        # Backups deleted outside the application
+        for name in [name for name in records if name not in seen]:
+            del records[name]
+            changed = True
+
+        if changed:
+            self._save()
+        return records
+
+    def _save(self) -> None:
+        """Write the manifest atomically; the index still works if this fails"""
+        data = {
+            "version": MANIFEST_VERSION,
+            "backups": {
+                name: {key: value for key, value in asdict(record).items() if key != "name"}
+                for name, record in (self._records or {}).items()
+            }
+        }
+        temp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(temp_path, self.manifest_path)
+            self._manifest_signature_seen = self._manifest_signature()
+        except OSError:
+            pass
@@ -0,0 +1,88 @@
+"""
+Browser Service - Paged, read-only access to an ItemTable
+
+Rows are fetched a page at a time with keyset pagination
+(``WHERE key > ? ORDER BY key LIMIT n``) through the primary-key index, so
+every page costs the same however far into the table it is and no read
+transaction is held between pages (VS Code can keep checkpointing). Pages
+carry keys and value sizes only; a value is read when it is asked for.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from ..core import metrics
+from ..core.config import get_config
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# Values larger than this are previewed truncated
+PREVIEW_LIMIT = 256 * 1024
+
+
+@dataclass
+class ItemRow:
+    """One ItemTable key and the size of its value in bytes"""
+    key: str
+    size: int
+
+
+def format_value(value: Union[str, bytes, None], limit: int = PREVIEW_LIMIT) -> str:
+    """Readable preview of a value: indented JSON when it parses, else the (truncated) text"""
+    if value is None:
+        return "NULL"
+    truncated = len(value) > limit
+    text = value[:limit]
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    if truncated:
+        return text + "\n… (truncated)"
+    try:
+        return json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+    except ValueError:
+        return text
+
+
+class ItemTableReader:
+    """Keyset-paged reader over one database's ItemTable"""
+
+    def __init__(self, db_path: Path, table: Optional[str] = None):
+        self.db_path = Path(db_path)
+        self.table = table or get_config().operations.database_table
+        self._connection: Optional["sqlite3.Connection"] = None
+
+    def _connect(self) -> "sqlite3.Connection":
+        if self._connection is None:
+            import sqlite3  # deferred until the table is first read
+
+            self._connection = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        return self._connection
+
+    def close(self) -> None:
+        """Close the read-only connection"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def page(self, after: Optional[str] = None, limit: Optional[int] = None) -> List[ItemRow]:
+        """Up to ``limit`` rows with keys sorting after ``after`` (from the start when None)"""
+        limit = limit or get_config().performance.page_size
+        columns = f'key, COALESCE(length(CAST(value AS BLOB)), 0) FROM "{self.table}"'
+        with metrics.span("browser.page") as span:
+            if after is None:
+                cursor = self._connect().execute(f"SELECT {columns} ORDER BY key LIMIT ?", (limit,))
+            else:
+                cursor = self._connect().execute(
+                    f"SELECT {columns} WHERE key > ? ORDER BY key LIMIT ?", (after, limit)
+                )
+            rows = [ItemRow(str(key), size) for key, size in cursor.fetchall()]
+            span.add("rows", len(rows))
+        return rows
+
+    def value(self, key: str) -> Union[str, bytes, None]:
+        """The value stored under ``key`` (None when the key is gone)"""
+        row = self._connect().execute(f'SELECT value FROM "{self.table}" WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
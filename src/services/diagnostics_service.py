@@ -0,0 +1,254 @@
+"""
+Diagnostics Service - Integrity and space usage of state databases
+
+One read-only connection and transaction collects page statistics, the
+per-table breakdown from the ``dbstat`` virtual table, row and byte counts
+per key prefix (roughly: per extension) and ``PRAGMA quick_check``. Partial
+results are reported while the scan runs. Finished reports are cached on
+disk keyed by the database's file signature, so an unchanged database is
+never scanned twice.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from ..core import metrics
+from ..core.config import get_config
+
+if TYPE_CHECKING:
+    import sqlite3
+
+CACHE_FILE_NAME = "diagnostics.json"
+CACHE_VERSION = 1
+
+# Free pages above this share of the file make a VACUUM worthwhile
+VACUUM_FREE_RATIO = 0.2
+
+DiagnosticsCallback = Callable[["DatabaseDiagnostics"], None]
+
+
+@dataclass
+class PrefixUsage:
+    """Rows and payload bytes under one key prefix"""
+    prefix: str
+    rows: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class DatabaseDiagnostics:
+    """Diagnostics report for one database (possibly partial)"""
+    db_path: str
+    signature: str
+    complete: bool = False
+    integrity: Optional[str] = None
+    file_size: int = 0
+    page_size: int = 0
+    page_count: int = 0
+    freelist_count: int = 0
+    tables: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    rows_scanned: int = 0
+    prefixes: List[PrefixUsage] = field(default_factory=list)
+    cached: bool = False
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        """Space a VACUUM would return (free pages)"""
+        return self.freelist_count * self.page_size
+
+    @property
+    def vacuum_recommended(self) -> bool:
+        return self.page_count > 0 and self.freelist_count / self.page_count >= VACUUM_FREE_RATIO
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["reclaimable_bytes"] = self.reclaimable_bytes
+        data["vacuum_recommended"] = self.vacuum_recommended
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DatabaseDiagnostics":
+        data = {key: value for key, value in data.items() if key in cls.__dataclass_fields__}
+        data["prefixes"] = [PrefixUsage(**prefix) for prefix in data.get("prefixes", [])]
+        return cls(**data)
+
+
+def key_prefix(key: str, segments: int = 2) -> str:
+    """Leading ``segments`` parts of a key, split on '.' and '/'
+
+    ``ms-python.python.foo`` -> ``ms-python.python``,
+    ``memento/webviewView.x`` -> ``memento/webviewView``.
+    """
+    end = -1
+    for _ in range(segments):
+        next_dot = key.find(".", end + 1)
+        next_slash = key.find("/", end + 1)
+        candidates = [index for index in (next_dot, next_slash) if index != -1]
+        if not candidates:
+            return key
+        end = min(candidates)
+    return key[:end]
+
+
+def file_signature(db_path: Path) -> str:
+    """Size and mtime of the database and its WAL; changes whenever the content may have"""
+    parts = []
+    for suffix in ("", "-wal"):
+        try:
+            stat = os.stat(f"{db_path}{suffix}")
+            parts.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append("-")
+    return "/".join(parts)
+
+
+class DiagnosticsService:
+    """Runs and caches database diagnostics"""
+
+    def __init__(self, cache_dir: Optional[Path] = None, table: Optional[str] = None):
+        config = get_config()
+        self.cache_path = Path(cache_dir or config.cache.path) / CACHE_FILE_NAME
+        self.table = table or config.operations.database_table
+        self._lock = threading.Lock()
+
+    def cached(self, db_path: Path) -> Optional[DatabaseDiagnostics]:
+        """Cached report if the database has not changed since it was produced"""
+        key = str(Path(db_path).resolve())
+        entry = self._load_cache().get(key)
+        if not entry or entry.get("signature") != file_signature(db_path):
+            return None
+        report = DatabaseDiagnostics.from_dict(entry)
+        report.cached = True
+        return report
+
+    def run(self, db_path: Path, on_progress: Optional[DiagnosticsCallback] = None,
+            use_cache: bool = True, prefix_segments: int = 2, top: int = 50) -> DatabaseDiagnostics:
+        """Diagnose ``db_path``; ``on_progress`` receives partial reports while it runs"""
+        db_path = Path(db_path)
+        if use_cache:
+            report = self.cached(db_path)
+            if report is not None:
+                if on_progress:
+                    on_progress(report)
+                return report
+
+        signature = file_signature(db_path)
+        report = DatabaseDiagnostics(db_path=str(db_path), signature=signature)
+        started = time.perf_counter()
+
+        try:
+            import sqlite3  # deferred until a database is diagnosed
+
+            connection = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                # One read transaction: every figure describes the same snapshot
+                connection.execute("BEGIN")
+                self._page_stats(connection, db_path, report)
+                self._notify(on_progress, report, started)
+                self._scan_prefixes(connection, report, prefix_segments, top, on_progress, started)
+                with metrics.span("diagnostics.quick_check"):
+                    rows = connection.execute("PRAGMA quick_check").fetchall()
+                problems = [row[0] for row in rows if row[0] != "ok"]
+                report.integrity = problems[0] if problems else "ok"
+                connection.execute("COMMIT")
+            finally:
+                connection.close()
+            report.complete = True
+        except Exception as e:
+            report.error = str(e)
+
+        report.duration = time.perf_counter() - started
+        if report.complete and file_signature(db_path) == signature:
+            self._store(db_path, report)
+        if on_progress:
+            on_progress(report)
+        return report
+
+    def _notify(self, on_progress: Optional[DiagnosticsCallback], report: DatabaseDiagnostics,
+                started: float) -> None:
+        if on_progress:
+            report.duration = time.perf_counter() - started
+            on_progress(report)
+
+    def _page_stats(self, connection: "sqlite3.Connection", db_path: Path,
+                    report: DatabaseDiagnostics) -> None:
+        """page_size/page_count/freelist_count and the dbstat per-table breakdown"""
+        with metrics.span("diagnostics.pages"):
+            report.file_size = db_path.stat().st_size
+            report.page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+            report.page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+            report.freelist_count = connection.execute("PRAGMA freelist_count").fetchone()[0]
+            try:
+                rows = connection.execute(
+                    "SELECT name, COUNT(*), SUM(pgsize), SUM(unused), SUM(payload) FROM dbstat GROUP BY name"
+                ).fetchall()
+            except Exception:
+                # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+                rows = []
+            report.tables = {
+                name: {"pages": pages, "bytes": size, "unused": unused, "payload": payload}
+                for name, pages, size, unused, payload in rows
+            }
+
+    def _scan_prefixes(self, connection: "sqlite3.Connection", report: DatabaseDiagnostics,
+                       segments: int, top: int, on_progress: Optional[DiagnosticsCallback],
+                       started: float) -> None:
+        """Stream keys with their payload sizes and aggregate by prefix"""
+        batch_size = get_config().performance.batch_size
+        usage: Dict[str, PrefixUsage] = {}
+
+        def publish() -> None:
+            report.prefixes = sorted(usage.values(), key=lambda item: item.bytes, reverse=True)[:top]
+
+        with metrics.span("diagnostics.prefixes") as span:
+            cursor = connection.execute(
+                f'SELECT key, length(key) + COALESCE(length(CAST(value AS BLOB)), 0) FROM "{self.table}"'
+            )
+            next_report = batch_size * 50
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for key, size in rows:
+                    prefix = key_prefix(str(key), segments)
+                    item = usage.get(prefix)
+                    if item is None:
+                        item = usage[prefix] = PrefixUsage(prefix)
+                    item.rows += 1
+                    item.bytes += size
+                report.rows_scanned += len(rows)
+                if on_progress and report.rows_scanned >= next_report:
+                    publish()
+                    self._notify(on_progress, report, started)
+                    next_report += batch_size * 50
+            publish()
+            span.add("rows_scanned", report.rows_scanned)
+
+    def _load_cache(self) -> Dict[str, Any]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data.get("reports", {}) if data.get("version") == CACHE_VERSION else {}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _store(self, db_path: Path, report: DatabaseDiagnostics) -> None:
+        """Add a finished report to the cache file (best effort)"""
+        with self._lock:
+            reports = self._load_cache()
+            reports[str(db_path.resolve())] = asdict(report)
+            temp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"version": CACHE_VERSION, "reports": reports}, f)
+                os.replace(temp_path, self.cache_path)
+            except OSError:
+                pass
@@ -0,0 +1,202 @@
+"""
+Diff Service - What changed between two state databases
+
+Both ItemTables are read in key order through their primary-key index and
+merge-joined, so memory stays constant however large the tables are. Only a
+short hash of each changed value is kept; values themselves are compared
+where they meet in the join and dropped immediately. Either side may be a
+compressed (``.gz``) backup, which is expanded to a temporary file first.
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..core import metrics
+from ..core.config import get_config
+from .restore_service import is_compressed
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+DIGEST_SIZE = 8
+
+
+@dataclass
+class KeyChange:
+    """One key that differs between the two databases"""
+    key: str
+    change: str
+    old_size: int = 0
+    new_size: int = 0
+    old_hash: Optional[str] = None
+    new_hash: Optional[str] = None
+
+    @property
+    def size_delta(self) -> int:
+        return self.new_size - self.old_size
+
+
+@dataclass
+class DiffResult:
+    """Result of comparing two databases (counts always cover every key)"""
+    success: bool
+    message: str
+    old_path: Optional[Path] = None
+    new_path: Optional[Path] = None
+    added: int = 0
+    removed: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    bytes_added: int = 0
+    bytes_removed: int = 0
+    changes: List[KeyChange] = field(default_factory=list)
+    truncated: bool = False
+    error: Optional[str] = None
+    metrics: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def size_delta(self) -> int:
+        return self.bytes_added - self.bytes_removed
+
+
+def value_hash(value: Optional[bytes]) -> Optional[str]:
+    """Short, stable digest of an ItemTable value"""
+    if value is None:
+        return None
+    return hashlib.blake2b(value, digest_size=DIGEST_SIZE).hexdigest()
+
+
+def _size(value: Optional[bytes]) -> int:
+    return 0 if value is None else len(value)
+
+
+@contextmanager
+def _readable_database(path: Path) -> Iterator[Path]:
+    """``path`` itself, or a decompressed temporary copy of a .gz backup"""
+    if not is_compressed(path):
+        yield path
+        return
+
+    fd, temp_name = tempfile.mkstemp(prefix="augment_vip_diff_", suffix=".vscdb")
+    try:
+        with metrics.span("diff.decompress") as span:
+            with gzip.open(path, "rb") as source, os.fdopen(fd, "wb") as destination:
+                shutil.copyfileobj(source, destination, 1024 * 1024)
+            span.add("bytes_written", os.path.getsize(temp_name))
+        yield Path(temp_name)
+    finally:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+
+
+class DiffService:
+    """Compares the ItemTables of two state databases"""
+
+    def __init__(self, table: Optional[str] = None):
+        self.table = table or get_config().operations.database_table
+
+    def _rows(self, connection, batch_size: int) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """Rows in key order, fetched in batches"""
+        # As BLOB: the same bytes compare equal whether stored as TEXT or BLOB
+        cursor = connection.execute(f'SELECT key, CAST(value AS BLOB) FROM "{self.table}" ORDER BY key')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def diff(self, old_path: Path, new_path: Path, max_changes: Optional[int] = 1000,
+             on_change: Optional[Callable[[KeyChange], None]] = None) -> DiffResult:
+        """Compare ``old_path`` with ``new_path``
+
+        ``changes`` keeps the first ``max_changes`` differences in key order
+        (None keeps all); ``on_change`` sees every one of them as it is found.
+        """
+        old_path, new_path = Path(old_path), Path(new_path)
+        result = DiffResult(success=False, message="", old_path=old_path, new_path=new_path)
+
+        with metrics.collect() as spans:
+            try:
+                with _readable_database(old_path) as old_db, _readable_database(new_path) as new_db:
+                    self._merge(old_db, new_db, result, max_changes, on_change)
+                result.success = True
+            except Exception as e:
+                result.message = "Failed to compare databases"
+                result.error = str(e)
+        result.metrics = spans
+
+        if result.success:
+            result.message = (
+                f"{result.added} added, {result.removed} removed, {result.changed} changed, "
+                f"{result.unchanged} unchanged"
+            )
+        return result
+
+    def _merge(self, old_db: Path, new_db: Path, result: DiffResult, max_changes: Optional[int],
+               on_change: Optional[Callable[[KeyChange], None]]) -> None:
+        def record(change: KeyChange) -> None:
+            if change.change == ADDED:
+                result.added += 1
+            elif change.change == REMOVED:
+                result.removed += 1
+            else:
+                result.changed += 1
+            delta = change.size_delta
+            if delta > 0:
+                result.bytes_added += delta
+            else:
+                result.bytes_removed -= delta
+            if max_changes is None or len(result.changes) < max_changes:
+                result.changes.append(change)
+            else:
+                result.truncated = True
+            if on_change:
+                on_change(change)
+
+        import sqlite3  # deferred until a diff is run
+
+        batch_size = get_config().performance.batch_size
+        old_connection = sqlite3.connect(f"{old_db.resolve().as_uri()}?mode=ro", uri=True)
+        new_connection = sqlite3.connect(f"{new_db.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            with metrics.span("diff.merge") as span:
+                old_rows, new_rows = self._rows(old_connection, batch_size), self._rows(new_connection, batch_size)
+                old_row, new_row = next(old_rows, None), next(new_rows, None)
+                scanned = 0
+                while old_row is not None or new_row is not None:
+                    scanned += 1
+                    if new_row is None or (old_row is not None and old_row[0] < new_row[0]):
+                        key, value = old_row
+                        record(KeyChange(key, REMOVED, old_size=_size(value), old_hash=value_hash(value)))
+                        old_row = next(old_rows, None)
+                    elif old_row is None or new_row[0] < old_row[0]:
+                        key, value = new_row
+                        record(KeyChange(key, ADDED, new_size=_size(value), new_hash=value_hash(value)))
+                        new_row = next(new_rows, None)
+                    else:
+                        # Same key: compare in place, hash only what differs
+                        old_value, new_value = old_row[1], new_row[1]
+                        if old_value == new_value:
+                            result.unchanged += 1
+                        else:
+                            record(KeyChange(
+                                old_row[0], CHANGED,
+                                old_size=_size(old_value), new_size=_size(new_value),
+                                old_hash=value_hash(old_value), new_hash=value_hash(new_value)
+                            ))
+                        old_row, new_row = next(old_rows, None), next(new_rows, None)
+                span.add("keys_compared", scanned)
+                span.add("keys_changed", result.added + result.removed + result.changed)
+        finally:
+            old_connection.close()
+            new_connection.close()
@@ -0,0 +1,126 @@
+"""
+Extension Service - Extension data under User/globalStorage/<publisher.extension>/
+
+Besides their ItemTable keys, extensions keep files in a directory named after
+the extension. Directories are matched with the same LIKE pattern the database
+clean uses, optionally archived into the backup directory, and removed with
+FileService.remove_tree so the cost shows up as files removed.
+"""
+
+import os
+import tarfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..core import metrics
+from ..core.backups import backup_path_for
+from ..core.config import get_config
+from ..models.database_model import compile_like
+from .file_service import FileService, ProgressCallback
+
+ARCHIVE_EXTENSION = ".tar.gz"
+
+
+@dataclass
+class ExtensionStorage:
+    """A matching extension storage directory"""
+    name: str
+    path: Path
+    size: int = 0
+
+
+@dataclass
+class ExtensionCleanResult:
+    """Result of removing extension storage directories"""
+    success: bool
+    message: str
+    directories_removed: List[str] = field(default_factory=list)
+    files_removed: int = 0
+    bytes_removed: int = 0
+    archives: List[Path] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+    metrics: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class ExtensionStorageService:
+    """Finds and removes extension storage directories matching the clean rule"""
+
+    def __init__(self, global_storage_dir: Path, search_pattern: Optional[str] = None,
+                 backup_suffix: Optional[str] = None):
+        operations = get_config().operations
+        self.global_storage_dir = Path(global_storage_dir)
+        self.search_pattern = search_pattern or operations.search_pattern
+        self.backup_suffix = backup_suffix or operations.backup_suffix
+
+    def find_matching(self, with_sizes: bool = False) -> List[ExtensionStorage]:
+        """Extension directories whose name matches the search pattern"""
+        matcher = compile_like(self.search_pattern)
+        matches = []
+        try:
+            with os.scandir(self.global_storage_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False) and matcher.fullmatch(entry.name):
+                        matches.append(ExtensionStorage(entry.name, Path(entry.path)))
+        except OSError:
+            return []
+
+        if with_sizes:
+            for storage in matches:
+                storage.size = FileService.calculate_directory_size(storage.path)
+        return sorted(matches, key=lambda storage: storage.name)
+
+    def archive(self, storage: ExtensionStorage) -> Optional[Path]:
+        """Pack a directory into ``<name>.<suffix>_<timestamp>.tar.gz`` next to it"""
+        archive_path = backup_path_for(storage.path, self.backup_suffix, ARCHIVE_EXTENSION)
+        try:
+            with metrics.span("extensions.archive") as span:
+                with tarfile.open(archive_path, "w:gz") as archive:
+                    archive.add(str(storage.path), arcname=storage.name)
+                span.add("bytes_written", archive_path.stat().st_size)
+            return archive_path
+        except (OSError, tarfile.TarError):
+            FileService.safe_delete(archive_path)
+            return None
+
+    def clean(self, archive: Optional[bool] = None,
+              progress: Optional[ProgressCallback] = None) -> ExtensionCleanResult:
+        """Remove all matching directories, archiving them first if configured"""
+        if archive is None:
+            archive = get_config().extensions.archive
+
+        result = ExtensionCleanResult(success=True, message="")
+        with metrics.collect() as spans:
+            for storage in self.find_matching():
+                if archive:
+                    archive_path = self.archive(storage)
+                    if archive_path is None:
+                        # Never delete data we failed to keep a copy of
+                        result.errors[storage.name] = "archive failed"
+                        continue
+                    result.archives.append(archive_path)
+
+                done_files, done_bytes = result.files_removed, result.bytes_removed
+                tree_progress = None
+                if progress:
+                    def tree_progress(files: int, size: int) -> None:
+                        progress(done_files + files, done_bytes + size)
+
+                stats = FileService.remove_tree(storage.path, tree_progress)
+                result.files_removed += stats.files
+                result.bytes_removed += stats.bytes
+                if stats.success:
+                    result.directories_removed.append(storage.name)
+                else:
+                    result.errors[storage.name] = stats.error or "removal failed"
+        result.metrics = spans
+
+        result.success = not result.errors
+        size_text = FileService.format_file_size(result.bytes_removed)
+        result.message = (
+            f"Removed {len(result.directories_removed)} extension storage folder(s), "
+            f"{result.files_removed} files, {size_text}"
+        )
+        if result.errors:
+            result.message += f", {len(result.errors)} failed"
+        return result
@@ -5,25 +5,91 @@ File Service - Handles file operations and utilities
 import os
 import shutil
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Tuple
+from dataclasses import dataclass
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from ..core import metrics
+from ..core.backups import backup_path_for
+from ..core.config import get_config
+from ..core.fastcopy import CopyStats, copy_file
+
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class RemovalStats:
+    """Outcome of FileService.remove_tree"""
+    success: bool = True
+    files: int = 0
+    directories: int = 0
+    bytes: int = 0
+    error: Optional[str] = None
+
+
+# Directory path -> (mtime_ns, bytes of its files, its subdirectories)
+_size_cache: Dict[str, Tuple[int, int, Tuple[str, ...]]] = {}
+
+
+def _scan_directory(path: str, use_cache: bool) -> Tuple[int, Tuple[str, ...]]:
+    """Bytes of the files directly in ``path`` and its subdirectory paths"""
+    if use_cache:
+        mtime = os.stat(path).st_mtime_ns
+        cached = _size_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+    
+    files_bytes = 0
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    files_bytes += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+    
+    if use_cache:
+        _size_cache[path] = (mtime, files_bytes, tuple(subdirs))
+    return files_bytes, tuple(subdirs)
+
+
+def _tree_size(path: str, use_cache: bool) -> int:
+    """Total file bytes below ``path`` (iterative, skips unreadable directories)"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            files_bytes, subdirs = _scan_directory(stack.pop(), use_cache)
+        except OSError:
+            continue
+        total += files_bytes
+        stack.extend(subdirs)
+    return total
+
+
 class FileService:
     """Service for file operations"""
     
     @staticmethod
-    def create_backup(file_path: Path, backup_suffix: str = "backup") -> Optional[Path]:
+    def create_backup(file_path: Path, backup_suffix: Optional[str] = None) -> Optional[Path]:
         """Create a backup of the specified file"""
+        backup_suffix = backup_suffix or get_config().operations.backup_suffix
         try:
             if not file_path.exists():
                 return None
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = file_path.with_suffix(f"{file_path.suffix}.{backup_suffix}_{timestamp}")
+            backup_path = backup_path_for(file_path, backup_suffix)
             
-            shutil.copy2(file_path, backup_path)
-            return backup_path
+            with metrics.span("file.backup") as span:
+                stats = copy_file(file_path, backup_path)
+                span.set("strategy", stats.strategy)
+                span.add("bytes_written", stats.bytes)
+            return backup_path if stats.success else None
         except Exception:
             return None
     
@@ -36,6 +102,11 @@ class FileService:
         except Exception:
             return False
     
+    @staticmethod
+    def copy_file(source: Path, destination: Path, preserve_metadata: bool = True) -> CopyStats:
+        """Copy with the fastest available strategy (reflink, in-kernel, buffered)"""
+        return copy_file(source, destination, preserve_metadata)
+    
     @staticmethod
     def safe_copy(source: Path, destination: Path) -> bool:
         """Safely copy file with error handling"""
@@ -46,8 +117,7 @@ class FileService:
             # Ensure destination directory exists
             FileService.ensure_directory(destination.parent)
             
-            shutil.copy2(source, destination)
-            return True
+            return copy_file(source, destination).success
         except Exception:
             return False
     
@@ -122,25 +192,95 @@ class FileService:
     @staticmethod
     def cleanup_temp_directory(temp_dir: Path) -> bool:
         """Clean up temporary directory"""
-        try:
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
-            return True
-        except Exception:
-            return False
+        return FileService.remove_tree(temp_dir).success
     
     @staticmethod
-    def calculate_directory_size(directory_path: Path) -> int:
-        """Calculate total size of directory"""
+    def remove_tree(directory_path: Path, progress: Optional[ProgressCallback] = None,
+                    progress_every: int = 500) -> RemovalStats:
+        """Delete a directory tree while streaming it with os.scandir
+        
+        Files are unlinked as they are listed, so memory stays flat for trees
+        of any size. ``progress(files_removed, bytes_removed)`` is called every
+        ``progress_every`` files and once at the end. Symlinks are removed,
+        never followed.
+        """
+        stats = RemovalStats()
+        root = os.fspath(directory_path)
+        
+        with metrics.span("file.remove_tree") as span:
+            # Directories are removed after their contents (reverse discovery order)
+            directories = []
+            stack = [root]
+            try:
+                if not os.path.isdir(root) or os.path.islink(root):
+                    # A file or symlink in place of the tree: remove just that entry
+                    if os.path.lexists(root):
+                        os.unlink(root)
+                        stats.files += 1
+                    stack = []
+                
+                while stack:
+                    current = stack.pop()
+                    directories.append(current)
+                    with os.scandir(current) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            size = entry.stat(follow_symlinks=False).st_size
+                            os.unlink(entry.path)
+                            stats.files += 1
+                            stats.bytes += size
+                            if progress and stats.files % progress_every == 0:
+                                progress(stats.files, stats.bytes)
+                
+                for directory in reversed(directories):
+                    os.rmdir(directory)
+                    stats.directories += 1
+            except OSError as e:
+                stats.error = str(e)
+                stats.success = False
+            
+            span.add("files_removed", stats.files)
+            span.add("bytes_removed", stats.bytes)
+        
+        if progress:
+            progress(stats.files, stats.bytes)
+        return stats
+    
+    @staticmethod
+    def calculate_directory_size(directory_path: Path, use_cache: bool = False,
+                                 max_workers: Optional[int] = None) -> int:
+        """Calculate total size of directory
+        
+        Walks the tree with os.scandir, reusing each DirEntry's stat, and
+        sizes top-level subdirectories in parallel. Symlinks are not followed.
+        With ``use_cache`` a directory whose mtime is unchanged reuses the
+        previous listing; in-place growth of existing files is not detected
+        then, as it does not change the directory mtime.
+        """
         try:
-            total_size = 0
-            for file_path in directory_path.rglob('*'):
-                if file_path.is_file():
-                    total_size += file_path.stat().st_size
+            root = os.fspath(directory_path)
+            workers = max_workers or get_config().performance.workers
+            
+            with metrics.span("file.directory_size") as span:
+                files_bytes, subdirs = _scan_directory(root, use_cache)
+                if workers > 1 and len(subdirs) > 1:
+                    with ThreadPoolExecutor(max_workers=min(workers, len(subdirs))) as pool:
+                        sizes = pool.map(lambda path: _tree_size(path, use_cache), subdirs)
+                        total_size = files_bytes + sum(sizes)
+                else:
+                    total_size = files_bytes + sum(_tree_size(path, use_cache) for path in subdirs)
+                span.add("bytes", total_size)
             return total_size
         except Exception:
             return 0
     
+    @staticmethod
+    def clear_size_cache() -> None:
+        """Forget directory listings cached by calculate_directory_size"""
+        _size_cache.clear()
+    
     @staticmethod
     def format_file_size(size_bytes: int) -> str:
         """Format file size in human-readable format"""
@@ -0,0 +1,270 @@
+"""
+Restore Service - Verified, atomic restore of any backup kind
+
+A restore streams the backup into a temporary file next to the target while
+hashing it, so the checksum recorded at backup time is verified in the same
+pass that makes the copy. Databases must pass ``PRAGMA quick_check`` and JSON
+files must parse before the temporary file replaces the target with a single
+``os.replace``; a failed check leaves the target untouched. Compressed
+(``.gz``) backups are decompressed in that same pass.
+"""
+
+import gzip
+import json
+import os
+import tarfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..core import metrics
+from ..core.backups import COMPRESSED_EXTENSION, HASH_CHUNK_SIZE, new_hash
+from .extension_service import ARCHIVE_EXTENSION, ExtensionStorage, ExtensionStorageService
+from .file_service import FileService
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+SQLITE_SIDE_FILES = ("-wal", "-shm", "-journal")
+
+
+@dataclass
+class RestoreResult:
+    """Result of a restore"""
+    success: bool
+    message: str
+    backup_path: Optional[Path] = None
+    target_path: Optional[Path] = None
+    safety_backup: Optional[Path] = None
+    kind: str = ""
+    checksum: Optional[str] = None
+    checks: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    metrics: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def is_compressed(backup_path: Path) -> bool:
+    """A single gzipped file (not a .tar.gz folder archive)"""
+    name = backup_path.name
+    return name.endswith(COMPRESSED_EXTENSION) and not name.endswith(ARCHIVE_EXTENSION)
+
+
+def detect_kind(backup_path: Path) -> str:
+    """'archive', 'database', 'json' or 'file'"""
+    if backup_path.name.endswith(ARCHIVE_EXTENSION):
+        return "archive"
+    opener = gzip.open if is_compressed(backup_path) else open
+    with opener(backup_path, "rb") as f:
+        if f.read(len(SQLITE_HEADER)) == SQLITE_HEADER:
+            return "database"
+    if ".json." in backup_path.name:
+        return "json"
+    return "file"
+
+
+def quick_check(db_path: Path) -> Optional[str]:
+    """None if ``PRAGMA quick_check`` passes, otherwise the first problem reported"""
+    import sqlite3  # deferred: only database restores need it
+
+    connection = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        rows = connection.execute("PRAGMA quick_check").fetchall()
+    finally:
+        connection.close()
+    problems = [row[0] for row in rows if row[0] != "ok"]
+    return problems[0] if problems else None
+
+
+class _HashingReader:
+    """File wrapper hashing everything read through it"""
+
+    def __init__(self, raw, digest):
+        self.raw = raw
+        self.digest = digest
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.digest.update(data)
+        return data
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist a rename on POSIX; directories cannot be opened this way on Windows"""
+    if os.name != "posix":
+        return
+    try:
+        fd = os.open(str(directory), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+class RestoreService:
+    """Restores backups over their original files or directories"""
+
+    def __init__(self, backup_suffix: Optional[str] = None):
+        self.backup_suffix = backup_suffix
+
+    def restore(self, backup_path: Path, target_path: Path,
+                expected_checksum: Optional[str] = None) -> RestoreResult:
+        """Verify ``backup_path`` and atomically put it in place of ``target_path``"""
+        backup_path, target_path = Path(backup_path), Path(target_path)
+        result = RestoreResult(success=False, message="", backup_path=backup_path, target_path=target_path)
+
+        if not backup_path.is_file():
+            result.message = f"Backup file not found: {backup_path}"
+            return result
+
+        with metrics.collect() as spans:
+            try:
+                result.kind = detect_kind(backup_path)
+                if result.kind == "archive":
+                    self._restore_archive(backup_path, target_path, expected_checksum, result)
+                else:
+                    self._restore_file(backup_path, target_path, expected_checksum, result)
+            except Exception as e:
+                result.success = False
+                result.message = f"Failed to restore {target_path.name}"
+                result.error = str(e)
+        result.metrics = spans
+        return result
+
+    def _copy_verified(self, backup_path: Path, temp_path: Path,
+                       expected_checksum: Optional[str], result: RestoreResult) -> bool:
+        """Copy and hash in one streaming pass, then compare with the recorded checksum
+
+        The checksum covers the stored bytes, so a compressed backup is hashed
+        as it is read and decompressed on the way to ``temp_path``.
+        """
+        digest = new_hash()
+        with metrics.span("restore.copy") as span:
+            with open(backup_path, "rb") as raw, open(temp_path, "wb") as destination:
+                source = _HashingReader(raw, digest)
+                if is_compressed(backup_path) and result.kind != "archive":
+                    source = gzip.GzipFile(fileobj=source, mode="rb")
+                try:
+                    for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+                        destination.write(chunk)
+                        span.add("bytes_copied", len(chunk))
+                except (OSError, EOFError):
+                    # Undecodable: report a checksum mismatch rather than the gzip error if that is the cause
+                    for chunk in iter(lambda: raw.read(HASH_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                    if expected_checksum is None or digest.hexdigest() == expected_checksum:
+                        raise
+                destination.flush()
+                os.fsync(destination.fileno())
+
+        result.checksum = digest.hexdigest()
+        if expected_checksum is None:
+            result.checks.append("checksum: not recorded")
+            return True
+        if result.checksum != expected_checksum:
+            result.message = f"Checksum mismatch: {backup_path.name} changed since it was created"
+            result.error = f"expected {expected_checksum}, got {result.checksum}"
+            return False
+        result.checks.append("checksum: ok")
+        return True
+
+    def _validate(self, temp_path: Path, kind: str, result: RestoreResult) -> bool:
+        """Content checks on the restored copy before it replaces the target"""
+        with metrics.span("restore.validate", kind=kind):
+            if kind == "database":
+                problem = quick_check(temp_path)
+                if problem:
+                    result.message = "Backup database failed PRAGMA quick_check"
+                    result.error = problem
+                    return False
+                result.checks.append("quick_check: ok")
+            elif kind == "json":
+                try:
+                    with open(temp_path, "r", encoding="utf-8") as f:
+                        json.load(f)
+                except ValueError as e:
+                    result.message = "Backup is not valid JSON"
+                    result.error = str(e)
+                    return False
+                result.checks.append("json: ok")
+        return True
+
+    def _restore_file(self, backup_path: Path, target_path: Path,
+                      expected_checksum: Optional[str], result: RestoreResult) -> None:
+        FileService.ensure_directory(target_path.parent)
+        temp_path = target_path.with_name(f".{target_path.name}.restore-{os.getpid()}.tmp")
+        try:
+            if not self._copy_verified(backup_path, temp_path, expected_checksum, result):
+                return
+            if not self._validate(temp_path, result.kind, result):
+                return
+
+            # Keep the current file so the restore itself can be undone
+            if target_path.exists():
+                result.safety_backup = FileService.create_backup(target_path, self.backup_suffix)
+                if result.safety_backup is None:
+                    result.message = f"Failed to back up current {target_path.name} before restore"
+                    return
+
+            with metrics.span("restore.swap"):
+                if result.kind == "database":
+                    # A leftover WAL or journal would be replayed into the restored database
+                    for side_suffix in SQLITE_SIDE_FILES:
+                        FileService.safe_delete(target_path.with_name(target_path.name + side_suffix))
+                os.replace(temp_path, target_path)
+                _fsync_directory(target_path.parent)
+        finally:
+            for side_suffix in ("",) + SQLITE_SIDE_FILES:
+                FileService.safe_delete(temp_path.with_name(temp_path.name + side_suffix))
+
+        result.success = True
+        result.message = f"Restored {target_path.name} from {backup_path.name}"
+
+    def _restore_archive(self, backup_path: Path, target_path: Path,
+                         expected_checksum: Optional[str], result: RestoreResult) -> None:
+        parent = target_path.parent
+        temp_archive = parent / f".{target_path.name}.restore-{os.getpid()}.tar.gz"
+        temp_dir = parent / f".{target_path.name}.restore-{os.getpid()}"
+        old_dir = parent / f".{target_path.name}.replaced-{os.getpid()}"
+        try:
+            if not self._copy_verified(backup_path, temp_archive, expected_checksum, result):
+                return
+
+            with metrics.span("restore.extract"):
+                with tarfile.open(temp_archive, "r:gz") as archive:
+                    members = archive.getmembers()
+                    # Archives hold exactly one top-level folder and nothing that escapes it
+                    tops = {Path(member.name).parts[0] for member in members if member.name}
+                    if len(tops) != 1:
+                        raise tarfile.TarError("archive must contain a single folder")
+                    for member in members:
+                        if member.issym() or member.islnk() or member.name.startswith("/") \
+                                or ".." in Path(member.name).parts:
+                            raise tarfile.TarError(f"unsafe archive member {member.name!r}")
+                    temp_dir.mkdir()
+                    if hasattr(tarfile, "data_filter"):
+                        archive.extractall(temp_dir, members=members, filter="data")
+                    else:
+                        archive.extractall(temp_dir, members=members)
+            result.checks.append("archive: ok")
+            extracted = temp_dir / tops.pop()
+
+            if target_path.exists():
+                service = ExtensionStorageService(parent, backup_suffix=self.backup_suffix)
+                result.safety_backup = service.archive(ExtensionStorage(target_path.name, target_path))
+                if result.safety_backup is None:
+                    result.message = f"Failed to archive current {target_path.name} before restore"
+                    return
+
+            # Two renames: the target is briefly absent but never half-written
+            with metrics.span("restore.swap"):
+                if target_path.exists():
+                    os.replace(target_path, old_dir)
+                os.replace(extracted, target_path)
+                _fsync_directory(parent)
+        finally:
+            FileService.safe_delete(temp_archive)
+            FileService.remove_tree(temp_dir)
+            FileService.remove_tree(old_dir)
+
+        result.success = True
+        result.message = f"Restored {target_path.name} from {backup_path.name}"
@@ -0,0 +1,398 @@
+"""
+Search Service - Full-text search over ItemTable keys and values
+
+Searching never touches ``state.vscdb`` beyond reading it. Each database gets
+a side index in the cache directory holding its keys and value sizes (never
+the values: they hold session data and secrets, and the cache outlives a
+clean) and two FTS5 indexes over the keys: a trigram index that answers
+substring queries and a unicode61 index for token queries (FTS5 syntax:
+``augment AND chat``, ``augm*``). Values are searched in place by a linear
+scan of the database itself, reading the first ``[search] value_limit_kb`` of
+each.
+
+The index records the file signature of the database it was built from and
+is only brought up to date when that changes. The first build bulk-loads the
+keys and builds both indexes in one pass; later updates merge-join the
+database against the stored keys in key order and apply only the keys that
+were added, removed or changed in size, in the same transaction as the new
+signature. Deleted content is overwritten (``secure_delete``), and cleans
+drop the index of every database they modify.
+"""
+
+import hashlib
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from ..core import metrics
+from ..core.config import get_config
+from .diagnostics_service import file_signature
+
+if TYPE_CHECKING:
+    import sqlite3
+
+INDEX_DIRECTORY = "search"
+INDEX_VERSION = 2
+
+SUBSTRING = "substring"
+TOKEN = "token"
+MODES = (SUBSTRING, TOKEN)
+SCOPES = ("all", "key", "value")
+
+# Trigram queries need at least one full trigram; shorter text is matched with LIKE
+MIN_TRIGRAM_QUERY = 3
+
+_SCHEMA = """
+CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE entries (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, size INTEGER NOT NULL);
+CREATE VIRTUAL TABLE tokens USING fts5(key, content='entries', content_rowid='id');
+"""
+_TRIGRAM_SCHEMA = (
+    "CREATE VIRTUAL TABLE trigrams USING fts5(key, content='entries', content_rowid='id', "
+    "tokenize='trigram')"
+)
+
+
+@dataclass
+class SearchHit:
+    """A key whose key or value matched, and the size of its value in bytes"""
+    key: str
+    size: int
+
+
+@dataclass
+class IndexStats:
+    """What bringing an index up to date involved"""
+    index_path: Optional[Path] = None
+    rows: int = 0
+    added: int = 0
+    removed: int = 0
+    changed: int = 0
+    rebuilt: bool = False
+    up_to_date: bool = False
+    duration: float = 0.0
+
+
+@dataclass
+class SearchResult:
+    """Result of a search"""
+    success: bool
+    message: str
+    query: str = ""
+    mode: str = SUBSTRING
+    scope: str = "all"
+    hits: List[SearchHit] = field(default_factory=list)
+    truncated: bool = False
+    index: Optional[IndexStats] = None
+    duration: float = 0.0
+    error: Optional[str] = None
+    metrics: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _phrase(text: str) -> str:
+    """``text`` as one FTS5 string (a phrase of consecutive tokens or trigrams)"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _like(text: str) -> str:
+    """LIKE pattern matching ``text`` anywhere (escape character: backslash)"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class SearchService:
+    """Maintains side FTS5 indexes of state databases and queries them"""
+
+    def __init__(self, cache_dir: Optional[Path] = None, table: Optional[str] = None):
+        config = get_config()
+        self.index_dir = Path(cache_dir or config.cache.path) / INDEX_DIRECTORY
+        self.table = table or config.operations.database_table
+
+    def index_path(self, db_path: Path) -> Path:
+        """Side index file for ``db_path`` (one per database, named after its resolved path)"""
+        digest = hashlib.sha1(str(Path(db_path).resolve()).encode("utf-8")).hexdigest()[:16]
+        return self.index_dir / f"{digest}.sqlite"
+
+    def drop_index(self, db_path: Path) -> bool:
+        """Delete the index of ``db_path`` (and its WAL files); whether there was one"""
+        index_path = self.index_path(db_path)
+        dropped = False
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(f"{index_path}{suffix}")
+                dropped = True
+            except OSError:
+                pass
+        return dropped
+
+    def _value_limit(self) -> int:
+        return get_config().search.value_limit_kb * 1024
+
+    def _connect(self, index_path: Path) -> "sqlite3.Connection":
+        import sqlite3  # deferred until an index is used
+
+        connection = sqlite3.connect(str(index_path), timeout=30)
+        # A cache: losing the last transactions on a crash only means re-indexing them
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")
+        # Removed keys are zeroed, not left behind in free pages
+        connection.execute("PRAGMA secure_delete=ON")
+        return connection
+
+    def _meta(self, connection: "sqlite3.Connection") -> Dict[str, str]:
+        try:
+            return dict(connection.execute("SELECT name, value FROM meta"))
+        except Exception:
+            return {}
+
+    def _open_source(self, db_path: Path) -> "sqlite3.Connection":
+        import sqlite3
+
+        return sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+
+    def _source_rows(self, db_path: Path, batch_size: int) -> Iterator[Tuple[str, int]]:
+        """(key, value size in bytes) for every row of the database, in key order"""
+        connection = self._open_source(db_path)
+        try:
+            cursor = connection.execute(
+                f'SELECT key, COALESCE(length(CAST(value AS BLOB)), 0) FROM "{self.table}" ORDER BY key'
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for key, size in rows:
+                    yield str(key), size
+        finally:
+            connection.close()
+
+    def update_index(self, db_path: Path, rebuild: bool = False) -> IndexStats:
+        """Bring the index of ``db_path`` up to date (a no-op when the database has not changed)"""
+        db_path = Path(db_path)
+        index_path = self.index_path(db_path)
+        stats = IndexStats(index_path=index_path)
+        started = time.perf_counter()
+        signature = file_signature(db_path)
+        settings = {"version": str(INDEX_VERSION), "source": str(db_path.resolve())}
+
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connect(index_path)
+        try:
+            meta = self._meta(connection)
+            compatible = bool(meta) and all(meta.get(name) == value for name, value in settings.items())
+            if compatible and not rebuild and meta.get("signature") == signature:
+                stats.up_to_date = True
+                stats.rows = int(meta.get("rows", 0))
+            elif compatible and not rebuild:
+                self._merge(connection, index_path, db_path, signature, stats)
+            else:
+                connection.close()
+                connection = self._build(index_path, db_path, dict(settings, signature=signature), stats)
+        finally:
+            connection.close()
+        stats.duration = time.perf_counter() - started
+        return stats
+
+    def _finish(self, connection: "sqlite3.Connection", signature: str, stats: IndexStats) -> None:
+        """Record the signature and row count (inside the transaction that made them true)"""
+        stats.rows = connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        connection.executemany(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+            [("signature", signature), ("rows", str(stats.rows))]
+        )
+
+    def _build(self, index_path: Path, db_path: Path, settings: Dict[str, str],
+               stats: IndexStats) -> "sqlite3.Connection":
+        """Create the index from scratch: bulk-load the keys, then build the FTS indexes in one pass"""
+        self.drop_index(db_path)
+
+        connection = self._connect(index_path)
+        batch_size = get_config().performance.batch_size
+        with metrics.span("search.build") as span:
+            connection.executescript(_SCHEMA)
+            try:
+                connection.execute(_TRIGRAM_SCHEMA)
+                trigram = True
+            except Exception:
+                # The trigram tokenizer needs SQLite 3.34; substring queries fall back to LIKE
+                trigram = False
+            with connection:
+                connection.executemany(
+                    "INSERT INTO entries (key, size) VALUES (?, ?)",
+                    self._source_rows(db_path, batch_size)
+                )
+                for table in ("tokens", "trigrams") if trigram else ("tokens",):
+                    # No incremental segment merging while the whole table is loaded
+                    # (about 40% faster); restored for the trigger-driven updates
+                    connection.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('automerge', 0)")
+                    connection.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+                    connection.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('automerge', 4)")
+                self._create_triggers(connection, trigram)
+                connection.executemany(
+                    "INSERT INTO meta (name, value) VALUES (?, ?)",
+                    [(name, value) for name, value in settings.items() if name != "signature"]
+                    + [("trigram", "1" if trigram else "0")]
+                )
+                self._finish(connection, settings["signature"], stats)
+            stats.added = stats.rows
+            stats.rebuilt = True
+            span.add("rows_indexed", stats.rows)
+        return connection
+
+    def _create_triggers(self, connection: "sqlite3.Connection", trigram: bool) -> None:
+        """Keep the FTS indexes in step with ``entries`` (used by incremental updates)"""
+        for table in ("tokens", "trigrams") if trigram else ("tokens",):
+            connection.executescript(f"""
+                CREATE TRIGGER {table}_insert AFTER INSERT ON entries BEGIN
+                    INSERT INTO {table} (rowid, key) VALUES (new.id, new.key);
+                END;
+                CREATE TRIGGER {table}_delete AFTER DELETE ON entries BEGIN
+                    INSERT INTO {table} ({table}, rowid, key) VALUES ('delete', old.id, old.key);
+                END;
+            """)
+
+    def _merge(self, connection: "sqlite3.Connection", index_path: Path, db_path: Path, signature: str,
+               stats: IndexStats) -> None:
+        """Apply the keys that differ (or whose value size differs) between the database and the stored rows"""
+        batch_size = get_config().performance.batch_size
+        # The stored rows are read through a second connection: in WAL mode it keeps
+        # seeing them as they were while the first one writes the changes
+        reader = self._connect(index_path)
+        try:
+            with metrics.span("search.update") as span:
+                reader.execute("BEGIN")
+                cursor = reader.execute("SELECT id, key, size FROM entries ORDER BY key")
+
+                def stored() -> Iterator[Tuple[int, str, int]]:
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            return
+                        yield from rows
+
+                source_rows, index_rows = self._source_rows(db_path, batch_size), stored()
+                source, entry = next(source_rows, None), next(index_rows, None)
+                with connection:
+                    while source is not None or entry is not None:
+                        if entry is None or (source is not None and source[0] < entry[1]):
+                            connection.execute("INSERT INTO entries (key, size) VALUES (?, ?)", source)
+                            stats.added += 1
+                            source = next(source_rows, None)
+                        elif source is None or entry[1] < source[0]:
+                            connection.execute("DELETE FROM entries WHERE id = ?", (entry[0],))
+                            stats.removed += 1
+                            entry = next(index_rows, None)
+                        else:
+                            if source[1] != entry[2]:
+                                # Only the size is stored, and no FTS column depends on it
+                                connection.execute("UPDATE entries SET size = ? WHERE id = ?", (source[1], entry[0]))
+                                stats.changed += 1
+                            source, entry = next(source_rows, None), next(index_rows, None)
+                    self._finish(connection, signature, stats)
+                reader.execute("COMMIT")
+                span.add("rows_added", stats.added)
+                span.add("rows_removed", stats.removed)
+                span.add("rows_changed", stats.changed)
+        finally:
+            reader.close()
+
+    def search(self, db_path: Path, query: str, mode: str = SUBSTRING, scope: str = "all",
+               limit: Optional[int] = None, rebuild: bool = False) -> SearchResult:
+        """Keys of ``db_path`` whose key, value or either (``scope``) match ``query``
+
+        ``substring`` finds ``query`` anywhere (case-insensitive); ``token``
+        takes an FTS5 query over the words of keys (values are not tokenized).
+        The index is brought up to date first.
+        """
+        limit = limit or get_config().search.result_limit
+        result = SearchResult(success=False, message="", query=query, mode=mode, scope=scope)
+        if mode not in MODES or scope not in SCOPES:
+            result.message = "Invalid search options"
+            result.error = f"mode must be one of {MODES} and scope one of {SCOPES}"
+            return result
+        if mode == TOKEN and scope == "value":
+            result.message = "Invalid search options"
+            result.error = "Token queries match keys only; search values with a substring"
+            return result
+        if not query.strip():
+            result.message = "Nothing to search for"
+            result.error = "Empty query"
+            return result
+
+        started = time.perf_counter()
+        with metrics.collect() as spans:
+            try:
+                result.index = self.update_index(Path(db_path), rebuild=rebuild)
+                rows: List[Tuple[str, int]] = []
+                if scope != "value":
+                    connection = self._connect(result.index.index_path)
+                    try:
+                        with metrics.span("search.query", mode=mode) as span:
+                            rows = self._query(connection, query, mode, limit + 1)
+                            span.add("hits", len(rows))
+                    finally:
+                        connection.close()
+                if scope != "key" and mode == SUBSTRING:
+                    value_limit_kb = get_config().search.value_limit_kb
+                    with metrics.span("search.values", value_limit_kb=value_limit_kb) as span:
+                        values = self._query_values(Path(db_path), query, limit + 1)
+                        span.add("hits", len(values))
+                    rows = sorted(dict(rows + values).items())[:limit + 1]
+                result.truncated = len(rows) > limit
+                result.hits = [SearchHit(key, size) for key, size in rows[:limit]]
+                result.success = True
+                result.message = (
+                    f"{len(result.hits)} matching key{'' if len(result.hits) == 1 else 's'}"
+                    + (" (more not shown)" if result.truncated else "")
+                )
+            except Exception as e:
+                message = str(e)
+                if "no such module" in message:
+                    result.message = "SQLite was built without FTS5"
+                elif "fts5" in message or "syntax error" in message:
+                    result.message = "Invalid search query"
+                else:
+                    result.message = "Search failed"
+                result.error = message
+        result.metrics = spans
+        result.duration = time.perf_counter() - started
+        return result
+
+    def _query(self, connection: "sqlite3.Connection", query: str, mode: str,
+               limit: int) -> List[Tuple[str, int]]:
+        """Matching keys from the index"""
+        if mode == TOKEN:
+            return connection.execute(
+                "SELECT entries.key, entries.size FROM tokens JOIN entries ON entries.id = tokens.rowid "
+                "WHERE tokens MATCH ? ORDER BY rank LIMIT ?",
+                (query, limit)
+            ).fetchall()
+
+        if len(query) >= MIN_TRIGRAM_QUERY and self._meta(connection).get("trigram") == "1":
+            return connection.execute(
+                "SELECT entries.key, entries.size FROM trigrams JOIN entries ON entries.id = trigrams.rowid "
+                "WHERE trigrams MATCH ? ORDER BY entries.key LIMIT ?",
+                (_phrase(query), limit)
+            ).fetchall()
+
+        return connection.execute(
+            "SELECT key, size FROM entries WHERE key LIKE ? ESCAPE '\\' ORDER BY key LIMIT ?",
+            (_like(query), limit)
+        ).fetchall()
+
+    def _query_values(self, db_path: Path, query: str, limit: int) -> List[Tuple[str, int]]:
+        """Keys whose value contains ``query``, read from the database itself (read-only)"""
+        value_limit = self._value_limit()
+        # As BLOB and back: substr then counts bytes, and values that are not valid UTF-8 still match
+        text = f"CAST(substr(CAST(value AS BLOB), 1, {value_limit}) AS TEXT)" if value_limit else "CAST(value AS TEXT)"
+        connection = self._open_source(db_path)
+        try:
+            return connection.execute(
+                f'SELECT key, COALESCE(length(CAST(value AS BLOB)), 0) FROM "{self.table}" '
+                f"WHERE {text} LIKE ? ESCAPE '\\' ORDER BY key LIMIT ?",
+                (_like(query), limit)
+            ).fetchall()
+        finally:
+            connection.close()
@@ -5,23 +5,38 @@ VS Code Service - High-level VS Code operations
 import subprocess
 import platform
 import time
-import psutil
-from typing import Dict, Any, List, Optional
+from dataclasses import asdict
+from typing import Callable, Dict, Any, List, Optional
 from pathlib import Path
 
+from ..core import metrics
+from ..core.backups import source_name
+from ..core.config import get_config
 from ..models.vscode_model import VSCodeModel
 from ..models.database_model import DatabaseModel, DatabaseOperationResult
 from ..models.telemetry_model import TelemetryModel, TelemetryOperationResult
-from .file_service import FileService
+from .file_service import ProgressCallback
+from .restore_service import RestoreService, RestoreResult
+from .diff_service import DiffService, DiffResult, KeyChange
+from .diagnostics_service import DiagnosticsService, DatabaseDiagnostics, DiagnosticsCallback
+from .search_service import SearchService, SearchResult, SUBSTRING
+from .backup_service import BackupService, RetentionPolicy, RetentionResult, wait_for_background
+from .extension_service import ExtensionStorageService, ExtensionCleanResult
+from .workspace_service import WorkspaceService, WorkspaceCleanSummary, StalePruneResult
 
 
 class VSCodeService:
     """Service for high-level VS Code operations"""
     
-    def __init__(self):
-        self.vscode_model = VSCodeModel()
+    def __init__(self, user_data_dir: Optional[Path] = None):
+        self.vscode_model = VSCodeModel(user_data_dir)
         self._database_model: Optional[DatabaseModel] = None
         self._telemetry_model: Optional[TelemetryModel] = None
+        self._backup_service: Optional[BackupService] = None
+        self._workspace_service: Optional[WorkspaceService] = None
+        self._extension_service: Optional[ExtensionStorageService] = None
+        self._diagnostics_service: Optional[DiagnosticsService] = None
+        self._search_service: Optional[SearchService] = None
     
     @property
     def database_model(self) -> Optional[DatabaseModel]:
@@ -37,6 +52,41 @@ class VSCodeService:
             self._telemetry_model = TelemetryModel(self.vscode_model.paths.storage_json)
         return self._telemetry_model
     
+    @property
+    def backup_service(self) -> Optional[BackupService]:
+        """Get backup index for the directory the backups are written to"""
+        if self._backup_service is None and self.vscode_model.paths:
+            self._backup_service = BackupService(self.vscode_model.paths.state_db.parent)
+        return self._backup_service
+    
+    @property
+    def workspace_service(self) -> Optional[WorkspaceService]:
+        """Get service for the per-workspace state databases"""
+        if self._workspace_service is None and self.vscode_model.paths:
+            self._workspace_service = WorkspaceService(self.vscode_model.paths.workspace_storage)
+        return self._workspace_service
+    
+    @property
+    def extension_service(self) -> Optional[ExtensionStorageService]:
+        """Get service for extension storage folders in globalStorage"""
+        if self._extension_service is None and self.vscode_model.paths:
+            self._extension_service = ExtensionStorageService(self.vscode_model.paths.state_db.parent)
+        return self._extension_service
+    
+    @property
+    def diagnostics_service(self) -> DiagnosticsService:
+        """Get service for database diagnostics (its cache is shared by all databases)"""
+        if self._diagnostics_service is None:
+            self._diagnostics_service = DiagnosticsService()
+        return self._diagnostics_service
+    
+    @property
+    def search_service(self) -> SearchService:
+        """Get service for full-text search (indexes live in the cache directory)"""
+        if self._search_service is None:
+            self._search_service = SearchService()
+        return self._search_service
+    
     def get_installation_status(self) -> Dict[str, Any]:
         """Get comprehensive VS Code installation status"""
         base_status = self.vscode_model.get_detailed_info()
@@ -105,7 +155,13 @@ class VSCodeService:
                 error="VS Code database file does not exist"
             )
         
-        return self.database_model.remove_augment_entries()
+        with metrics.collect() as spans:
+            result = self.database_model.remove_augment_entries()
+            self._after_backup(result.backup_path, wal=asdict(result.wal) if result.wal else None)
+            if result.backup_path:
+                self.search_service.drop_index(self.database_model.db_path)
+        result.metrics = spans
+        return result
     
     def modify_telemetry_ids(self) -> TelemetryOperationResult:
         """Modify VS Code telemetry IDs"""
@@ -123,7 +179,74 @@ class VSCodeService:
                 error="VS Code storage.json file does not exist"
             )
         
-        return self.telemetry_model.update_telemetry_ids()
+        with metrics.collect() as spans:
+            result = self.telemetry_model.update_telemetry_ids()
+            self._after_backup(result.backup_path)
+        result.metrics = spans
+        return result
+    
+    def clean_workspaces(self) -> WorkspaceCleanSummary:
+        """Clean Augment entries from every workspace database"""
+        if not self.workspace_service:
+            return WorkspaceCleanSummary(success=False, message="Workspace storage not available")
+        
+        summary = self.workspace_service.clean_all()
+        for result in summary.results:
+            # A backup means the clean went ahead and may have changed the database
+            if result.backup_path:
+                self.search_service.drop_index(result.db_path)
+        return summary
+    
+    def prune_stale_workspaces(self, dry_run: bool = True) -> StalePruneResult:
+        """Find (and unless ``dry_run``, remove) workspace folders for projects that no longer exist"""
+        if not self.workspace_service:
+            return StalePruneResult(success=False, message="Workspace storage not available", dry_run=dry_run)
+        
+        return self.workspace_service.prune_stale(dry_run=dry_run)
+    
+    def clean_extension_storage(self, archive: Optional[bool] = None,
+                                progress: Optional[ProgressCallback] = None) -> ExtensionCleanResult:
+        """Remove Augment extension storage folders, archiving them as backups"""
+        if not self.extension_service:
+            return ExtensionCleanResult(success=False, message="Extension storage not available")
+        
+        result = self.extension_service.clean(archive=archive, progress=progress)
+        for archive_path in result.archives:
+            self._after_backup(archive_path)
+        return result
+    
+    def diagnose_database(self, db_path: Optional[Path] = None, use_cache: bool = True,
+                          on_progress: Optional[DiagnosticsCallback] = None) -> DatabaseDiagnostics:
+        """Integrity and space usage of the global state database (or ``db_path``)"""
+        if db_path is None:
+            if not self.database_model or not self.database_model.exists:
+                return DatabaseDiagnostics(db_path="", signature="", error="Database not available")
+            db_path = self.database_model.db_path
+        
+        return self.diagnostics_service.run(Path(db_path), on_progress=on_progress, use_cache=use_cache)
+    
+    def diff_databases(self, old_path: Path, new_path: Optional[Path] = None, max_changes: Optional[int] = 1000,
+                       on_change: Optional[Callable[[KeyChange], None]] = None) -> DiffResult:
+        """Keys added, removed and changed from ``old_path`` (e.g. a backup) to ``new_path`` (the live database)"""
+        if new_path is None:
+            if not self.database_model or not self.database_model.exists:
+                return DiffResult(success=False, message="Database not available")
+            new_path = self.database_model.db_path
+        
+        old_path = Path(old_path)
+        if self.backup_service:
+            old_path = self.backup_service.locate(old_path)
+        return DiffService().diff(old_path, Path(new_path), max_changes=max_changes, on_change=on_change)
+    
+    def search_database(self, query: str, mode: str = SUBSTRING, scope: str = "all", limit: Optional[int] = None,
+                        db_path: Optional[Path] = None, rebuild: bool = False) -> SearchResult:
+        """Keys of the global state database (or ``db_path``) whose key or value matches ``query``"""
+        if db_path is None:
+            if not self.database_model or not self.database_model.exists:
+                return SearchResult(success=False, message="Database not available", query=query, mode=mode)
+            db_path = self.database_model.db_path
+        
+        return self.search_service.search(Path(db_path), query, mode=mode, scope=scope, limit=limit, rebuild=rebuild)
     
     def run_all_operations(self) -> Dict[str, Any]:
         """Run both database cleaning and telemetry ID modification"""
@@ -164,45 +287,90 @@ class VSCodeService:
         self.vscode_model.refresh_status()
         self._database_model = None
         self._telemetry_model = None
+        self._backup_service = None
+        self._workspace_service = None
+        self._extension_service = None
     
     def get_backup_files(self) -> List[Dict[str, Any]]:
-        """Get list of backup files created"""
-        backup_files = []
+        """Get list of backup files created, newest first"""
+        if not self.backup_service:
+            return []
         
-        if self.vscode_model.paths:
-            base_dir = self.vscode_model.paths.user_data / "globalStorage"
-            
-            # Look for backup files
-            for backup_file in base_dir.glob("*.backup*"):
-                file_info = FileService.get_file_info(backup_file)
-                if file_info["exists"]:
-                    backup_files.append(file_info)
-        
-        return backup_files
+        directory = self.backup_service.backup_dir
+        return [record.to_info(directory) for record in self.backup_service.list_backups()]
     
-    def cleanup_old_backups(self, keep_count: int = 5) -> int:
-        """Clean up old backup files, keeping the most recent ones"""
-        if not self.vscode_model.paths:
-            return 0
-        
-        backup_files = self.get_backup_files()
-        if len(backup_files) <= keep_count:
-            return 0
-        
-        # Sort by modification time, newest first
-        backup_files.sort(key=lambda x: x["modified"], reverse=True)
-        
-        # Remove old backups
-        removed_count = 0
-        for backup_info in backup_files[keep_count:]:
-            if FileService.safe_delete(Path(backup_info["path"])):
-                removed_count += 1
+    def cleanup_old_backups(self, keep_count: Optional[int] = None) -> int:
+        """Clean up old backup files, keeping the ``keep_count`` most recent across all files
+
+        Unlike the configured policy this counts globally (``per_source=False``);
+        the newest backup of each file is still kept.
+        """
+        if keep_count is None:
+            keep_count = get_config().operations.max_backup_files
+        result = self.prune_backups(RetentionPolicy(keep_count=keep_count, per_source=False))
+        return len(result.removed)
+    
+    def prune_backups(self, policy: Optional[RetentionPolicy] = None) -> RetentionResult:
+        """Apply a retention policy (the configured one by default) to the backups"""
+        if not self.backup_service:
+            return RetentionResult(success=False, message="Backup directory not available")
+        return self.backup_service.prune(policy)
+    
+    def _after_backup(self, backup_path: Optional[Path], wal: Optional[Dict[str, Any]] = None) -> None:
+        """Index a new backup snapshot, queue its second phase and apply the retention policy"""
+        if not backup_path or not self.backup_service:
+            return
+        if Path(backup_path).parent != self.backup_service.backup_dir:
+            return
         
-        return removed_count
+        self.backup_service.register_snapshot(backup_path, wal=wal)
+        if get_config().retention.auto_prune:
+            self.backup_service.prune()
+        # Also picks up snapshots left pending by an earlier run
+        self.backup_service.schedule_finalize()
+    
+    def wait_for_backups(self, timeout: Optional[float] = None) -> bool:
+        """Wait for background backup checksumming and compression to finish"""
+        return wait_for_background(timeout)
+
+    def resolve_backup_target(self, backup_path: Path) -> Optional[Path]:
+        """Map a backup back to the file or folder it was taken from (it sits next to it)"""
+        original_name = source_name(backup_path.name, get_config().operations.backup_suffix)
+        if original_name is None:
+            return None
+        return backup_path.parent / original_name
+
+    def restore_backup(self, backup_path: Path, target_path: Optional[Path] = None) -> RestoreResult:
+        """Verify a backup and atomically restore it over the file it was created from"""
+        backup_path = Path(backup_path)
+        if self.backup_service:
+            backup_path = self.backup_service.locate(backup_path)
+        target = Path(target_path) if target_path else self.resolve_backup_target(backup_path)
+        if target is None:
+            return RestoreResult(
+                success=False,
+                message=f"Cannot determine restore target for {backup_path.name}",
+                backup_path=backup_path
+            )
+
+        # Checksum recorded when the backup was indexed, if it was
+        expected_checksum = None
+        if self.backup_service and backup_path.parent == self.backup_service.backup_dir:
+            record = self.backup_service.get(backup_path.name)
+            expected_checksum = record.checksum if record else None
+
+        result = RestoreService().restore(backup_path, target, expected_checksum)
+
+        # Prune only after the restore so the backup being restored cannot be removed first
+        if result.success and result.safety_backup:
+            self._after_backup(result.safety_backup)
+        return result
 
     def is_vscode_running(self) -> bool:
         """Check if VS Code is currently running"""
         try:
+            import psutil  # deferred: only process management needs it
+            
             system = platform.system().lower()
             
             for proc in psutil.process_iter(['pid', 'name', 'exe']):
@@ -240,7 +408,27 @@ class VSCodeService:
     
     def close_vscode(self) -> bool:
         """Close all VS Code processes"""
+        closed_processes = self.terminate_vscode()
+        
+        # Wait for processes to close
+        if closed_processes:
+            with metrics.span("vscode.wait", reason="close"):
+                time.sleep(self.close_wait_seconds())
+        
+        return len(closed_processes) > 0
+    
+    @staticmethod
+    def close_wait_seconds() -> float:
+        """How long closed VS Code processes are given to shut down"""
+        # macOS apps take a little longer to shut down
+        wait_seconds = get_config().operations.close_wait_seconds
+        return wait_seconds + 1 if platform.system().lower() == "darwin" else wait_seconds
+    
+    def terminate_vscode(self) -> List[int]:
+        """Ask every VS Code process to exit (without waiting); the pids signalled"""
         try:
+            import psutil  # deferred: only process management needs it
+            
             system = platform.system().lower()
             closed_processes = []
             
@@ -284,13 +472,9 @@ class VSCodeService:
                         except:
                             pass
             
-            # Wait for processes to close
-            if closed_processes:
-                time.sleep(3 if system == "darwin" else 2)
-                
-            return len(closed_processes) > 0
+            return closed_processes
         except Exception:
-            return False
+            return []
     
     def start_vscode(self, workspace_path: Optional[str] = None) -> bool:
         """Start VS Code with optional workspace"""
@@ -338,23 +522,34 @@ class VSCodeService:
             "message": "",
             "was_running": False,
             "closed_successfully": False,
-            "started_successfully": False
+            "started_successfully": False,
+            "metrics": []
         }
         
+        with metrics.collect() as spans:
+            result["metrics"] = spans
+            return self._restart_vscode(result, workspace_path)
+    
+    def _restart_vscode(self, result: Dict[str, Any], workspace_path: Optional[str]) -> Dict[str, Any]:
+        """Restart steps, each recorded as a metrics span"""
         try:
             # Check if VS Code was running
-            result["was_running"] = self.is_vscode_running()
+            with metrics.span("vscode.detect"):
+                result["was_running"] = self.is_vscode_running()
             
             if result["was_running"]:
                 # Close VS Code
-                result["closed_successfully"] = self.close_vscode()
+                with metrics.span("vscode.close"):
+                    result["closed_successfully"] = self.close_vscode()
                 
                 if result["closed_successfully"]:
                     # Wait a bit for cleanup
-                    time.sleep(3)
+                    with metrics.span("vscode.wait", reason="cleanup"):
+                        time.sleep(get_config().operations.restart_delay_seconds)
                     
                     # Start VS Code again
-                    result["started_successfully"] = self.start_vscode(workspace_path)
+                    with metrics.span("vscode.start"):
+                        result["started_successfully"] = self.start_vscode(workspace_path)
                     
                     if result["started_successfully"]:
                         result["success"] = True
@@ -365,7 +560,8 @@ class VSCodeService:
                     result["message"] = "Failed to close VS Code processes"
             else:
                 # VS Code wasn't running, just try to start it
-                result["started_successfully"] = self.start_vscode(workspace_path)
+                with metrics.span("vscode.start"):
+                    result["started_successfully"] = self.start_vscode(workspace_path)
                 if result["started_successfully"]:
                     result["success"] = True
                     result["message"] = "VS Code started successfully"
@@ -0,0 +1,416 @@
+"""
+Workspace Service - Per-workspace state databases under workspaceStorage
+
+VS Code creates ``User/workspaceStorage/<hash>/`` for every folder or
+workspace it opens, each with its own ``state.vscdb``. Extensions write to
+these the same way they write to the global database, so the same clean rules
+apply. Databases are found with a single ``os.scandir`` pass and cleaned in a
+thread pool; SQLite releases the GIL while it works, so threads scale well.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import unquote, urlparse
+
+from ..core import metrics
+from ..core.config import get_config
+from ..models.database_model import DatabaseModel
+from .backup_service import BackupService
+from .file_service import FileService
+
+WORKSPACE_DB_NAME = "state.vscdb"
+WORKSPACE_JSON_NAME = "workspace.json"
+
+# Directories whose children are removable disks and network shares that come and go
+MOUNT_PARENTS = ("/media", "/run/media", "/mnt", "/Volumes", "/net", "/Network")
+FSTAB_PATH = "/etc/fstab"
+
+
+@dataclass
+class WorkspaceDatabase:
+    """A workspace folder and its state database"""
+    workspace_id: str
+    directory: Path
+    db_path: Path
+    size: int
+
+
+@dataclass
+class WorkspaceTarget:
+    """Where a workspace folder points (from its workspace.json)"""
+    workspace_id: str
+    directory: Path
+    uri: Optional[str] = None
+    target_path: Optional[Path] = None
+    reachable: Optional[bool] = None
+    size: int = 0
+
+    @property
+    def is_stale(self) -> bool:
+        """Only local targets that are known to be gone count as stale"""
+        return self.reachable is False
+
+
+@dataclass
+class StalePruneResult:
+    """Result of finding (and optionally removing) stale workspace folders"""
+    success: bool
+    message: str
+    dry_run: bool = True
+    workspaces_scanned: int = 0
+    stale: List[WorkspaceTarget] = field(default_factory=list)
+    bytes_reclaimed: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    metrics: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def uri_to_path(uri: str) -> Optional[Path]:
+    """Local path for a ``file://`` URI; None for remote (ssh, WSL, ...) URIs"""
+    parsed = urlparse(uri)
+    if parsed.scheme != "file":
+        return None
+
+    path = unquote(parsed.path)
+    if parsed.netloc:
+        # UNC share: file://server/share/dir
+        return Path(f"//{parsed.netloc}{path}")
+    if len(path) > 2 and path[0] == "/" and path[2] == ":":
+        # Windows drive: file:///c%3A/Users/dev
+        path = path[1:]
+    return Path(path)
+
+
+def _is_local_target(path: Path) -> bool:
+    """Whether ``path`` can be checked from this machine (not a UNC share or another OS's drive)"""
+    text = str(path).replace("\\", "/")
+    if text.startswith("//"):
+        return False
+    if re.match(r"[A-Za-z]:", text) and os.name != "nt":
+        return False
+    return path.is_absolute()
+
+
+def _mount_point(path: Path) -> Path:
+    """The mount point of the filesystem that the existing ``path`` is on"""
+    for candidate in (path, *path.parents):
+        if os.path.ismount(candidate):
+            return candidate
+    return Path(path.anchor)
+
+
+def _configured_mount_points() -> Set[Path]:
+    """Mount points listed in /etc/fstab, mounted right now or not"""
+    mount_points = set()
+    try:
+        with open(FSTAB_PATH, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 2 and not fields[0].startswith("#") and fields[1].startswith("/"):
+                    mount_points.add(Path(fields[1].replace("\\040", " ")))
+    except OSError:
+        pass
+    return mount_points
+
+
+def _offline_mount(ancestor: Path, path: Path) -> bool:
+    """Whether something is normally mounted between ``ancestor`` and ``path`` but is not right now"""
+    chain = [directory for directory in (path, *path.parents)
+             if directory == ancestor or ancestor in directory.parents]
+    configured = _configured_mount_points()
+    if any(directory in configured and not os.path.ismount(directory) for directory in chain):
+        return True
+    for parent in map(Path, MOUNT_PARENTS):
+        # Removable disks and shares: some directory below the parent must be mounted
+        if parent in path.parents and not any(
+            parent in directory.parents and os.path.ismount(directory) for directory in path.parents
+        ):
+            return True
+    return False
+
+
+def _is_empty_directory(path: Path) -> bool:
+    try:
+        with os.scandir(path) as entries:
+            return next(entries, None) is None
+    except OSError:
+        return False
+
+
+def target_reachable(path: Path) -> Optional[bool]:
+    """Whether a local workspace target exists; None when that cannot be told
+
+    A missing target only counts as gone when the filesystem it would be on is
+    mounted: its nearest existing ancestor is not an unmounted mount point (in
+    /etc/fstab, a removable-media slot, or an empty directory, which is what
+    one looks like) and is on the same device as the mount point found by
+    walking up from it. A target on an unmounted disk, an offline share or a
+    missing drive is unknown, not gone.
+    """
+    if os.path.exists(path):
+        return True
+    ancestor = next((parent for parent in path.parents if os.path.exists(parent)), None)
+    if ancestor is None or ancestor.parent == ancestor:
+        # Nothing but the root (or not even the drive) is left: a missing mount
+        return None
+    if _offline_mount(ancestor, path) or _is_empty_directory(ancestor):
+        return None
+    try:
+        return False if os.stat(ancestor).st_dev == os.stat(_mount_point(ancestor)).st_dev else None
+    except OSError:
+        return None
+
+
+@dataclass
+class WorkspaceCleanResult:
+    """Result of cleaning one workspace database"""
+    workspace_id: str
+    db_path: Path
+    success: bool
+    message: str
+    entries_affected: int = 0
+    values_rewritten: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    backup_path: Optional[Path] = None
+    error: Optional[str] = None
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return max(self.bytes_before - self.bytes_after, 0)
+
+
+@dataclass
+class WorkspaceCleanSummary:
+    """Combined result of cleaning all workspace databases"""
+    success: bool
+    message: str
+    workspaces_scanned: int = 0
+    workspaces_cleaned: int = 0
+    entries_affected: int = 0
+    bytes_reclaimed: int = 0
+    results: List[WorkspaceCleanResult] = field(default_factory=list)
+    metrics: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class WorkspaceService:
+    """Finds and cleans the state databases in a workspaceStorage directory"""
+
+    def __init__(self, storage_dir: Path):
+        self.storage_dir = Path(storage_dir)
+
+    def find_databases(self) -> List[WorkspaceDatabase]:
+        """All ``<hash>/state.vscdb`` files, found with one directory listing"""
+        databases = []
+        with metrics.span("workspaces.scan") as span:
+            try:
+                with os.scandir(self.storage_dir) as entries:
+                    for entry in entries:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                        db_path = os.path.join(entry.path, WORKSPACE_DB_NAME)
+                        try:
+                            size = os.stat(db_path).st_size
+                        except OSError:
+                            continue
+                        databases.append(WorkspaceDatabase(entry.name, Path(entry.path), Path(db_path), size))
+            except OSError:
+                pass
+            span.add("workspaces", len(databases))
+        return sorted(databases, key=lambda database: database.workspace_id)
+
+    def count_entries(self, max_workers: Optional[int] = None) -> Dict[str, Optional[int]]:
+        """Matching entries per workspace (read-only; None for a database that cannot be read)"""
+        databases = self.find_databases()
+
+        def count(database: WorkspaceDatabase) -> Optional[int]:
+            return DatabaseModel(database.db_path).count_augment_entries()
+
+        with ThreadPoolExecutor(max_workers=max_workers or get_config().performance.workers) as pool:
+            counts = pool.map(count, databases)
+            return {database.workspace_id: entries for database, entries in zip(databases, counts)}
+
+    def clean_database(self, database: WorkspaceDatabase, vacuum: Optional[bool] = None) -> WorkspaceCleanResult:
+        """Apply the clean rules to one workspace database"""
+        if vacuum is None:
+            vacuum = get_config().workspaces.vacuum
+
+        result = WorkspaceCleanResult(
+            workspace_id=database.workspace_id,
+            db_path=database.db_path,
+            success=False,
+            message="",
+            bytes_before=database.size,
+            bytes_after=database.size
+        )
+        model = DatabaseModel(database.db_path)
+
+        try:
+            # Most workspaces have nothing to remove; skip their backup and write
+            count = model.count_augment_entries()
+            references = False
+            if count == 0 and get_config().operations.rewrite_values:
+                references = model.has_value_references()
+            if count is None or references is None:
+                # Locked, busy or corrupt: report it so the clean is retried, never as clean
+                result.message = "Failed to read workspace database"
+                result.error = "Database could not be read (locked, busy or corrupt)"
+                return result
+            if count == 0 and not references:
+                result.success = True
+                result.message = "No Augment-related entries found"
+                return result
+
+            db_result = model.remove_augment_entries()
+            result.success = db_result.success
+            result.message = db_result.message
+            result.entries_affected = db_result.entries_affected
+            result.values_rewritten = len(db_result.rewrites)
+            result.backup_path = db_result.backup_path
+            result.error = db_result.error
+
+            if db_result.backup_path:
+                # Backups are uniquely named, so apply retention per workspace folder. Same two
+                # phases as the global backups: indexed now, checksummed and compressed later
+                backups = BackupService(database.directory)
+                backups.register_snapshot(db_result.backup_path, wal=asdict(db_result.wal) if db_result.wal else None)
+                if get_config().retention.auto_prune:
+                    backups.prune()
+                backups.schedule_finalize()
+
+            # Value rewrites free space too
+            if db_result.success and (db_result.entries_affected or result.values_rewritten) and vacuum:
+                model.vacuum()
+            result.bytes_after = database.db_path.stat().st_size
+        except Exception as e:
+            result.success = False
+            result.message = "Failed to clean workspace database"
+            result.error = str(e)
+        return result
+
+    def clean_all(self, max_workers: Optional[int] = None, vacuum: Optional[bool] = None) -> WorkspaceCleanSummary:
+        """Clean every workspace database in parallel"""
+        with metrics.collect() as spans:
+            databases = self.find_databases()
+            workers = max_workers or get_config().performance.workers
+
+            with metrics.span("workspaces.clean", workers=workers) as span:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    # Bound, so each workspace's spans reach the caller's collectors as it finishes
+                    clean = metrics.bind(lambda database: self.clean_database(database, vacuum))
+                    results = list(pool.map(clean, databases))
+                span.add("workspaces", len(results))
+                span.add("rows_deleted", sum(result.entries_affected for result in results))
+
+        failed = [result for result in results if not result.success]
+        cleaned = [result for result in results if result.entries_affected or result.values_rewritten]
+        summary = WorkspaceCleanSummary(
+            success=not failed,
+            message="",
+            workspaces_scanned=len(results),
+            workspaces_cleaned=len(cleaned),
+            entries_affected=sum(result.entries_affected for result in results),
+            bytes_reclaimed=sum(result.bytes_reclaimed for result in results),
+            results=results,
+            metrics=spans
+        )
+
+        if not databases:
+            summary.message = "No workspace databases found"
+        elif failed:
+            summary.message = f"Cleaned {len(cleaned)} of {len(results)} workspace databases, {len(failed)} failed"
+        else:
+            summary.message = (
+                f"Removed {summary.entries_affected} entries from {len(cleaned)} of "
+                f"{len(results)} workspace databases"
+            )
+        return summary
+
+    def build_index(self, max_workers: Optional[int] = None) -> Dict[str, WorkspaceTarget]:
+        """Map each workspace hash to the folder or .code-workspace file it was opened from"""
+        try:
+            with os.scandir(self.storage_dir) as entries:
+                directories = [
+                    (entry.name, entry.path) for entry in entries if entry.is_dir(follow_symlinks=False)
+                ]
+        except OSError:
+            return {}
+
+        with metrics.span("workspaces.index") as span:
+            with ThreadPoolExecutor(max_workers=max_workers or get_config().performance.workers) as pool:
+                targets = list(pool.map(lambda item: self._read_target(*item), directories))
+            span.add("workspaces", len(targets))
+        return {target.workspace_id: target for target in targets}
+
+    def _read_target(self, workspace_id: str, directory: str) -> WorkspaceTarget:
+        """Read workspace.json and check whether its target still exists"""
+        target = WorkspaceTarget(workspace_id=workspace_id, directory=Path(directory))
+        try:
+            with open(os.path.join(directory, WORKSPACE_JSON_NAME), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            target.uri = data.get("folder") or data.get("workspace") or data.get("configuration")
+        except (OSError, ValueError, AttributeError):
+            # Empty windows have no workspace.json; leave them alone
+            return target
+
+        if isinstance(target.uri, str):
+            target.target_path = uri_to_path(target.uri)
+        if target.target_path is not None and _is_local_target(target.target_path):
+            # Network mounts can block here, which is why targets are checked in parallel
+            target.reachable = target_reachable(target.target_path)
+        return target
+
+    def find_stale(self, max_workers: Optional[int] = None,
+                   index: Optional[Dict[str, WorkspaceTarget]] = None) -> List[WorkspaceTarget]:
+        """Workspaces whose local target no longer exists, with their folder sizes"""
+        workers = max_workers or get_config().performance.workers
+        index = self.build_index(workers) if index is None else index
+        stale = [target for target in index.values() if target.is_stale]
+
+        with metrics.span("workspaces.size") as span:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                sizes = pool.map(
+                    lambda target: FileService.calculate_directory_size(target.directory, max_workers=1), stale
+                )
+                for target, size in zip(stale, sizes):
+                    target.size = size
+            span.add("bytes", sum(target.size for target in stale))
+        return sorted(stale, key=lambda target: target.size, reverse=True)
+
+    def prune_stale(self, dry_run: bool = True, max_workers: Optional[int] = None) -> StalePruneResult:
+        """Remove workspace folders whose target is gone (only report them with ``dry_run``)"""
+        result = StalePruneResult(success=True, message="", dry_run=dry_run)
+
+        with metrics.collect() as spans:
+            index = self.build_index(max_workers)
+            stale = self.find_stale(max_workers, index)
+            result.workspaces_scanned = len(index)
+
+            if not dry_run:
+                with metrics.span("workspaces.prune") as span:
+                    removed = []
+                    for target in stale:
+                        stats = FileService.remove_tree(target.directory)
+                        if stats.success:
+                            removed.append(target)
+                        else:
+                            result.errors[target.workspace_id] = stats.error or "removal failed"
+                    stale = removed
+                    span.add("workspaces_removed", len(removed))
+        result.metrics = spans
+
+        result.stale = stale
+        result.bytes_reclaimed = sum(target.size for target in stale)
+        result.success = not result.errors
+        size_text = FileService.format_file_size(result.bytes_reclaimed)
+        if dry_run:
+            result.message = f"{len(stale)} stale workspace folder(s) would free {size_text}"
+        else:
+            result.message = f"Removed {len(stale)} stale workspace folder(s), freed {size_text}"
+            if result.errors:
+                result.message += f", {len(result.errors)} failed"
+        return result
@@ -0,0 +1,183 @@
+"""
+Database Browser - Read-only view of a state database's ItemTable
+"""
+
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QModelIndex, Qt, QThread, Signal
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit, QComboBox,
+    QTableView, QPlainTextEdit, QSplitter, QHeaderView, QAbstractItemView
+)
+
+from .item_table_model import ItemTableModel
+from ..core.config import get_config
+from ..services.browser_service import ItemRow, ItemTableReader, format_value
+from ..services.search_service import SearchService, SUBSTRING, TOKEN
+
+
+class SearchWorker(QThread):
+    """Runs one search (which may first have to build or update the index)"""
+
+    result_ready = Signal(object)  # SearchResult
+
+    def __init__(self, service: SearchService, db_path: Path, query: str, mode: str):
+        super().__init__()
+        self.service = service
+        self.db_path = db_path
+        self.query = query
+        self.mode = mode
+
+    def run(self):
+        self.result_ready.emit(self.service.search(self.db_path, self.query, mode=self.mode))
+
+
+class DatabaseBrowser(QDialog):
+    """Key list on the left, the selected value on the right
+
+    The table view only ever holds the pages it has scrolled through (see
+    ItemTableModel), and the value of a row is read when it is selected.
+    Searches go through the full-text index (SearchService) on a worker
+    thread and replace the list with their hits until cleared.
+    """
+
+    def __init__(self, db_path: Path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"🗃️ {db_path.name} - {db_path.parent}")
+        self.resize(1000, 650)
+
+        self._db_path = db_path
+        self._reader = ItemTableReader(db_path)
+        self.model = ItemTableModel(self._reader, get_config().performance.page_size, self)
+        self._search_service = SearchService()
+        self._search_worker: Optional[SearchWorker] = None
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        search_bar = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search keys and values (Enter)")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setToolTip(
+            "Keys are searched through an index. Values are not indexed: every value is scanned,\n"
+            "reading the first [search] value_limit_kb of each, so value matches take longer on large databases."
+        )
+        self.search_edit.returnPressed.connect(self.search)
+        self.search_edit.textChanged.connect(self._on_search_text_changed)
+        search_bar.addWidget(self.search_edit, 1)
+        self.mode_combo = QComboBox()
+        self.mode_combo.setObjectName("searchModeCombo")
+        self.mode_combo.addItem("Substring", SUBSTRING)
+        self.mode_combo.addItem("Tokens (FTS5)", TOKEN)
+        self.mode_combo.setToolTip("Substring: text anywhere. Tokens: whole words, e.g. augment AND chat, augm*")
+        search_bar.addWidget(self.mode_combo)
+        layout.addLayout(search_bar)
+
+        header = QHBoxLayout()
+        self.summary_label = QLabel()
+        self.summary_label.setObjectName("descLabel")
+        header.addWidget(self.summary_label, 1)
+        reload_btn = QPushButton("🔄 Reload")
+        reload_btn.setObjectName("clearBtn")
+        reload_btn.clicked.connect(self.reload)
+        header.addWidget(reload_btn)
+        layout.addLayout(header)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        layout.addWidget(splitter, 1)
+
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table_view.setWordWrap(False)
+        self.table_view.verticalHeader().setVisible(False)
+        # Fixed row heights: the view never has to measure rows it has not shown
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table_view.horizontalHeader().setSectionResizeMode(
+            ItemTableModel.KEY_COLUMN, QHeaderView.ResizeMode.Stretch
+        )
+        self.table_view.horizontalHeader().setSectionResizeMode(
+            ItemTableModel.SIZE_COLUMN, QHeaderView.ResizeMode.ResizeToContents
+        )
+        self.table_view.selectionModel().currentRowChanged.connect(self._show_value)
+        splitter.addWidget(self.table_view)
+
+        self.value_view = QPlainTextEdit()
+        self.value_view.setReadOnly(True)
+        self.value_view.setUndoRedoEnabled(False)
+        self.value_view.setPlaceholderText("Select a key to show its value")
+        splitter.addWidget(self.value_view)
+        splitter.setStretchFactor(0, 1)
+        splitter.setStretchFactor(1, 1)
+
+        self.model.rowsInserted.connect(self._update_summary)
+        self.model.modelReset.connect(self._update_summary)
+        self._update_summary()
+
+    def _update_summary(self, *args):
+        if self._search_worker is not None:
+            return
+        loaded = self.model.rowCount()
+        more = "" if self.model.exhausted else "+ (scroll for more)"
+        self.summary_label.setText(f"{loaded}{more} keys in {get_config().operations.database_table}")
+
+    def search(self):
+        """Search for the text in the search box (an empty box shows all keys again)"""
+        query = self.search_edit.text().strip()
+        if not query:
+            self.reload()
+            return
+        if self._search_worker is not None:
+            return
+        self.summary_label.setText(f"Searching for {query!r}…")
+        self.search_edit.setEnabled(False)
+        self._search_worker = SearchWorker(self._search_service, self._db_path, query, self.mode_combo.currentData())
+        self._search_worker.result_ready.connect(self._show_search_result)
+        self._search_worker.start()
+
+    def _show_search_result(self, result):
+        self._search_worker.wait()
+        self._search_worker.deleteLater()
+        self._search_worker = None
+        self.search_edit.setEnabled(True)
+        self.search_edit.setFocus()
+        self.value_view.clear()
+        if not result.success:
+            self.summary_label.setText(f"❌ {result.message}" + (f": {result.error}" if result.error else ""))
+            return
+        self.model.show_rows([ItemRow(hit.key, hit.size) for hit in result.hits])
+        index = result.index
+        indexed = ""
+        if index and not index.up_to_date:
+            indexed = f", index {'built' if index.rebuilt else 'updated'} in {index.duration:.1f} s"
+        self.summary_label.setText(f"🔍 {result.message} ({result.duration * 1000:.0f} ms{indexed})")
+
+    def _on_search_text_changed(self, text: str):
+        # Clearing the box (e.g. with its clear button) returns to browsing
+        if not text and self.model.exhausted and self._search_worker is None:
+            self.reload()
+
+    def _show_value(self, current: QModelIndex, previous: QModelIndex):
+        """Read and show the value of the newly selected row"""
+        if not current.isValid():
+            self.value_view.clear()
+            return
+        try:
+            text = format_value(self.model.value(current.row()))
+        except Exception as e:
+            text = f"Could not read value: {e}"
+        self.value_view.setPlainText(text)
+
+    def reload(self):
+        """Start again from the first key (picks up changes made since opening)"""
+        self.value_view.clear()
+        self.model.reload()
+
+    def done(self, result: int):
+        if self._search_worker is not None:
+            self._search_worker.wait()
+        self._reader.close()
+        super().done(result)
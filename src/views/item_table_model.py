@@ -0,0 +1,105 @@
+"""
+Item Table Model - Lazily paged ItemTable rows for Qt item views
+"""
+
+from typing import Any, List, Optional
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from ..services.browser_service import ItemRow, ItemTableReader
+from ..services.file_service import FileService
+
+
+class ItemTableModel(QAbstractTableModel):
+    """Keys and value sizes of an ItemTable, fetched a page at a time
+
+    The view asks for more rows through ``canFetchMore``/``fetchMore`` as it
+    scrolls towards the end, and each page continues from the last key
+    loaded. Only keys and sizes are kept; values are read on demand with
+    ``value``. ``show_rows`` replaces the pages with a fixed set of rows
+    (search hits) until ``reload``.
+    """
+
+    HEADERS = ("Key", "Size")
+    KEY_COLUMN = 0
+    SIZE_COLUMN = 1
+
+    def __init__(self, reader: ItemTableReader, page_size: int, parent=None):
+        super().__init__(parent)
+        self._reader = reader
+        self._page_size = page_size
+        self._rows: List[ItemRow] = []
+        self._exhausted = False
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == self.KEY_COLUMN:
+                return row.key
+            return FileService.format_file_size(row.size)
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() == self.KEY_COLUMN:
+            return row.key
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() == self.SIZE_COLUMN:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid() or self._exhausted:
+            return
+        after = self._rows[-1].key if self._rows else None
+        try:
+            page = self._reader.page(after, self._page_size)
+        except Exception:
+            page = []
+        if len(page) < self._page_size:
+            self._exhausted = True
+        if not page:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def row_at(self, row: int) -> Optional[ItemRow]:
+        """Loaded row ``row``, if any"""
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def value(self, row: int) -> Any:
+        """Read the value of loaded row ``row`` from the database"""
+        item = self.row_at(row)
+        return self._reader.value(item.key) if item else None
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether every row has been loaded"""
+        return self._exhausted
+
+    def show_rows(self, rows: List[ItemRow]) -> None:
+        """Show exactly ``rows`` (no further pages)"""
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._exhausted = True
+        self.endResetModel()
+
+    def reload(self) -> None:
+        """Drop loaded rows and start again from the first key"""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
@@ -0,0 +1,65 @@
+"""
+Log View - Bounded, batched operation log widget
+"""
+
+from collections import deque
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QPlainTextEdit
+
+
+class LogView(QPlainTextEdit):
+    """Operation log backed by a ring buffer of blocks
+
+    Messages are queued and rendered together on a short timer, so a burst of
+    log lines costs one repaint. ``setMaximumBlockCount`` makes Qt drop the
+    oldest lines once the limit is reached, keeping appends O(1) and memory
+    bounded for long sessions.
+    """
+
+    def __init__(self, max_entries: int = 1000, flush_interval_ms: int = 16, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setMaximumBlockCount(max_entries)
+
+        # Messages beyond the block limit would be trimmed anyway
+        self._pending = deque(maxlen=max_entries)
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval_ms)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def append_message(self, html: str):
+        """Queue an HTML line; it is rendered on the next flush"""
+        self._pending.append(html)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """Render all queued messages in one batch"""
+        if not self._pending:
+            return
+
+        scrollbar = self.verticalScrollBar()
+        follow = scrollbar.value() >= scrollbar.maximum() - 4
+
+        self.setUpdatesEnabled(False)
+        try:
+            while self._pending:
+                self.appendHtml(self._pending.popleft())
+        finally:
+            self.setUpdatesEnabled(True)
+
+        # Only follow new output when the user has not scrolled up
+        if follow:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def reset(self, html: str = ""):
+        """Drop queued and rendered messages, optionally showing ``html``"""
+        self._pending.clear()
+        self._flush_timer.stop()
+        self.clear()
+        if html:
+            self.appendHtml(html)
@@ -4,26 +4,39 @@ Main Window - Primary application view using MVC pattern
 
 from PySide6.QtWidgets import (
     QMainWindow, QVBoxLayout, QHBoxLayout, 
-    QWidget, QPushButton, QTextEdit, QLabel, QProgressBar,
+    QWidget, QPushButton, QLabel, QProgressBar,
     QGroupBox, QMessageBox, QFrame, QSizePolicy,
-    QGridLayout, QSpacerItem, QSplitter
+    QGridLayout, QSpacerItem, QSplitter, QComboBox, QFileDialog
 )
 from PySide6.QtCore import Qt, QDateTime
-from PySide6.QtGui import QTextCursor, QIcon
+from PySide6.QtGui import QIcon
+from pathlib import Path
+from typing import Optional
+import html
 import os
 
 from .style_manager import StyleManager
-from ..controllers.main_controller import MainController
+from .log_view import LogView
+from ..core.config import get_config
 
 
 class MainWindow(QMainWindow):
     """Main application window following MVC pattern"""
     
+    # Log message type -> theme palette key
+    LOG_COLOR_KEYS = {
+        "info": "primary",
+        "success": "success",
+        "error": "error",
+        "warning": "warning"
+    }
+    
     def __init__(self):
         super().__init__()
         
-        # Initialize controller
-        self.controller = MainController(self)
+        # Controller (and the service stack behind it) is created in start(),
+        # after the window has been shown
+        self.controller = None
         
         # UI components
         self.status_label = None
@@ -31,27 +44,49 @@ class MainWindow(QMainWindow):
         self.modify_ids_btn = None
         self.run_all_btn = None
         self.restart_btn = None
+        self.restore_btn = None
+        self.diagnose_btn = None
+        self.diff_btn = None
+        self.browse_btn = None
         self.output_text = None
         self.progress_bar = None
         
         # Initialize UI
         self.init_ui()
         
-        # Connect to controller
+        # Actions stay disabled until the first status scan has run
+        self.set_buttons_enabled(False)
+    
+    def start(self):
+        """Create the controller and queue the first status scan
+        
+        The scan (process list, entry count) runs on the controller's executor;
+        until its result arrives the status reads "checking" and the actions
+        stay disabled, while the window keeps responding.
+        """
+        if self.controller is not None:
+            return
+        
+        self.update_status("🔍 Checking VS Code installation...", "info")
+        
+        from ..controllers.main_controller import MainController
+        
+        self.controller = MainController(self)
         self.controller.initialize()
     
     def init_ui(self):
         """Initialize the user interface"""
         self.setWindowTitle("🚀 Augment VIP - VS Code Privacy & Database Tools")
-        self.setGeometry(100, 100, 900, 700)
-        self.setMinimumSize(800, 600)
+        ui = get_config().ui
+        self.setGeometry(100, 100, ui.default_width, ui.default_height)
+        self.setMinimumSize(ui.minimum_width, ui.minimum_height)
         
         # Set window icon
         icon_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'assets', 'app_icon.ico')
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
         
-        # Apply styling
+        # Apply styling once; dialogs and status changes reuse this stylesheet
         self.setStyleSheet(StyleManager.get_complete_stylesheet())
         
         # Create main splitter layout
@@ -61,7 +96,7 @@ class MainWindow(QMainWindow):
         # Create sidebar
         sidebar = self.create_sidebar()
         sidebar.setObjectName("sidebar")
-        sidebar.setFixedWidth(350)
+        sidebar.setFixedWidth(ui.sidebar_width)
         splitter.addWidget(sidebar)
         
         # Create main content area
@@ -131,8 +166,8 @@ class MainWindow(QMainWindow):
         
         # Subtitle
         subtitle_label = QLabel("VS Code Privacy Tools")
+        subtitle_label.setObjectName("subtitleLabel")
         subtitle_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        subtitle_label.setStyleSheet("color: #cccccc; font-size: 12px; font-style: italic; margin-bottom: 5px;")
         header_layout.addWidget(subtitle_label)
         
         # Separator
@@ -208,11 +243,43 @@ class MainWindow(QMainWindow):
         
         # Separator
         separator = QFrame()
+        separator.setObjectName("actionSeparator")
         separator.setFrameShape(QFrame.Shape.HLine)
         separator.setFrameShadow(QFrame.Shadow.Sunken)
-        separator.setStyleSheet("color: #444444; margin: 10px 0;")
         action_layout.addWidget(separator)
         
+        # Restore Backup button
+        self.restore_btn = QPushButton("♻️ Restore Backup")
+        self.restore_btn.setObjectName("restoreBtn")
+        self.restore_btn.setToolTip("Verify a backup and restore it over the current file")
+        self.restore_btn.clicked.connect(lambda: self.controller.restore_backup())
+        self.restore_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        action_layout.addWidget(self.restore_btn)
+        
+        # Diagnostics button
+        self.diagnose_btn = QPushButton("🩺 Diagnostics")
+        self.diagnose_btn.setObjectName("diagnoseBtn")
+        self.diagnose_btn.setToolTip("Check database integrity and show which extensions use the most space")
+        self.diagnose_btn.clicked.connect(lambda: self.controller.diagnose_database())
+        self.diagnose_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        action_layout.addWidget(self.diagnose_btn)
+        
+        # Compare Backup button
+        self.diff_btn = QPushButton("🔍 Compare Backup")
+        self.diff_btn.setObjectName("diffBtn")
+        self.diff_btn.setToolTip("Show which keys changed between a backup and the current database")
+        self.diff_btn.clicked.connect(lambda: self.controller.diff_backup())
+        self.diff_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        action_layout.addWidget(self.diff_btn)
+        
+        # Browse Database button
+        self.browse_btn = QPushButton("🗃️ Browse Database")
+        self.browse_btn.setObjectName("browseBtn")
+        self.browse_btn.setToolTip("Page through the keys of the state database and inspect their values")
+        self.browse_btn.clicked.connect(lambda: self.controller.browse_database())
+        self.browse_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        action_layout.addWidget(self.browse_btn)
+        
         # Restart VS Code button
         self.restart_btn = QPushButton("🔄 Restart VS Code")
         self.restart_btn.setObjectName("restartBtn")
@@ -243,6 +310,17 @@ class MainWindow(QMainWindow):
         
         log_header_layout.addItem(QSpacerItem(40, 20, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum))
         
+        # Theme selector (only when app.conf defines more than one theme)
+        themes = StyleManager.available_themes()
+        if len(themes) > 1:
+            theme_combo = QComboBox()
+            theme_combo.setObjectName("themeCombo")
+            theme_combo.setToolTip("Color theme")
+            theme_combo.addItems(themes)
+            theme_combo.setCurrentText(StyleManager.theme_name)
+            theme_combo.currentTextChanged.connect(self.set_theme)
+            log_header_layout.addWidget(theme_combo)
+        
         # Clear button
         clear_btn = QPushButton("🗑️ Clear")
         clear_btn.setObjectName("clearBtn")
@@ -252,9 +330,12 @@ class MainWindow(QMainWindow):
         
         output_layout.addWidget(log_header)
         
-        # Output text area - takes full height
-        self.output_text = QTextEdit()
-        self.output_text.setReadOnly(True)
+        # Output log - bounded ring buffer, rendered in batches
+        logging_config = get_config().logging
+        self.output_text = LogView(
+            max_entries=logging_config.max_log_entries,
+            flush_interval_ms=logging_config.flush_interval_ms
+        )
         
         # Add welcome message
         self.show_welcome_message()
@@ -278,9 +359,13 @@ Select an operation from the sidebar to get started.
 • Detailed operation logs
 
 Ready to enhance your VS Code privacy! 🔐
-        """.strip()
+        """.strip().replace("\n", "<br>")
         
-        self.output_text.setHtml(f'<div style="color: #4a9eff; font-family: Consolas, Monaco, monospace; padding: 15px; line-height: 1.5;">{welcome_msg}</div>')
+        self.output_text.reset(f'<span style="color: {StyleManager.COLORS["primary"]};">{welcome_msg}</span>')
+    
+    def set_theme(self, name: str):
+        """Switch color theme at runtime with a single stylesheet update"""
+        StyleManager.apply_theme(self, name)
     
     def clear_output(self):
         """Clear output and show welcome message"""
@@ -292,10 +377,8 @@ Ready to enhance your VS Code privacy! 🔐
         """Update status label with message and styling"""
         self.status_label.setText(message)
         
-        # Apply status-specific styling
-        status_style = StyleManager.get_status_style(status_type)
-        if status_style:
-            self.status_label.setStyleSheet(status_style)
+        # Status colors come from the window stylesheet via a dynamic property
+        StyleManager.set_dynamic_property(self.status_label, "status", status_type)
     
     def set_buttons_enabled(self, enabled: bool):
         """Enable or disable action buttons"""
@@ -303,6 +386,10 @@ Ready to enhance your VS Code privacy! 🔐
         self.modify_ids_btn.setEnabled(enabled)
         self.run_all_btn.setEnabled(enabled)
         self.restart_btn.setEnabled(enabled)
+        self.restore_btn.setEnabled(enabled)
+        self.diagnose_btn.setEnabled(enabled)
+        self.diff_btn.setEnabled(enabled)
+        self.browse_btn.setEnabled(enabled)
     
     def set_specific_button_enabled(self, button_name: str, enabled: bool):
         """Enable/disable specific button"""
@@ -314,6 +401,30 @@ Ready to enhance your VS Code privacy! 🔐
             self.run_all_btn.setEnabled(enabled)
         elif button_name == "restart":
             self.restart_btn.setEnabled(enabled)
+        elif button_name == "restore":
+            self.restore_btn.setEnabled(enabled)
+        elif button_name == "diagnose":
+            self.diagnose_btn.setEnabled(enabled)
+        elif button_name == "diff":
+            self.diff_btn.setEnabled(enabled)
+        elif button_name == "browse":
+            self.browse_btn.setEnabled(enabled)
+    
+    def choose_backup_file(self, directory: Path, title: str = "Select Backup to Restore") -> Optional[Path]:
+        """Ask the user for a backup file"""
+        suffix = get_config().operations.backup_suffix
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, title, str(directory), f"Backups (*.{suffix}*);;All files (*)"
+        )
+        return Path(file_name) if file_name else None
+    
+    def show_database_browser(self, db_path: Path):
+        """Open a (non-modal) browser over a state database"""
+        from .database_browser import DatabaseBrowser  # only built when asked for
+        
+        browser = DatabaseBrowser(db_path, self)
+        browser.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        browser.show()
     
     def show_progress(self, show: bool = True):
         """Show or hide progress bar"""
@@ -322,26 +433,18 @@ Ready to enhance your VS Code privacy! 🔐
             self.progress_bar.setRange(0, 0)  # Indeterminate progress
     
     def add_log_message(self, message: str, msg_type: str = "info"):
-        """Add message to output log"""
-        timestamp = QDateTime.currentDateTime().toString("hh:mm:ss")
-        
-        color_map = {
-            "info": "#4a9eff",
-            "success": "#28a745",
-            "error": "#dc3545",
-            "warning": "#ffc107"
-        }
-        
-        color = color_map.get(msg_type, "#4a9eff")
+        """Add a plain-text message to the output log (keys and file names may contain markup)"""
+        color = StyleManager.COLORS[self.LOG_COLOR_KEYS.get(msg_type, "primary")]
         type_label = msg_type.upper()
         
-        html_message = f'<div style="color: {color}; margin: 5px 0;"><b>[{timestamp}] {type_label}:</b> {message}</div>'
-        self.output_text.append(html_message)
+        if get_config().logging.enable_timestamps:
+            timestamp = QDateTime.currentDateTime().toString("hh:mm:ss")
+            prefix = f"[{timestamp}] {type_label}:"
+        else:
+            prefix = f"{type_label}:"
         
-        # Scroll to bottom
-        cursor = self.output_text.textCursor()
-        cursor.movePosition(cursor.MoveOperation.End)
-        self.output_text.setTextCursor(cursor)
+        html_message = f'<span style="color: {color};"><b>{prefix}</b> {html.escape(message)}</span>'
+        self.output_text.append_message(html_message)
     
     def show_message_box(self, title: str, message: str, msg_type: str = "info"):
         """Show styled message box"""
@@ -358,12 +461,13 @@ Ready to enhance your VS Code privacy! 🔐
         else:
             msg_box.setIcon(QMessageBox.Icon.Information)
         
-        # Apply styling
-        msg_box.setStyleSheet(StyleManager.get_messagebox_stylesheet(msg_type))
+        # Styling is inherited from the window stylesheet, keyed on msgType
+        msg_box.setProperty("msgType", msg_type)
         msg_box.exec()
     
     def closeEvent(self, event):
         """Handle application close event"""
         # Let controller handle cleanup
-        self.controller.cleanup()
+        if self.controller:
+            self.controller.cleanup()
         event.accept()
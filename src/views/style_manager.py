@@ -2,37 +2,20 @@
 Style Manager - Centralized styling for the application
 """
 
-from typing import Dict, Any
+from typing import Dict, List, Any
+
+from .theme import DEFAULT_THEME, get_theme, get_themes
+from ..core.config import get_config
 
 class StyleManager:
     """Manages application styling and themes"""
     
-    # Color palette
-    COLORS = {
-        "primary": "#4a9eff",
-        "primary_dark": "#357abd",
-        "primary_light": "#5ba8ff",
-        "secondary": "#2b2b2b",
-        "background": "#1e1e1e",
-        "surface": "#2a2a2a",
-        "surface_light": "#3a3a3a",
-        "text_primary": "#ffffff",
-        "text_secondary": "#cccccc",
-        "text_muted": "#aaaaaa",
-        "success": "#28a745",
-        "success_light": "#34ce57",
-        "warning": "#ffc107",
-        "warning_dark": "#e0a800",
-        "error": "#dc3545",
-        "error_light": "#e45565",
-        "info": "#17a2b8",
-        "clean": "#ff6b35",
-        "clean_hover": "#ff7b45",
-        "modify": "#28a745",
-        "modify_hover": "#34ce57",
-        "run_all": "#6f42c1",
-        "run_all_hover": "#7952cc"
-    }
+    # Active color palette (see theme.py); replaced by set_theme()
+    theme_name: str = get_config().ui.theme or DEFAULT_THEME
+    COLORS: Dict[str, str] = get_theme(theme_name).colors
+    
+    # Compiled stylesheets per theme, built on first use
+    _stylesheet_cache: Dict[str, str] = {}
     
     @classmethod
     def get_main_stylesheet(cls) -> str:
@@ -81,7 +64,7 @@ class StyleManager:
                 margin: 15px 5px;
                 padding-top: 20px;
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 rgba(74, 158, 255, 0.1), stop:1 rgba(74, 158, 255, 0.05));
+                    stop:0 {cls.COLORS['primary_wash']}, stop:1 {cls.COLORS['primary_wash_light']});
             }}
             QGroupBox::title {{
                 subcontrol-origin: margin;
@@ -113,24 +96,24 @@ class StyleManager:
             }}
             QPushButton:pressed {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 {cls.COLORS['primary_dark']}, stop:1 #2a5f8f);
+                    stop:0 {cls.COLORS['primary_dark']}, stop:1 {cls.COLORS['primary_darker']});
             }}
             QPushButton:disabled {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #666666, stop:1 #444444);
-                color: #999999;
+                    stop:0 {cls.COLORS['disabled']}, stop:1 {cls.COLORS['disabled_dark']});
+                color: {cls.COLORS['disabled_text']};
             }}
             QPushButton#cleanBtn {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 {cls.COLORS['clean']}, stop:1 #e55a2b);
+                    stop:0 {cls.COLORS['clean']}, stop:1 {cls.COLORS['clean_dark']});
             }}
             QPushButton#cleanBtn:hover {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 {cls.COLORS['clean_hover']}, stop:1 #f56a3b);
+                    stop:0 {cls.COLORS['clean_hover']}, stop:1 {cls.COLORS['clean']});
             }}
             QPushButton#modifyBtn {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 {cls.COLORS['modify']}, stop:1 #218838);
+                    stop:0 {cls.COLORS['modify']}, stop:1 {cls.COLORS['modify_dark']});
             }}
             QPushButton#modifyBtn:hover {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
@@ -138,21 +121,32 @@ class StyleManager:
             }}
             QPushButton#runAllBtn {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 {cls.COLORS['run_all']}, stop:1 #5a2d91);
+                    stop:0 {cls.COLORS['run_all']}, stop:1 {cls.COLORS['run_all_dark']});
             }}
             QPushButton#runAllBtn:hover {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 {cls.COLORS['run_all_hover']}, stop:1 #6339a2);
+                    stop:0 {cls.COLORS['run_all_hover']}, stop:1 {cls.COLORS['run_all']});
             }}
             QPushButton#restartBtn {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #fd7e14, stop:1 #e8680e);
+                    stop:0 {cls.COLORS['restart']}, stop:1 {cls.COLORS['restart_dark']});
                 color: #000000;
                 font-weight: bold;
             }}
             QPushButton#restartBtn:hover {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #ff8c26, stop:1 #fd7e14);
+                    stop:0 {cls.COLORS['restart_hover']}, stop:1 {cls.COLORS['restart']});
+            }}
+            QPushButton#restoreBtn, QPushButton#diagnoseBtn, QPushButton#diffBtn, QPushButton#browseBtn {{
+                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                    stop:0 {cls.COLORS['info']}, stop:1 {cls.COLORS['info_dark']});
+                color: {cls.COLORS['text_primary']};
+                font-weight: bold;
+            }}
+            QPushButton#restoreBtn:hover, QPushButton#diagnoseBtn:hover, QPushButton#diffBtn:hover,
+            QPushButton#browseBtn:hover {{
+                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                    stop:0 {cls.COLORS['info_hover']}, stop:1 {cls.COLORS['info']});
             }}
             QPushButton#clearBtn {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
@@ -162,7 +156,7 @@ class StyleManager:
             }}
             QPushButton#clearBtn:hover {{
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #ffcd3c, stop:1 #ffb700);
+                    stop:0 {cls.COLORS['warning_hover']}, stop:1 {cls.COLORS['warning']});
             }}
         """
     
@@ -170,15 +164,42 @@ class StyleManager:
     def get_text_stylesheet(cls) -> str:
         """Get text widget styling"""
         return f"""
-            QTextEdit {{
-                border: 2px solid #444444;
+            QTextEdit, QPlainTextEdit {{
+                border: 2px solid {cls.COLORS['border']};
                 border-radius: 8px;
-                background-color: #1a1a1a;
+                background-color: {cls.COLORS['log_background']};
                 color: {cls.COLORS['text_primary']};
                 font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
                 font-size: 11px;
                 padding: 10px;
             }}
+            QTableView {{
+                border: 2px solid {cls.COLORS['border']};
+                border-radius: 8px;
+                background-color: {cls.COLORS['log_background']};
+                color: {cls.COLORS['text_primary']};
+                selection-background-color: {cls.COLORS['primary']};
+                font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+                font-size: 11px;
+            }}
+            QHeaderView::section {{
+                background-color: {cls.COLORS['surface']};
+                color: {cls.COLORS['text_secondary']};
+                border: none;
+                padding: 4px;
+            }}
+            QComboBox#searchModeCombo {{
+                border: 2px solid {cls.COLORS['border']};
+                border-radius: 6px;
+                background-color: {cls.COLORS['log_background']};
+                color: {cls.COLORS['text_primary']};
+                font-size: 11px;
+                padding: 4px 8px;
+                min-width: 110px;
+            }}
+            QComboBox#searchModeCombo:hover {{
+                border-color: {cls.COLORS['primary']};
+            }}
             QLabel {{
                 color: {cls.COLORS['text_primary']};
                 font-size: 12px;
@@ -194,13 +215,19 @@ class StyleManager:
                 font-weight: bold;
                 padding: 8px;
                 border-radius: 6px;
-                background-color: rgba(74, 158, 255, 0.1);
+                background-color: {cls.COLORS['primary_wash']};
             }}
             QLabel#descLabel {{
                 color: {cls.COLORS['text_secondary']};
                 font-size: 10px;
                 padding: 5px;
             }}
+            QLabel#subtitleLabel {{
+                color: {cls.COLORS['text_secondary']};
+                font-size: 12px;
+                font-style: italic;
+                margin-bottom: 5px;
+            }}
         """
     
     @classmethod
@@ -208,7 +235,7 @@ class StyleManager:
         """Get progress bar styling"""
         return f"""
             QProgressBar {{
-                border: 2px solid #444444;
+                border: 2px solid {cls.COLORS['border']};
                 border-radius: 8px;
                 text-align: center;
                 font-weight: bold;
@@ -227,77 +254,117 @@ class StyleManager:
         """Get separator styling"""
         return f"""
             QFrame#separator {{
-                background-color: #444444;
+                background-color: {cls.COLORS['border']};
                 max-height: 2px;
             }}
+            QFrame#actionSeparator {{
+                color: {cls.COLORS['border']};
+                margin: 10px 0;
+            }}
         """
     
     @classmethod
-    def get_complete_stylesheet(cls) -> str:
-        """Get complete application stylesheet"""
-        return (
-            cls.get_main_stylesheet() +
-            cls.get_groupbox_stylesheet() +
-            cls.get_button_stylesheet() +
-            cls.get_text_stylesheet() +
-            cls.get_progressbar_stylesheet() +
-            cls.get_separator_stylesheet()
-        )
-    
-    @classmethod
-    def get_status_style(cls, status_type: str) -> str:
-        """Get status-specific styling"""
-        styles = {
-            "success": f"""
-                QLabel#statusLabel {{
-                    background-color: rgba(40, 167, 69, 0.2);
-                    color: {cls.COLORS['success']};
-                    border: 2px solid {cls.COLORS['success']};
-                }}
-            """,
-            "warning": f"""
-                QLabel#statusLabel {{
-                    background-color: rgba(255, 193, 7, 0.2);
-                    color: {cls.COLORS['warning']};
-                    border: 2px solid {cls.COLORS['warning']};
-                }}
-            """,
-            "error": f"""
-                QLabel#statusLabel {{
-                    background-color: rgba(220, 53, 69, 0.2);
-                    color: {cls.COLORS['error']};
-                    border: 2px solid {cls.COLORS['error']};
-                }}
-            """
-        }
-        return styles.get(status_type, "")
+    def get_status_stylesheet(cls) -> str:
+        """Get status label styling, selected by the dynamic 'status' property"""
+        return f"""
+            QLabel#statusLabel[status="success"] {{
+                background-color: {cls.COLORS['success_tint']};
+                color: {cls.COLORS['success']};
+                border: 2px solid {cls.COLORS['success']};
+            }}
+            QLabel#statusLabel[status="warning"] {{
+                background-color: {cls.COLORS['warning_tint']};
+                color: {cls.COLORS['warning']};
+                border: 2px solid {cls.COLORS['warning']};
+            }}
+            QLabel#statusLabel[status="error"] {{
+                background-color: {cls.COLORS['error_tint']};
+                color: {cls.COLORS['error']};
+                border: 2px solid {cls.COLORS['error']};
+            }}
+        """
     
     @classmethod
-    def get_messagebox_stylesheet(cls, msg_type: str) -> str:
-        """Get message box styling"""
-        if msg_type == "success":
-            bg_color = cls.COLORS['success']
-            hover_color = cls.COLORS['success_light']
-        elif msg_type == "error":
-            bg_color = cls.COLORS['error']
-            hover_color = cls.COLORS['error_light']
-        else:
-            bg_color = cls.COLORS['warning']
-            hover_color = "#ffcd3c"
-        
+    def get_messagebox_stylesheet(cls) -> str:
+        """Get message box styling, selected by the dynamic 'msgType' property"""
         return f"""
             QMessageBox {{
                 background-color: {cls.COLORS['secondary']};
                 color: {cls.COLORS['text_primary']};
             }}
             QMessageBox QPushButton {{
-                background-color: {bg_color};
+                background-color: {cls.COLORS['warning']};
                 color: white;
                 border-radius: 5px;
                 padding: 8px 16px;
                 font-weight: bold;
             }}
             QMessageBox QPushButton:hover {{
-                background-color: {hover_color};
+                background-color: {cls.COLORS['warning_hover']};
+            }}
+            QMessageBox[msgType="success"] QPushButton {{
+                background-color: {cls.COLORS['success']};
+            }}
+            QMessageBox[msgType="success"] QPushButton:hover {{
+                background-color: {cls.COLORS['success_light']};
             }}
+            QMessageBox[msgType="error"] QPushButton {{
+                background-color: {cls.COLORS['error']};
+            }}
+            QMessageBox[msgType="error"] QPushButton:hover {{
+                background-color: {cls.COLORS['error_light']};
+            }}
+        """
+    
+    @classmethod
+    def get_complete_stylesheet(cls) -> str:
+        """Get complete stylesheet for the active theme (built once, then cached)"""
+        cached = cls._stylesheet_cache.get(cls.theme_name)
+        if cached is None:
+            cached = (
+                cls.get_main_stylesheet() +
+                cls.get_groupbox_stylesheet() +
+                cls.get_button_stylesheet() +
+                cls.get_text_stylesheet() +
+                cls.get_progressbar_stylesheet() +
+                cls.get_separator_stylesheet() +
+                cls.get_status_stylesheet() +
+                cls.get_messagebox_stylesheet()
+            )
+            cls._stylesheet_cache[cls.theme_name] = cached
+        return cached
+    
+    @classmethod
+    def available_themes(cls) -> List[str]:
+        """Names of the themes configured in app.conf"""
+        return list(get_themes())
+    
+    @classmethod
+    def set_theme(cls, name: str) -> str:
+        """Make ``name`` the active theme and return its compiled stylesheet"""
+        theme = get_theme(name)
+        cls.theme_name = theme.name
+        cls.COLORS = theme.colors
+        return cls.get_complete_stylesheet()
+    
+    @classmethod
+    def apply_theme(cls, widget, name: str) -> None:
+        """Switch ``widget`` (normally the main window) to another theme
+        
+        Existing widgets are restyled in place by a single setStyleSheet call.
+        """
+        widget.setStyleSheet(cls.set_theme(name))
+    
+    @staticmethod
+    def set_dynamic_property(widget, name: str, value: str) -> None:
+        """Set a property used by stylesheet selectors and re-polish the widget
+        
+        Re-polishing applies the already-parsed stylesheet rules for the new
+        property value; no stylesheet text is re-parsed.
         """
+        if widget.property(name) == value:
+            return
+        widget.setProperty(name, value)
+        style = widget.style()
+        style.unpolish(widget)
+        style.polish(widget)
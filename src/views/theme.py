@@ -0,0 +1,137 @@
+"""
+Theme - Color palettes loaded from config/app.conf
+
+The ``[colors]`` section defines the default "dark" theme; additional themes
+are declared as ``[theme.<name>]`` sections. Each section only needs base
+colors: hover, light, dark and translucent variants are derived once when the
+theme is loaded.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from ..core.config import read_app_config
+
+DEFAULT_THEME = "dark"
+
+# Base colors of the built-in dark theme; config values override these
+BASE_COLORS = {
+    "primary": "#4a9eff",
+    "secondary": "#2b2b2b",
+    "background": "#1e1e1e",
+    "surface": "#2a2a2a",
+    "surface_light": "#3a3a3a",
+    "text_primary": "#ffffff",
+    "text_secondary": "#cccccc",
+    "text_muted": "#aaaaaa",
+    "border": "#444444",
+    "log_background": "#1a1a1a",
+    "disabled": "#666666",
+    "disabled_text": "#999999",
+    "success": "#28a745",
+    "warning": "#ffc107",
+    "error": "#dc3545",
+    "info": "#17a2b8",
+    "clean": "#ff6b35",
+    "modify": "#28a745",
+    "run_all": "#6f42c1",
+    "restart": "#fd7e14",
+}
+
+# Colors that get hover/light/dark/tint variants
+ACCENT_COLORS = ("primary", "success", "warning", "error", "info", "clean", "modify", "run_all", "restart")
+
+
+def _to_rgb(color: str) -> Tuple[int, int, int]:
+    value = color.lstrip("#")
+    if len(value) == 3:
+        value = "".join(ch * 2 for ch in value)
+    return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+
+
+def _to_hex(rgb: Tuple[float, float, float]) -> str:
+    return "#" + "".join(f"{max(0, min(255, int(round(channel)))):02x}" for channel in rgb)
+
+
+def lighten(color: str, amount: float) -> str:
+    """Mix ``color`` towards white by ``amount`` (0..1)"""
+    return _to_hex(tuple(channel + (255 - channel) * amount for channel in _to_rgb(color)))
+
+
+def darken(color: str, amount: float) -> str:
+    """Mix ``color`` towards black by ``amount`` (0..1)"""
+    return _to_hex(tuple(channel * (1 - amount) for channel in _to_rgb(color)))
+
+
+def rgba(color: str, alpha: float) -> str:
+    """Qt stylesheet rgba() expression for ``color`` at ``alpha`` opacity"""
+    red, green, blue = _to_rgb(color)
+    return f"rgba({red}, {green}, {blue}, {alpha})"
+
+
+def derive_palette(base: Dict[str, str]) -> Dict[str, str]:
+    """Expand base colors with precomputed variants
+
+    Keys already present in ``base`` win, so a theme can pin any variant.
+    """
+    palette = dict(BASE_COLORS)
+    palette.update(base)
+
+    derived = {}
+    for name in ACCENT_COLORS:
+        color = palette[name]
+        derived[f"{name}_hover"] = lighten(color, 0.08)
+        derived[f"{name}_light"] = lighten(color, 0.12)
+        derived[f"{name}_dark"] = darken(color, 0.15)
+        derived[f"{name}_darker"] = darken(color, 0.35)
+        derived[f"{name}_tint"] = rgba(color, 0.2)
+        derived[f"{name}_wash"] = rgba(color, 0.1)
+        derived[f"{name}_wash_light"] = rgba(color, 0.05)
+    derived["disabled_dark"] = darken(palette["disabled"], 0.33)
+
+    derived.update(base)
+    palette.update(derived)
+    return palette
+
+
+@dataclass(frozen=True)
+class Theme:
+    """A named, fully derived color palette"""
+    name: str
+    colors: Dict[str, str]
+
+
+def _section_colors(section) -> Dict[str, str]:
+    return {key: value.strip().strip('"').strip("'") for key, value in section.items()}
+
+
+def load_themes(config=None) -> Dict[str, Theme]:
+    """Load the default theme from [colors] and extra themes from [theme.<name>]"""
+    config = config if config is not None else read_app_config()
+
+    base = _section_colors(config["colors"]) if config.has_section("colors") else {}
+    themes = {DEFAULT_THEME: Theme(DEFAULT_THEME, derive_palette(base))}
+
+    for section in config.sections():
+        if section.startswith("theme."):
+            name = section.split(".", 1)[1]
+            themes[name] = Theme(name, derive_palette(_section_colors(config[section])))
+
+    return themes
+
+
+_themes: Optional[Dict[str, Theme]] = None
+
+
+def get_themes() -> Dict[str, Theme]:
+    """All configured themes (loaded and derived once)"""
+    global _themes
+    if _themes is None:
+        _themes = load_themes()
+    return _themes
+
+
+def get_theme(name: Optional[str] = None) -> Theme:
+    """Theme by name, falling back to the default theme"""
+    themes = get_themes()
+    return themes.get(name or DEFAULT_THEME, themes[DEFAULT_THEME])
@@ -0,0 +1,11 @@
+"""
+Shared pytest configuration
+"""
+
+import sys
+from pathlib import Path
+
+# Make the ``src`` and ``benchmarks`` packages importable without installation
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
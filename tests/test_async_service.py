@@ -0,0 +1,101 @@
+"""
+Tests for the asyncio facade over VSCodeService
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.services.async_service import AsyncVSCodeService, run_concurrently
+from benchmarks import fixtures
+
+
+def test_many_installations_from_one_loop(tmp_path):
+    user_dirs = [fixtures.make_user_dir(tmp_path / f"target{i}", rows=300, match_ratio=0.1) for i in range(3)]
+    services = [AsyncVSCodeService(user_dir) for user_dir in user_dirs]
+
+    async def clean(service):
+        before = await service.status()
+        result = await service.clean_database(timeout=60)
+        await service.wait_for_backups(timeout=30)
+        return before, result, await service.status()
+
+    outcomes = asyncio.run(run_concurrently(*(clean(service) for service in services), timeout=120))
+
+    for before, result, after in outcomes:
+        assert result.success, result.error
+        assert before["services"]["database"]["info"]["augment_entries"] == result.entries_affected > 0
+        assert after["services"]["database"]["info"]["augment_entries"] == 0
+
+
+def test_changes_are_serialized_and_timeouts_abandon_the_wait(tmp_path):
+    service = AsyncVSCodeService(fixtures.make_user_dir(tmp_path, rows=10))
+    active, overlaps, lock = [], [], threading.Lock()
+
+    def slow_change(name):
+        with lock:
+            active.append(name)
+            overlaps.append(len(active))
+        time.sleep(0.2)
+        with lock:
+            active.remove(name)
+        return name
+
+    service.service.clean_database = lambda: slow_change("clean")
+    service.service.modify_telemetry_ids = lambda: slow_change("ids")
+
+    async def scenario():
+        # The clean gives up waiting but keeps the lock until its thread is done
+        with pytest.raises(asyncio.TimeoutError):
+            await service.clean_database(timeout=0.05)
+        started = time.perf_counter()
+        ids, status = await run_concurrently(service.modify_telemetry_ids(), service.status())
+        assert ids == "ids" and status["installed"]
+        assert time.perf_counter() - started >= 0.1
+
+        # One failure cancels its siblings
+        cancelled = []
+
+        async def sleeper():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def failing():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await run_concurrently(sleeper(), failing())
+        assert cancelled == [True]
+        with pytest.raises(asyncio.TimeoutError):
+            await run_concurrently(sleeper(), timeout=0.05)
+
+    asyncio.run(scenario())
+    assert max(overlaps) == 1
+
+
+def test_status_reads_run_during_a_clean(tmp_path):
+    service = AsyncVSCodeService(fixtures.make_user_dir(tmp_path, rows=20000, match_ratio=0.1))
+
+    async def poll(clean):
+        statuses = []
+        while not clean.done():
+            statuses.append(await service.status(timeout=30))
+        return statuses
+
+    async def scenario():
+        clean = asyncio.ensure_future(service.clean_database(timeout=60))
+        statuses, result = await run_concurrently(poll(clean), clean, timeout=120)
+        await service.wait_for_backups(timeout=30)
+        return statuses, result
+
+    statuses, result = asyncio.run(scenario())
+    assert result.success, result.error
+    assert statuses
+    for status in statuses:
+        info = status["services"]["database"]["info"]
+        assert info["accessible"], info
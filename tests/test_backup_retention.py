@@ -0,0 +1,147 @@
+"""
+Tests for the backup index and retention policies
+"""
+
+import os
+import time
+
+from src.core.backups import file_checksum
+from src.services.backup_service import MANIFEST_NAME, BackupService, RetentionPolicy, wait_for_background
+from src.services.vscode_service import VSCodeService
+from benchmarks import fixtures
+
+
+def _make_backup(directory, name, size=100, age_days=0.0):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    stamp = time.time() - age_days * 86400
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def _names(records):
+    return sorted(record.name for record in records)
+
+
+def test_keep_count_applies_per_source(tmp_path):
+    for day in (1, 2, 3):
+        _make_backup(tmp_path, f"state.vscdb.backup_2026010{day}_000000")
+        _make_backup(tmp_path, f"storage.json.backup_2026010{day}_000000")
+    service = BackupService(tmp_path, "backup")
+
+    expired = service.select_expired(RetentionPolicy(keep_count=2))
+    assert _names(expired) == ["state.vscdb.backup_20260101_000000", "storage.json.backup_20260101_000000"]
+
+    expired = service.select_expired(RetentionPolicy(keep_count=2, per_source=False))
+    assert len(expired) == 4
+
+
+def test_cleanup_old_backups_counts_across_sources(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=10)
+    storage_dir = user_dir / "globalStorage"
+    for day in (1, 2, 3):
+        _make_backup(storage_dir, f"state.vscdb.backup_2026010{day}_000000", age_days=4 - day)
+        _make_backup(storage_dir, f"storage.json.backup_2026010{day}_000000", age_days=4 - day)
+
+    service = VSCodeService(user_dir)
+    assert service.cleanup_old_backups(keep_count=2) == 4
+    assert sorted(info["name"] for info in service.get_backup_files()) == [
+        "state.vscdb.backup_20260103_000000", "storage.json.backup_20260103_000000"
+    ]
+
+
+def test_age_and_size_limits_keep_newest_backup(tmp_path):
+    _make_backup(tmp_path, "state.vscdb.backup_20250101_000000", size=1000)
+    _make_backup(tmp_path, "state.vscdb.backup_20250102_000000", size=1000)
+    _make_backup(tmp_path, "state.vscdb.backup_20250103_000000", size=1000)
+    service = BackupService(tmp_path, "backup")
+
+    # Every backup is older than a day, but the newest one is always kept
+    expired = service.select_expired(RetentionPolicy(max_age_days=1))
+    assert _names(expired) == ["state.vscdb.backup_20250101_000000", "state.vscdb.backup_20250102_000000"]
+
+    expired = service.select_expired(RetentionPolicy(max_total_bytes=2000))
+    assert _names(expired) == ["state.vscdb.backup_20250101_000000"]
+
+
+def test_prune_deletes_files_and_updates_manifest(tmp_path):
+    for day in (1, 2, 3):
+        _make_backup(tmp_path, f"state.vscdb.backup_2026010{day}_000000")
+    (tmp_path / "state.vscdb").write_bytes(b"db")
+    service = BackupService(tmp_path, "backup")
+
+    result = service.prune(RetentionPolicy(keep_count=1))
+
+    assert result.success
+    assert len(result.removed) == 2 and result.bytes_freed == 200
+    assert (tmp_path / "state.vscdb").exists()
+    assert _names(BackupService(tmp_path, "backup").list_backups()) == ["state.vscdb.backup_20260103_000000"]
+
+
+def test_manifest_records_are_not_restatted(tmp_path):
+    path = _make_backup(tmp_path, "state.vscdb.backup", size=10)
+    service = BackupService(tmp_path, "backup")
+    assert service.list_backups()[0].size == 10
+    assert (tmp_path / MANIFEST_NAME).exists()
+
+    # A fresh index trusts the manifest for files it already knows
+    path.write_bytes(b"x" * 50)
+    assert BackupService(tmp_path, "backup").list_backups()[0].size == 10
+
+    # ...and drops entries whose files were removed outside the application
+    path.unlink()
+    assert BackupService(tmp_path, "backup").list_backups() == []
+
+
+def test_operations_prune_automatically(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=200)
+    storage_dir = user_dir / "globalStorage"
+    for day in range(1, 9):
+        _make_backup(storage_dir, f"state.vscdb.backup_2026010{day}_000000")
+
+    service = VSCodeService(user_dir)
+    result = service.clean_database()
+
+    assert result.success
+    assert service.wait_for_backups(timeout=30)
+    remaining = [info["name"] for info in service.get_backup_files() if info["source"] == "state.vscdb"]
+    assert service.backup_service.locate(result.backup_path).name in remaining
+    assert len(remaining) == 5
+
+
+def test_snapshot_is_finalized_in_the_background(tmp_path):
+    snapshot = tmp_path / "state.vscdb.backup_20260101_000000"
+    snapshot.write_bytes(b"SQLite format 3\x00" + b"x" * 100000)
+    other = _make_backup(tmp_path, "storage.json.backup_20260101_000000")
+    service = BackupService(tmp_path, "backup")
+
+    record = service.register_snapshot(snapshot)
+    service.register_snapshot(other)
+    assert record.state == "snapshot" and record.checksum is None
+    assert len(service.pending()) == 2
+
+    futures = service.schedule_finalize()
+    assert service.schedule_finalize() == []
+    assert wait_for_background(timeout=30)
+    assert all(future.result() for future in futures)
+
+    stored = service.get(snapshot.name + ".gz")
+    assert stored.state == "stored"
+    assert stored.checksum == file_checksum(tmp_path / stored.name)
+    assert stored.size < record.size
+    assert not snapshot.exists()
+    assert service.pending() == []
+    assert service.locate(snapshot) == tmp_path / stored.name
+    # A second service on the same directory sees the finished records
+    assert BackupService(tmp_path, "backup").get(stored.name) == stored
+
+
+def test_finalize_without_compression_only_checksums(tmp_path):
+    snapshot = _make_backup(tmp_path, "storage.json.backup_20260101_000000")
+    service = BackupService(tmp_path, "backup")
+    service.register_snapshot(snapshot)
+
+    record = service.finalize(snapshot.name, compress=False)
+
+    assert record.state == "stored"
+    assert record.checksum == file_checksum(snapshot)
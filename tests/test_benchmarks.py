@@ -0,0 +1,61 @@
+"""
+Smoke tests for the benchmark fixtures and harness (small sizes only)
+"""
+
+import json
+import sqlite3
+
+from benchmarks import fixtures
+from benchmarks.harness import BenchmarkResult, append_history, find_regressions, load_history, run_suite
+
+
+def test_state_db_fixture_matches_requested_shape(tmp_path):
+    db_path = fixtures.make_state_db(tmp_path / "state.vscdb", rows=2000, match_ratio=0.25, value_size=128)
+
+    connection = sqlite3.connect(str(db_path))
+    try:
+        total = connection.execute("SELECT COUNT(*) FROM ItemTable").fetchone()[0]
+        matching = connection.execute("SELECT COUNT(*) FROM ItemTable WHERE key LIKE '%augment%'").fetchone()[0]
+        value_length = connection.execute("SELECT length(value) FROM ItemTable LIMIT 1").fetchone()[0]
+    finally:
+        connection.close()
+
+    assert total == 2000
+    assert 400 < matching < 600
+    assert value_length == 128
+
+
+def test_storage_json_fixture_reaches_target_size(tmp_path):
+    path = fixtures.make_storage_json(tmp_path / "storage.json", target_size=64 * 1024)
+
+    content = json.loads(path.read_text(encoding="utf-8"))
+    assert len(content["telemetry.machineId"]) == 64
+    assert path.stat().st_size >= 64 * 1024
+
+
+def test_parse_size():
+    assert fixtures.parse_size("512") == 512
+    assert fixtures.parse_size("64KB") == 64 * 1024
+    assert fixtures.parse_size("1.5mb") == int(1.5 * 1024 ** 2)
+
+
+def test_suite_runs_and_records_history(tmp_path):
+    results = run_suite(rows=[500], repeat=1, only=["database.remove", "service.run_all"])
+    assert [result.name for result in results] == ["database.remove", "service.run_all"]
+    assert all(result.best >= 0 for result in results)
+
+    history_path = tmp_path / "history.json"
+    append_history(history_path, results)
+    assert len(load_history(history_path)) == 1
+
+
+def test_find_regressions_compares_same_params():
+    params = {"rows": 10}
+    history = [{"commit": "abc", "results": [{"name": "database.count", "params": params, "median": 1.0}]}]
+
+    slower = BenchmarkResult("database.count", params, [1.5])
+    similar = BenchmarkResult("database.count", params, [1.1])
+    other_size = BenchmarkResult("database.count", {"rows": 20}, [5.0])
+
+    assert [r["name"] for r in find_regressions(history, [slower])] == ["database.count"]
+    assert find_regressions(history, [similar, other_size]) == []
@@ -0,0 +1,39 @@
+"""
+Tests for keyset-paged ItemTable browsing
+"""
+
+import json
+import sqlite3
+
+from src.services.browser_service import ItemTableReader, format_value
+from benchmarks import fixtures
+
+
+def test_pages_cover_every_key_once_in_order(tmp_path):
+    db_path = fixtures.make_state_db(tmp_path / "state.vscdb", rows=1000, value_size=100)
+    reader = ItemTableReader(db_path)
+    keys, after = [], None
+    try:
+        while True:
+            page = reader.page(after, limit=64)
+            keys.extend(row.key for row in page)
+            if len(page) < 64:
+                break
+            after = page[-1].key
+        first = reader.page(limit=1)[0]
+        value = reader.value(first.key)
+    finally:
+        reader.close()
+
+    connection = sqlite3.connect(str(db_path))
+    expected = [row[0] for row in connection.execute("SELECT key FROM ItemTable ORDER BY key")]
+    connection.close()
+    assert keys == expected
+    assert first.size == len(value.encode("utf-8"))
+
+
+def test_format_value():
+    assert format_value('{"a":[1,2]}') == json.dumps({"a": [1, 2]}, indent=2)
+    assert format_value(b"not json") == "not json"
+    assert format_value(None) == "NULL"
+    assert format_value("x" * 20, limit=8) == "x" * 8 + "\n… (truncated)"
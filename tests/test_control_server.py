@@ -0,0 +1,140 @@
+"""
+Tests for the local JSON-RPC control server
+"""
+
+import asyncio
+import json
+import socket
+import stat
+import sys
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from src.core import metrics
+from src.core.server import ControlClient, ControlError, ControlServer, METHOD_NOT_FOUND, SERVER_ERROR, UNAUTHORIZED
+from src.services.async_service import AsyncVSCodeService
+from benchmarks import fixtures
+
+
+@contextmanager
+def _running_server(user_dir, endpoint_file, **options):
+    """A ControlServer on its own event loop thread"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = ControlServer(AsyncVSCodeService(user_dir), endpoint_file=endpoint_file, **options)
+    try:
+        asyncio.run_coroutine_threadsafe(server.start(), loop).result(10)
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(10)
+        loop.close()
+
+
+def test_tcp_requires_token_and_streams_progress(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=500, match_ratio=0.1)
+    endpoint_file = tmp_path / "server.json"
+    metrics.enable()
+    try:
+        with _running_server(user_dir, endpoint_file, port=0) as server:
+            endpoint = json.loads(endpoint_file.read_text())
+            assert endpoint["host"] == "127.0.0.1" and endpoint["token"] == server.token
+            assert stat.S_IMODE(endpoint_file.stat().st_mode) == 0o600
+
+            anonymous_endpoint = {"host": endpoint["host"], "port": endpoint["port"]}
+            with ControlClient(anonymous_endpoint, timeout=10) as anonymous:
+                with pytest.raises(ControlError) as denied:
+                    anonymous.call("status")
+                assert denied.value.code == UNAUTHORIZED
+            with pytest.raises(ControlError):
+                ControlClient({**endpoint, "token": "wrong"}, timeout=10)
+
+            with ControlClient.from_endpoint_file(endpoint_file, timeout=30) as client:
+                status = client.call("status")
+                assert status["services"]["database"]["info"]["augment_entries"] > 0
+
+                events = []
+                result = client.call("clean", on_event=events.append, target="database")
+                assert result["success"] and result["entries_affected"] > 0
+                assert events[0] == {"id": 3, "event": "started", "method": "clean"}  # 1 authenticated
+                assert any(event["event"] == "span" and event["span"]["name"].startswith("database.")
+                           for event in events)
+
+                backups = client.call("backups")
+                # The snapshot, or the .gz it is being compressed into
+                assert len(backups) == 1 and backups[0]["path"].startswith(result["backup_path"])
+                restored = client.call("restore", backup=result["backup_path"])
+                assert restored["success"], restored
+                assert client.call("status")["services"]["database"]["info"]["augment_entries"] > 0
+        assert not endpoint_file.exists()
+    finally:
+        metrics.disable()
+
+
+async def failing_status(timeout=None):
+    raise KeyError("services")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix sockets only")
+def test_unix_socket_and_errors(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=300)
+    socket_path = tmp_path / "control.sock"
+
+    with _running_server(user_dir, tmp_path / "server.json", socket_path=socket_path) as server:
+        assert server.token is None and stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+        with ControlClient(server.endpoint, timeout=30) as client:
+            events = []
+            report = client.call("diagnose", on_event=events.append, use_cache=False)
+            assert report["success"] and report["integrity"] == "ok"
+            assert events[0]["event"] == "started"
+
+            with pytest.raises(ControlError) as unknown:
+                client.call("vacuum")
+            assert unknown.value.code == METHOD_NOT_FOUND
+            with pytest.raises(ControlError, match="target must be one of"):
+                client.call("clean", target="everything")
+            with pytest.raises(ControlError, match="backup is required"):
+                client.call("restore")
+            with pytest.raises(ControlError, match="use_cache must be a bool"):
+                client.call("diagnose", use_cache="no")
+            with pytest.raises(ControlError, match="unexpected force"):
+                client.call("status", force=True)
+            # A failure inside an operation is the server's, not the caller's
+            server.service.status = failing_status
+            with pytest.raises(ControlError) as failed:
+                client.call("status")
+            assert failed.value.code == SERVER_ERROR and "KeyError" in failed.value.message
+            del server.service.status
+            # The connection survives errors
+            assert client.call("status")["installed"]
+    assert not socket_path.exists()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix sockets only")
+def test_socket_path_is_only_replaced_when_stale(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=10)
+    socket_path = tmp_path / "control.sock"
+
+    socket_path.write_text("not a socket")
+    server = ControlServer(AsyncVSCodeService(user_dir), socket_path=socket_path, endpoint_file=tmp_path / "a.json")
+    with pytest.raises(FileExistsError):
+        asyncio.run(server.start())
+    asyncio.run(server.close())
+    assert socket_path.read_text() == "not a socket"
+
+    # Left behind by a server that did not shut down cleanly
+    socket_path.unlink()
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+    with _running_server(user_dir, tmp_path / "b.json", socket_path=socket_path):
+        assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+        second = ControlServer(AsyncVSCodeService(user_dir), socket_path=socket_path, endpoint_file=tmp_path / "c.json")
+        with pytest.raises(OSError, match="Another server"):
+            asyncio.run(second.start())
+        with ControlClient({"socket": str(socket_path)}, timeout=30) as client:
+            assert client.call("status")["installed"]
@@ -0,0 +1,53 @@
+"""
+Tests for database diagnostics
+"""
+
+import sqlite3
+
+from src.services.diagnostics_service import DiagnosticsService, key_prefix
+from benchmarks import fixtures
+
+
+def test_key_prefix():
+    assert key_prefix("ms-python.python.interpreter") == "ms-python.python"
+    assert key_prefix("memento/webviewView.augment-chat") == "memento/webviewView"
+    assert key_prefix("singleKey") == "singleKey"
+    assert key_prefix("a.b.c", segments=1) == "a"
+
+
+def test_report_covers_pages_tables_and_prefixes(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=2000, match_ratio=0.25)
+    state_db = user_dir / "globalStorage" / "state.vscdb"
+    partials = []
+
+    report = DiagnosticsService(cache_dir=tmp_path / "cache").run(state_db, on_progress=partials.append)
+
+    assert report.complete, report.error
+    assert report.integrity == "ok"
+    assert report.page_count * report.page_size == report.file_size
+    assert report.rows_scanned == 2000
+    assert sum(usage.rows for usage in report.prefixes) <= 2000
+    assert report.prefixes == sorted(report.prefixes, key=lambda usage: usage.bytes, reverse=True)
+    assert partials[-1] is report
+    if report.tables:
+        assert "ItemTable" in report.tables
+
+
+def test_cached_until_the_database_changes(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=500)
+    state_db = user_dir / "globalStorage" / "state.vscdb"
+    service = DiagnosticsService(cache_dir=tmp_path / "cache")
+
+    first = service.run(state_db)
+    second = service.run(state_db)
+    assert not first.cached and second.cached
+    assert second.prefixes == first.prefixes
+
+    connection = sqlite3.connect(str(state_db))
+    with connection:
+        connection.execute("DELETE FROM ItemTable")
+    connection.close()
+
+    third = service.run(state_db)
+    assert not third.cached
+    assert third.rows_scanned == 0
@@ -0,0 +1,57 @@
+"""
+Tests for the database diff engine
+"""
+
+import gzip
+import shutil
+import sqlite3
+
+from src.services.diff_service import DiffService
+from src.services.vscode_service import VSCodeService
+from benchmarks import fixtures
+
+
+def _edit(db_path):
+    connection = sqlite3.connect(str(db_path))
+    with connection:
+        keys = [row[0] for row in connection.execute("SELECT key FROM ItemTable ORDER BY key LIMIT 3")]
+        connection.execute("DELETE FROM ItemTable WHERE key = ?", (keys[0],))
+        connection.execute("UPDATE ItemTable SET value = ? WHERE key = ?", ("x" * 1000, keys[1]))
+        # Same bytes stored as BLOB instead of TEXT is not a change
+        connection.execute("UPDATE ItemTable SET value = CAST(value AS BLOB) WHERE key = ?", (keys[2],))
+        connection.execute("INSERT INTO ItemTable (key, value) VALUES ('zzz.new', 'abc')")
+    connection.close()
+    return keys
+
+
+def test_diff_reports_added_removed_and_changed(tmp_path):
+    old = fixtures.make_state_db(tmp_path / "old.vscdb", rows=500, value_size=100)
+    new = tmp_path / "new.vscdb"
+    shutil.copy(old, new)
+    keys = _edit(new)
+    seen = []
+
+    result = DiffService().diff(old, new, on_change=seen.append)
+
+    assert result.success, result.error
+    assert (result.added, result.removed, result.changed, result.unchanged) == (1, 1, 1, 498)
+    changes = {change.key: change for change in result.changes}
+    assert changes[keys[0]].change == "removed" and changes[keys[0]].old_size == 100
+    assert changes[keys[1]].change == "changed" and changes[keys[1]].size_delta == 900
+    assert changes["zzz.new"].change == "added" and changes["zzz.new"].new_size == 3
+    assert result.size_delta == 900 + 3 - 100
+    assert seen == result.changes
+
+
+def test_diff_against_compressed_backup(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=300, match_ratio=0.1)
+    service = VSCodeService(user_dir)
+    cleaned = service.clean_database()
+    assert service.wait_for_backups(timeout=30)
+
+    result = service.diff_databases(cleaned.backup_path, max_changes=5)
+
+    assert result.success, result.error
+    assert result.old_path.name.endswith(".gz")
+    assert result.removed == cleaned.entries_affected > 5 and result.added == result.changed == 0
+    assert len(result.changes) == 5 and result.truncated
@@ -0,0 +1,78 @@
+"""
+Tests for the operation executor's per-file scheduling
+"""
+
+import threading
+
+import pytest
+
+from src.core.executor import OperationExecutor, Task
+
+TIMEOUT = 5
+
+
+def _blocking(name, events, release, **kwargs):
+    """Task that records its start and then waits for ``release``"""
+    def run(progress):
+        events.append(f"start {name}")
+        progress(f"{name} running", "info")
+        assert release.wait(TIMEOUT)
+        events.append(f"end {name}")
+        return name
+    return Task(name, run, **kwargs)
+
+
+def test_reads_share_files_and_writes_are_serialized(tmp_path):
+    db, other = tmp_path / "state.vscdb", tmp_path / "storage.json"
+    executor = OperationExecutor(max_workers=4)
+    both_reading = threading.Barrier(2, timeout=TIMEOUT)
+
+    def read(progress):
+        both_reading.wait()  # only passes if the two reads overlap
+        return "read"
+
+    try:
+        reads = [executor.submit(Task(f"read{i}", read, [db])) for i in range(2)]
+        assert [future.result(TIMEOUT) for future in reads] == ["read", "read"]
+
+        events, release = [], threading.Event()
+        write = _blocking("write", events, release, targets=[db], mutating=True)
+        first = executor.submit(write)
+        later_read = _blocking("late-read", events, release, targets=[db])
+        assert executor.blockers(later_read) == [write]
+        second = executor.submit(later_read)
+        # A write on another file is not held up by either
+        elsewhere = executor.submit(Task("other", lambda progress: "other", [other], mutating=True))
+        assert elsewhere.result(TIMEOUT) == "other"
+        assert not second.running() and not second.done()
+
+        release.set()
+        assert first.result(TIMEOUT) == "write" and second.result(TIMEOUT) == "late-read"
+        assert events == ["start write", "end write", "start late-read", "end late-read"]
+        assert executor.idle
+    finally:
+        executor.shutdown()
+
+
+def test_progress_errors_and_shutdown(tmp_path):
+    db = tmp_path / "state.vscdb"
+    executor = OperationExecutor(max_workers=2)
+    messages, events, release = [], [], threading.Event()
+
+    def fail(progress):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        executor.submit(Task("fail", fail, [db], mutating=True)).result(TIMEOUT)
+
+    running = executor.submit(_blocking("write", events, release, targets=[db], mutating=True),
+                              progress=lambda message, kind: messages.append((message, kind)))
+    queued = executor.submit(Task("queued", lambda progress: "never", [db], mutating=True))
+    assert [task.name for task in executor.pending] == ["queued"]
+
+    threading.Timer(0.1, release.set).start()
+    executor.shutdown(wait=True)
+    assert running.result(TIMEOUT) == "write" and queued.cancelled()
+    assert messages == [("write running", "info")]
+    with pytest.raises(RuntimeError):
+        executor.submit(Task("late", lambda progress: None))
@@ -0,0 +1,41 @@
+"""
+Tests for extension storage folder cleanup
+"""
+
+import tarfile
+
+from src.models.database_model import compile_like
+from src.services.extension_service import ExtensionStorageService
+
+
+def test_compile_like_matches_sqlite_semantics():
+    pattern = compile_like("%augment%")
+    assert pattern.fullmatch("Augment.vscode-augment")
+    assert pattern.fullmatch("augment")
+    assert not pattern.fullmatch("ms-python.python")
+    assert compile_like("a_c").fullmatch("abc")
+    assert not compile_like("a_c").fullmatch("a.bc")
+    assert compile_like("50.0%").fullmatch("50.0 percent")
+
+
+def test_clean_archives_then_removes(tmp_path):
+    for name in ("augment.vscode-augment", "ms-python.python"):
+        folder = tmp_path / name / "cache"
+        folder.mkdir(parents=True)
+        for index in range(20):
+            (folder / f"{index}.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "augment-notes.txt").write_text("not a folder", encoding="utf-8")
+    service = ExtensionStorageService(tmp_path, "%augment%", "backup")
+
+    assert [storage.name for storage in service.find_matching()] == ["augment.vscode-augment"]
+
+    result = service.clean(archive=True)
+
+    assert result.success
+    assert result.directories_removed == ["augment.vscode-augment"]
+    assert result.files_removed == 20
+    assert not (tmp_path / "augment.vscode-augment").exists()
+    assert (tmp_path / "ms-python.python").exists()
+    assert (tmp_path / "augment-notes.txt").exists()
+    with tarfile.open(result.archives[0]) as archive:
+        assert len([member for member in archive.getmembers() if member.isfile()]) == 20
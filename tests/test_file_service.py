@@ -0,0 +1,96 @@
+"""
+Tests for FileService directory walking and copying
+"""
+
+from src.services.file_service import FileService
+
+
+def _naive_size(root):
+    return sum(path.stat().st_size for path in root.rglob("*") if path.is_file())
+
+
+def _make_tree(root):
+    for top in range(4):
+        for sub in range(3):
+            directory = root / f"top{top}" / f"sub{sub}"
+            directory.mkdir(parents=True)
+            for index in range(5):
+                (directory / f"file{index}").write_bytes(b"x" * (top * 100 + sub * 10 + index))
+    (root / "loose.txt").write_bytes(b"y" * 7)
+
+
+def test_directory_size_matches_rglob(tmp_path):
+    _make_tree(tmp_path)
+    expected = _naive_size(tmp_path)
+
+    assert FileService.calculate_directory_size(tmp_path) == expected
+    assert FileService.calculate_directory_size(tmp_path, max_workers=1) == expected
+
+
+def test_directory_size_cache_sees_new_files(tmp_path):
+    _make_tree(tmp_path)
+    FileService.clear_size_cache()
+    first = FileService.calculate_directory_size(tmp_path, use_cache=True)
+    assert FileService.calculate_directory_size(tmp_path, use_cache=True) == first
+
+    # Adding a file changes its directory's mtime, invalidating that listing
+    (tmp_path / "top2" / "sub1" / "new").write_bytes(b"z" * 1000)
+    assert FileService.calculate_directory_size(tmp_path, use_cache=True) == first + 1000
+
+
+def test_directory_size_of_missing_directory(tmp_path):
+    assert FileService.calculate_directory_size(tmp_path / "missing") == 0
+
+
+def test_remove_tree_reports_progress(tmp_path):
+    _make_tree(tmp_path)
+    expected_bytes = _naive_size(tmp_path)
+    outside = tmp_path.parent / f"{tmp_path.name}-outside"
+    outside.mkdir()
+    (outside / "keep").write_bytes(b"k")
+    (tmp_path / "top0" / "link").symlink_to(outside, target_is_directory=True)
+    calls = []
+
+    stats = FileService.remove_tree(tmp_path, progress=lambda files, size: calls.append((files, size)),
+                                    progress_every=10)
+
+    assert stats.success
+    assert stats.files == 62  # 61 files plus the symlink
+    assert stats.bytes >= expected_bytes
+    assert calls[-1] == (stats.files, stats.bytes)
+    assert len(calls) > 1
+    assert not tmp_path.exists()
+    assert (outside / "keep").exists()
+
+
+def test_cleanup_missing_temp_directory(tmp_path):
+    assert FileService.cleanup_temp_directory(tmp_path / "missing")
+
+
+def test_copy_file_every_strategy(tmp_path):
+    from src.core.fastcopy import STRATEGIES, copy_file
+
+    source = tmp_path / "source.bin"
+    data = bytes(range(256)) * 4099
+    source.write_bytes(data)
+
+    used = set()
+    for strategy in STRATEGIES:
+        destination = tmp_path / f"copy-{strategy}"
+        stats = copy_file(source, destination, strategies=(strategy, "buffered"))
+        assert stats.success, stats.error
+        assert destination.read_bytes() == data
+        assert destination.stat().st_mtime_ns == source.stat().st_mtime_ns
+        used.add(stats.strategy)
+    assert "buffered" in used
+
+
+def test_copy_file_failure_leaves_no_destination(tmp_path):
+    source = tmp_path / "missing"
+    destination = tmp_path / "copy"
+
+    stats = FileService.copy_file(source, destination)
+
+    assert not stats.success and stats.error
+    assert not destination.exists()
+    assert FileService.create_backup(tmp_path / "missing") is None
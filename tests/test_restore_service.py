@@ -0,0 +1,92 @@
+"""
+Tests for verified backup restores
+"""
+
+import sqlite3
+
+from src.core.backups import file_checksum
+from src.services.extension_service import ExtensionStorage, ExtensionStorageService
+from src.services.restore_service import RestoreService
+from src.services.vscode_service import VSCodeService
+from benchmarks import fixtures
+
+
+def _count_rows(db_path):
+    connection = sqlite3.connect(str(db_path))
+    try:
+        return connection.execute("SELECT COUNT(*) FROM ItemTable").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_database_backups_get_unique_names_and_restore(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=1000, match_ratio=0.2)
+    state_db = user_dir / "globalStorage" / "state.vscdb"
+    service = VSCodeService(user_dir)
+
+    first = service.clean_database()
+    second = service.clean_database()
+    assert first.backup_path != second.backup_path
+    assert _count_rows(state_db) < 1000
+
+    # Snapshots are compressed in the background; restore finds the .gz by the original name
+    assert service.wait_for_backups(timeout=30)
+    assert service.backup_service.locate(first.backup_path).name.endswith(".gz")
+    result = service.restore_backup(first.backup_path)
+
+    assert result.success, result.error
+    assert result.checks == ["checksum: ok", "quick_check: ok"]
+    assert _count_rows(state_db) == 1000
+    assert service.backup_service.locate(result.safety_backup).exists()
+    assert not list(state_db.parent.glob(".state.vscdb.restore-*"))
+
+
+def test_modified_backup_is_rejected(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=200)
+    storage_json = user_dir / "globalStorage" / "storage.json"
+    service = VSCodeService(user_dir)
+    snapshot = service.modify_telemetry_ids().backup_path
+    assert service.wait_for_backups(timeout=30)
+    backup_path = service.backup_service.locate(snapshot)
+    current = storage_json.read_bytes()
+
+    with open(backup_path, "ab") as f:
+        f.write(b" ")
+    result = service.restore_backup(backup_path)
+
+    assert not result.success
+    assert "Checksum mismatch" in result.message
+    assert storage_json.read_bytes() == current
+
+
+def test_corrupt_database_fails_quick_check(tmp_path):
+    backup_path = fixtures.make_state_db(tmp_path / "state.vscdb.backup_20260101_000000", rows=5000)
+    target = tmp_path / "state.vscdb"
+    target.write_bytes(b"current")
+    with open(backup_path, "r+b") as f:
+        f.seek(4096 * 3)
+        f.write(b"\xff" * 4096)
+
+    result = RestoreService().restore(backup_path, target, file_checksum(backup_path))
+
+    assert not result.success
+    assert target.read_bytes() == b"current"
+
+
+def test_archive_restore_replaces_folder(tmp_path):
+    folder = tmp_path / "augment.vscode-augment"
+    folder.mkdir()
+    (folder / "state.json").write_text("old", encoding="utf-8")
+    archive_path = ExtensionStorageService(tmp_path, backup_suffix="backup").archive(
+        ExtensionStorage(folder.name, folder)
+    )
+    (folder / "state.json").write_text("new", encoding="utf-8")
+    (folder / "extra.json").write_text("{}", encoding="utf-8")
+
+    result = RestoreService("backup").restore(archive_path, folder, file_checksum(archive_path))
+
+    assert result.success, result.error
+    assert (folder / "state.json").read_text(encoding="utf-8") == "old"
+    assert not (folder / "extra.json").exists()
+    assert result.safety_backup.exists()
+    assert sorted(path.name for path in tmp_path.iterdir() if path.name.startswith(".")) == []
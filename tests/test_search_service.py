@@ -0,0 +1,101 @@
+"""
+Tests for the full-text search index
+"""
+
+import sqlite3
+
+from src.core.config import configure
+from src.services.search_service import SearchService
+from src.services.vscode_service import VSCodeService
+from benchmarks import fixtures
+
+
+def _keys(result):
+    assert result.success, result.error
+    return {hit.key for hit in result.hits}
+
+
+def _state_db(tmp_path):
+    db_path = fixtures.make_state_db(tmp_path / "state.vscdb", rows=2000, match_ratio=0.05)
+    connection = sqlite3.connect(str(db_path))
+    with connection:
+        connection.executemany("INSERT INTO ItemTable (key, value) VALUES (?, ?)", [
+            ("workbench.views.state", '[{"id": "workbench.view.extension.augment-panel", "isHidden": false}]'),
+            ("notes", "The Augment Chat panel"),
+            ("binary", b"\xff\xfe augment-bytes"),
+        ])
+    connection.close()
+    return db_path
+
+
+def test_substring_and_token_queries(tmp_path):
+    db_path = _state_db(tmp_path)
+    service = SearchService(cache_dir=tmp_path / "cache")
+
+    assert _keys(service.search(db_path, "extension.augment-pan", scope="value")) == {"workbench.views.state"}
+    assert _keys(service.search(db_path, "AUGMENT CHAT", scope="value")) == {"notes"}
+    assert _keys(service.search(db_path, "augment-bytes")) == {"binary"}
+    assert _keys(service.search(db_path, "workbench AND state", mode="token")) == {"workbench.views.state"}
+    assert _keys(service.search(db_path, "notes", mode="token", scope="key")) == {"notes"}
+    assert not service.search(db_path, "chat", mode="token", scope="value").success
+    # Shorter than a trigram: answered without the index
+    assert "notes" in _keys(service.search(db_path, "Th", scope="value", limit=5000))
+
+    limited = service.search(db_path, "augment", scope="key", limit=10)
+    assert len(limited.hits) == 10 and limited.truncated
+
+    invalid = service.search(db_path, "notes AND (", mode="token")
+    assert not invalid.success and invalid.message == "Invalid search query"
+
+
+def test_index_is_updated_incrementally(tmp_path):
+    db_path = _state_db(tmp_path)
+    service = SearchService(cache_dir=tmp_path / "cache")
+
+    first = service.search(db_path, "chat")
+    assert first.index.rebuilt and first.index.rows == 2003
+    assert service.search(db_path, "chat").index.up_to_date
+
+    connection = sqlite3.connect(str(db_path))
+    with connection:
+        connection.execute("DELETE FROM ItemTable WHERE key = 'notes'")
+        connection.execute("UPDATE ItemTable SET value = 'now mentions a chat' WHERE key = 'binary'")
+        connection.execute("INSERT INTO ItemTable (key, value) VALUES ('later', 'another chat')")
+    connection.close()
+
+    updated = service.search(db_path, "chat", scope="value")
+    index = updated.index
+    assert not index.rebuilt and not index.up_to_date
+    assert (index.added, index.removed, index.changed, index.rows) == (1, 1, 1, 2003)
+    assert _keys(updated) == {"binary", "later"}
+    assert _keys(service.search(db_path, "augment-bytes")) == set()
+
+
+def test_index_holds_no_values_and_cleans_drop_it(tmp_path):
+    secret = "session-token-5f1c2a9e"
+    user_dir = fixtures.make_user_dir(tmp_path, rows=500, match_ratio=0.1)
+    db_path = user_dir / "globalStorage" / "state.vscdb"
+    connection = sqlite3.connect(str(db_path))
+    with connection:
+        connection.execute("INSERT INTO ItemTable (key, value) VALUES (?, ?)", ("augment.session", secret))
+    connection.close()
+
+    cache_dir = tmp_path / "cache"
+    configure(overrides={"cache.directory": str(cache_dir)})
+    try:
+        service = VSCodeService(user_dir)
+
+        def cached_bytes():
+            return b"".join(path.read_bytes() for path in cache_dir.rglob("*") if path.is_file())
+
+        assert _keys(service.search_database(secret, scope="value")) == {"augment.session"}
+        assert service.search_service.index_path(db_path).exists()
+        assert secret.encode() not in cached_bytes()
+
+        result = service.clean_database()
+        assert result.success and result.entries_affected > 0
+        assert not service.search_service.index_path(db_path).exists()
+        assert b"augment.session" not in cached_bytes()
+        service.wait_for_backups(30)
+    finally:
+        configure()
@@ -0,0 +1,67 @@
+"""
+Startup budget tests - measured with ``python -X importtime``
+
+These guard the fast startup paths: the headless CLI and the GUI launcher must
+not pull in PySide6, psutil or sqlite3 at import time, and their cumulative
+import time has to stay within a budget. Budgets can be relaxed on slow CI
+machines with the ``AUGMENT_VIP_IMPORT_BUDGET_SCALE`` environment variable.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time budgets in milliseconds
+IMPORT_BUDGETS_MS = {
+    "src.core.cli": 150,
+    "main": 100,
+}
+
+HEAVY_MODULES = ("PySide6", "psutil", "sqlite3")
+
+
+def measure_imports(module: str) -> Dict[str, int]:
+    """Import ``module`` in a fresh interpreter and return cumulative times (us)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        cumulative = cumulative.strip()
+        if cumulative.isdigit():
+            timings[name.strip()] = int(cumulative)
+    return timings
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+def test_entry_point_skips_heavy_modules(module):
+    timings = measure_imports(module)
+
+    assert module in timings
+    loaded_heavy = [name for name in timings if name.split(".")[0] in HEAVY_MODULES]
+    assert loaded_heavy == []
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+def test_entry_point_import_budget(module):
+    scale = float(os.environ.get("AUGMENT_VIP_IMPORT_BUDGET_SCALE", "1"))
+    budget_us = IMPORT_BUDGETS_MS[module] * 1000 * scale
+
+    # Best of three runs filters out disk cache and scheduler noise
+    best_us = min(measure_imports(module)[module] for _ in range(3))
+
+    assert best_us <= budget_us, f"{module} imports in {best_us / 1000:.1f} ms (budget {budget_us / 1000:.0f} ms)"
@@ -0,0 +1,96 @@
+"""
+Tests for stripping Augment references out of JSON values
+"""
+
+import json
+import sqlite3
+
+from src.models.database_model import DatabaseModel, compile_identity, strip_matching, value_prefilter
+from benchmarks import fixtures
+
+
+def _matches(text):
+    return compile_identity("%augment%").fullmatch(text) is not None
+
+
+def test_strip_matching():
+    value = {
+        "augment.vscode-augment": {"enabled": True},
+        "pinned": ["workbench.view.explorer", "workbench.view.extension.augment-panel"],
+        "extensions": [{"identifier": {"id": "Augment.vscode-augment"}}, {"identifier": {"id": "ms-python.python"}}],
+        "views": [{"id": "terminal", "isHidden": False}],
+    }
+    stripped, removed = strip_matching(value, _matches)
+
+    assert removed == 3
+    assert stripped == {
+        "pinned": ["workbench.view.explorer"],
+        "extensions": [{"identifier": {"id": "ms-python.python"}}],
+        "views": [{"id": "terminal", "isHidden": False}],
+    }
+    untouched = {"a": [1, {"b": "c"}]}
+    assert strip_matching(untouched, _matches) == (untouched, 0)
+    assert strip_matching(untouched, _matches)[0] is untouched
+
+
+def test_strip_matching_leaves_paths_and_other_fields():
+    value = {
+        "entries": [{"folderUri": "file:///home/u/augmented-reality"}, {"folderUri": "augment.vscode-augment"}],
+        "recent": ["/home/u/augment-demo", "C:\\Users\\u\\augment.notes", "augmented"],
+        "profile": {"name": "augment-demo", "extension": "Augment.vscode-augment"},
+        "views": [{"name": "Augment.chat", "order": 2}, {"name": "augmented view", "order": 3}],
+    }
+    stripped, removed = strip_matching(value, _matches)
+
+    assert removed == 1
+    assert stripped == {**value, "views": [{"name": "augmented view", "order": 3}]}
+
+
+def test_identity_needs_a_whole_segment():
+    for identity in ("Augment.vscode-augment", "workbench.view.extension.augment", "x.augment.chat", "x.augment-panel"):
+        assert _matches(identity), identity
+    for identity in ("publisher.augmented-foo", "x.augmentation", "augmented.tools", "x.augment_panel"):
+        assert not _matches(identity), identity
+
+
+def test_prefilter_selects_values_that_may_match():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE ItemTable (key TEXT, value BLOB)")
+    values = ["augment.chat", "AUGMENT", "Augment panel", b"augment blob", "other", "aug", None]
+    connection.executemany("INSERT INTO ItemTable VALUES ('k', ?)", [(value,) for value in values])
+    condition, params = value_prefilter("%augment%")
+
+    rows = connection.execute(f"SELECT value FROM ItemTable WHERE {condition}", params).fetchall()
+    assert sorted(row[0] for row in rows if isinstance(row[0], str)) == ["AUGMENT", "Augment panel", "augment.chat"]
+    assert b"augment blob" in [row[0] for row in rows]
+    assert value_prefilter("%")[0] == "CAST(value AS TEXT) LIKE ?"
+
+
+def test_clean_rewrites_nested_entries(tmp_path):
+    db_path = fixtures.make_state_db(tmp_path / "state.vscdb", rows=3000, match_ratio=0.05)
+    extensions = [{"id": "augment.vscode-augment", "uuid": "1"}, {"id": "ms-python.python", "uuid": "2"}]
+    views = {"workbench.view.extension.augment-panel": {"collapsed": False}, "workbench.panel.output": {}}
+    connection = sqlite3.connect(str(db_path))
+    with connection:
+        connection.execute("INSERT INTO ItemTable VALUES ('extensionsIdentifiers/disabled', ?)", (json.dumps(extensions),))
+        connection.execute("INSERT INTO ItemTable VALUES ('workbench.views.state', ?)", (json.dumps(views).encode(),))
+        connection.execute("INSERT INTO ItemTable VALUES ('notes', 'augment but not json')")
+    connection.close()
+
+    result = DatabaseModel(db_path).remove_augment_entries()
+
+    assert result.success, result.error
+    assert {rewrite.key: rewrite.entries_removed for rewrite in result.rewrites} == {
+        "extensionsIdentifiers/disabled": 1, "workbench.views.state": 1
+    }
+    assert all(rewrite.bytes_after < rewrite.bytes_before for rewrite in result.rewrites)
+
+    connection = sqlite3.connect(str(db_path))
+    rows = dict(connection.execute(
+        "SELECT key, value FROM ItemTable WHERE key IN ('extensionsIdentifiers/disabled', 'workbench.views.state', 'notes')"
+    ).fetchall())
+    connection.close()
+    assert json.loads(rows["extensionsIdentifiers/disabled"]) == extensions[1:]
+    assert isinstance(rows["workbench.views.state"], bytes)
+    assert json.loads(rows["workbench.views.state"]) == {"workbench.panel.output": {}}
+    assert rows["notes"] == "augment but not json"
@@ -0,0 +1,84 @@
+"""
+Tests for WAL-aware database backups
+"""
+
+import sqlite3
+
+from src.models.database_model import DatabaseModel
+from src.services.vscode_service import VSCodeService
+from benchmarks import fixtures
+
+
+def _count_rows(db_path):
+    connection = sqlite3.connect(str(db_path))
+    try:
+        return connection.execute("SELECT COUNT(*) FROM ItemTable").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def _wal_database(tmp_path, rows=500, pending=200):
+    """A WAL database with ``pending`` committed rows still only in the WAL; returns the open writer"""
+    db_path = fixtures.make_state_db(tmp_path / "state.vscdb", rows=rows)
+    writer = sqlite3.connect(str(db_path))
+    writer.execute("PRAGMA journal_mode=WAL")
+    writer.execute("PRAGMA wal_autocheckpoint=0")
+    with writer:
+        writer.executemany(
+            "INSERT INTO ItemTable (key, value) VALUES (?, ?)",
+            ((f"pending.{index}", "x" * 100) for index in range(pending))
+        )
+    return db_path, writer
+
+
+def test_checkpointed_wal_is_copied(tmp_path):
+    db_path, writer = _wal_database(tmp_path)
+    try:
+        model = DatabaseModel(db_path)
+        backup_path = model.create_backup(checkpoint="passive")
+
+        state = model.last_wal_state
+        assert state.journal_mode == "wal"
+        assert state.wal_bytes > 0
+        assert state.checkpoint == "passive" and state.wal_frames == state.checkpointed_frames
+        assert state.snapshot == "copy"
+        assert _count_rows(backup_path) == 700
+    finally:
+        writer.close()
+
+
+def test_unflushed_wal_uses_online_backup(tmp_path):
+    db_path, writer = _wal_database(tmp_path)
+    # An old read transaction pins the WAL so a passive checkpoint cannot finish
+    reader = sqlite3.connect(str(db_path), isolation_level=None)
+    reader.execute("BEGIN")
+    reader.execute("SELECT COUNT(*) FROM ItemTable").fetchone()
+    with writer:
+        writer.execute("INSERT INTO ItemTable (key, value) VALUES ('late', 'x')")
+    try:
+        for checkpoint in ("none", "passive"):
+            model = DatabaseModel(db_path)
+            backup_path = model.create_backup(checkpoint=checkpoint)
+
+            assert model.last_wal_state.snapshot == "online_backup"
+            assert _count_rows(backup_path) == 701
+            assert not backup_path.with_name(backup_path.name + "-wal").exists()
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_wal_state_is_recorded_in_manifest(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=300, match_ratio=0.1)
+    writer = sqlite3.connect(str(user_dir / "globalStorage" / "state.vscdb"))
+    writer.execute("PRAGMA journal_mode=WAL")
+    try:
+        service = VSCodeService(user_dir)
+        result = service.clean_database()
+        assert service.wait_for_backups(timeout=30)
+
+        record = service.backup_service.get(service.backup_service.locate(result.backup_path).name)
+        assert record.wal["journal_mode"] == "wal"
+        assert record.wal["snapshot"] == result.wal.snapshot
+    finally:
+        writer.close()
@@ -0,0 +1,159 @@
+"""
+Tests for the workspaceStorage database cleaner
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from src.core import metrics
+from src.services import workspace_service
+from src.services.backup_service import BackupService, wait_for_background
+from src.services.workspace_service import WorkspaceService, target_reachable, uri_to_path
+from benchmarks import fixtures
+
+
+def test_clean_all_workspaces(tmp_path):
+    user_dir = fixtures.make_user_dir(tmp_path, rows=100)
+    storage = fixtures.make_workspace_storage(user_dir, workspaces=6, rows=2000)
+    (storage / "no-database").mkdir()
+    service = WorkspaceService(storage)
+
+    before = service.count_entries(max_workers=3)
+    assert len(before) == 6
+    assert sum(before.values()) > 0
+
+    summary = service.clean_all(max_workers=3, vacuum=True)
+
+    assert summary.success
+    assert summary.workspaces_scanned == 6
+    assert summary.entries_affected == sum(before.values())
+    assert summary.bytes_reclaimed > 0
+    assert {result.workspace_id: result.entries_affected for result in summary.results} == before
+    assert sum(service.count_entries().values()) == 0
+
+    # Workspace backups go through the same background checksum and compression as the global ones
+    assert wait_for_background(30)
+    for result in summary.results:
+        records = BackupService(result.db_path.parent).list_backups()
+        assert [record.state for record in records] == ["stored"]
+        assert records[0].name.endswith(".gz") and (result.db_path.parent / records[0].name).exists()
+        assert not result.backup_path.exists()
+
+
+def test_unreadable_and_value_only_workspaces(tmp_path):
+    storage = fixtures.make_workspace_storage(tmp_path / "User", workspaces=2, rows=2000)
+    corrupt, rewritten = sorted(storage.iterdir())
+    (corrupt / "state.vscdb").write_bytes(b"not a database" * 512)
+    connection = sqlite3.connect(str(rewritten / "state.vscdb"))
+    with connection:
+        connection.execute("DELETE FROM ItemTable WHERE key LIKE '%augment%'")
+        payload = json.dumps([{"id": "augment.vscode-augment", "data": "x" * 200000}, {"id": "ms-python.python"}])
+        connection.execute("INSERT INTO ItemTable VALUES ('extensionsIdentifiers/disabled', ?)", (payload,))
+    connection.close()
+    service = WorkspaceService(storage)
+
+    assert service.count_entries()[corrupt.name] is None
+    summary = service.clean_all(vacuum=True)
+    results = {result.workspace_id: result for result in summary.results}
+
+    assert not summary.success
+    assert not results[corrupt.name].success and "could not be read" in results[corrupt.name].error
+    assert results[rewritten.name].success and results[rewritten.name].values_rewritten == 1
+    # Only a value was rewritten, and the space it held is still reclaimed
+    assert results[rewritten.name].bytes_reclaimed > 100000
+    wait_for_background(30)
+
+
+def test_missing_workspace_storage(tmp_path):
+    summary = WorkspaceService(tmp_path / "workspaceStorage").clean_all()
+    assert summary.success
+    assert summary.workspaces_scanned == 0
+
+
+def test_uri_to_path():
+    assert uri_to_path("file:///home/dev/my%20project") == Path("/home/dev/my project")
+    assert str(uri_to_path("file:///c%3A/Users/dev")).replace("\\", "/") == "c:/Users/dev"
+    assert uri_to_path("vscode-remote://ssh-remote+box/home/dev") is None
+
+
+def test_prune_stale_workspaces(tmp_path):
+    storage = fixtures.make_workspace_storage(tmp_path / "User", workspaces=4, rows=10)
+    folders = sorted(path for path in storage.iterdir())
+    project = tmp_path / "project"
+    project.mkdir()
+    targets = [project.as_uri(), (tmp_path / "deleted").as_uri(), "vscode-remote://wsl+Ubuntu/home/dev", None]
+    for folder, uri in zip(folders, targets):
+        if uri is None:
+            (folder / "workspace.json").unlink()
+        else:
+            (folder / "workspace.json").write_text(json.dumps({"folder": uri}), encoding="utf-8")
+    service = WorkspaceService(storage)
+
+    report = service.prune_stale(dry_run=True)
+    assert report.workspaces_scanned == 4
+    assert [target.workspace_id for target in report.stale] == [folders[1].name]
+    assert report.bytes_reclaimed > 0
+    assert folders[1].exists()
+
+    result = service.prune_stale(dry_run=False)
+    assert result.success
+    assert result.bytes_reclaimed == report.bytes_reclaimed
+    assert not folders[1].exists()
+    assert all(folder.exists() for index, folder in enumerate(folders) if index != 1)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX paths")
+def test_offline_targets_are_unknown_not_stale(tmp_path, monkeypatch):
+    media = tmp_path / "media"
+    (media / "dev").mkdir(parents=True)
+    monkeypatch.setattr(workspace_service, "MOUNT_PARENTS", (str(media),))
+
+    # An unmounted disk: nothing below the mount parent is a mount point
+    assert target_reachable(media / "dev" / "DISK" / "project") is None
+    assert target_reachable(tmp_path / "deleted") is False
+    assert target_reachable(tmp_path) is True
+    # Only the root is left: the mount the target lived on is missing
+    assert target_reachable(Path("/no-such-mount/project")) is None
+
+    # An fstab mount point that is not mounted (still an ordinary directory)
+    data = tmp_path / "data disk"
+    (data / "placeholder").mkdir(parents=True)
+    fstab = tmp_path / "fstab"
+    escaped = str(data).replace(" ", "\\040")
+    fstab.write_text(f"# comment\n/dev/sdb1 {escaped} ext4 defaults 0 2\n")
+    monkeypatch.setattr(workspace_service, "FSTAB_PATH", str(fstab))
+    assert target_reachable(data / "project") is None
+    # An empty directory is what an unmounted mount point looks like
+    (tmp_path / "empty").mkdir()
+    assert target_reachable(tmp_path / "empty" / "project") is None
+
+    storage = fixtures.make_workspace_storage(tmp_path / "User", workspaces=3, rows=10)
+    uris = ["file://server/share/project", "file:///d%3A/projects/app", (media / "dev" / "DISK").as_uri()]
+    for folder, uri in zip(sorted(storage.iterdir()), uris):
+        (folder / "workspace.json").write_text(json.dumps({"folder": uri}), encoding="utf-8")
+
+    index = WorkspaceService(storage).build_index()
+    assert [target.reachable for target in index.values()] == [None, None, None]
+    assert WorkspaceService(storage).prune_stale(dry_run=False).stale == []
+
+
+def test_clean_all_reports_spans_from_every_worker(tmp_path):
+    storage = fixtures.make_workspace_storage(tmp_path / "User", workspaces=4, rows=500)
+    streamed = []
+    metrics.enable()
+    try:
+        with metrics.collect(on_span=streamed.append) as outer:
+            summary = WorkspaceService(storage).clean_all(max_workers=4)
+    finally:
+        metrics.disable()
+
+    assert summary.success and summary.workspaces_cleaned == 4
+    deletes = [span for span in summary.metrics if span["name"] == "database.delete"]
+    assert len(deletes) == 4
+    assert sum(span["rows_deleted"] for span in deletes) == summary.entries_affected
+    assert [span["name"] for span in streamed] == [span["name"] for span in outer]
+    assert streamed[-1]["name"] == "workspaces.clean" and len(streamed) == len(summary.metrics)